@@ -2,10 +2,13 @@
 Flask API server for serving kitchen activity monitor events to the frontend.
 """
 
-from flask import Flask, jsonify, request
+from flask import Flask, jsonify, request, Response, stream_with_context
 from flask_cors import CORS
 import sys
 import os
+import json
+import queue
+import zlib
 
 # Add project root to path
 _script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -13,27 +16,22 @@ project_root = _script_dir
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
-from utils.event_logger import get_recent_events, get_event_count
-from utils.recipe_storage import get_all_recipes, add_recipe, get_recipe
-from utils.routine_storage import get_all_routines, add_routine, get_routine
+from utils.event_logger import (get_recent_events, get_event_count, configure_event_sink, get_event_store,
+                                get_events_after, ingest_event, ingest_events, subscribe_events)
+from utils.recipe_storage import add_recipe, get_recipe
+from utils.routine_storage import add_routine, get_routine
+from utils.content_library import get_content_library, DEFAULT_HOUSEHOLD, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from utils.prerender import prerender_async, recipe_items, routine_items
+from utils.pubsub import format_sse, sse_heartbeat, SSE_HEARTBEAT_SECONDS
+from utils.guidance_sessions import get_guidance_sessions, GuidanceConflict, KINDS, DEFAULT_DEVICE
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for frontend requests
 
-# Global state for recipe guidance
-RECIPE_GUIDANCE_ACTIVE = False
-ACTIVE_RECIPE_ID = None
-ACTIVE_RECIPE_DATA = None
+# This process is the event store: events logged here are never forwarded
+configure_event_sink("local")
 
-# Global state for routine guidance (bathroom)
-ROUTINE_GUIDANCE_ACTIVE = False
-ACTIVE_ROUTINE_ID = None
-ACTIVE_ROUTINE_DATA = None
-
-# Global state for laundry routine guidance
-LAUNDRY_ROUTINE_GUIDANCE_ACTIVE = False
-ACTIVE_LAUNDRY_ROUTINE_ID = None
-ACTIVE_LAUNDRY_ROUTINE_DATA = None
+# Recipe/routine/laundry guidance sessions live in data/guidance.db (see utils/guidance_sessions.py)
 
 # Global state for voice preference
 # Voice IDs for ElevenLabs:
@@ -47,32 +45,336 @@ VOICE_PREFERENCES = {
 }
 CURRENT_VOICE = "australian-woman"  # Default voice
 
+EVENT_STREAM_REPLAY_LIMIT = 500  # Missed events resent to a resuming /api/events/stream client
+EVENT_BATCH_LIMIT = 1000  # Maximum events accepted per /api/events/internal/batch request
+
+
+def _guidance_device(data=None):
+    """Device a guidance request targets ("device" in the JSON body or query string)."""
+    device = (data or {}).get('device') or request.args.get('device')
+    return device or DEFAULT_DEVICE
+
+
+def _start_guidance(kind, label, get_item):
+    """
+    Start guidance of a kind from a start request.
+
+    The body names the item (recipe_id or routine_id) and may add device and
+    expected_version; the latter makes the start compare-and-set (409 if the
+    session changed since that version).
+    """
+    id_field = KINDS[kind][1]
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({
+                "status": "error",
+                "message": "No JSON data provided"
+            }), 400
+        
+        item_id = data.get(id_field, '')
+        if not item_id:
+            return jsonify({
+                "status": "error",
+                "message": f"{id_field} is required"
+            }), 400
+        
+        item = get_item(item_id)
+        if not item:
+            return jsonify({
+                "status": "error",
+                "message": f"{KINDS[kind][2].capitalize()} '{item_id}' not found"
+            }), 404
+        
+        state = get_guidance_sessions().start(kind, item_id, item, _guidance_device(data),
+                                              data.get('expected_version'))
+        
+        return jsonify({
+            "status": "success",
+            "message": f"{label.capitalize()} guidance started",
+            id_field: item_id,
+            f"{KINDS[kind][2]}_name": item.get('name', item_id),
+            "total_steps": len(item.get('steps', [])),
+            "version": state["version"]
+        })
+    except GuidanceConflict as e:
+        return _guidance_conflict(e)
+    except ValueError as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": f"Error starting {label} guidance: {str(e)}"
+        }), 500
+
+
+def _stop_guidance(kind, label):
+    """Stop guidance of a kind (optional device and expected_version, as for start)."""
+    data = request.get_json(silent=True) or {}
+    try:
+        state = get_guidance_sessions().stop(kind, _guidance_device(data), data.get('expected_version'))
+    except GuidanceConflict as e:
+        return _guidance_conflict(e)
+    except ValueError as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 400
+    
+    return jsonify({
+        "status": "success",
+        "message": f"{label.capitalize()} guidance stopped",
+        "version": state["version"]
+    })
+
+
+def _guidance_conflict(conflict):
+    return jsonify({
+        "status": "error",
+        "message": str(conflict),
+        "version": conflict.current
+    }), 409
+
+
+def _guidance_status(kind):
+    """Status response for a kind: name and step count of the active item, plus the session version."""
+    try:
+        state = get_guidance_sessions().state(kind, _guidance_device())
+    except ValueError as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 400
+    _, id_field, item_field = KINDS[kind]
+    if state["active"]:
+        item_id, item = state[id_field], state[item_field]
+        return jsonify({
+            "status": "success",
+            "active": True,
+            id_field: item_id,
+            f"{item_field}_name": item.get('name', item_id),
+            "total_steps": len(item.get('steps', [])),
+            "version": state["version"]
+        })
+    return jsonify({
+        "status": "success",
+        "active": False,
+        "version": state["version"]
+    })
+
+
+def _guidance_active(kind):
+    """Get-active response for a kind: the whole active item (read by the hardware process)."""
+    try:
+        state = get_guidance_sessions().state(kind, _guidance_device())
+    except ValueError as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 400
+    return jsonify(dict(state, status="success"))
+
+
+def _prerender_in_background(items_fn, item_id, item):
+    """Queue TTS prerendering of a newly added recipe/routine for every voice."""
+    if not item:
+        return
+    try:
+        prerender_async(items_fn(item_id, item), VOICE_PREFERENCES.values())
+    except Exception as e:
+        print(f"[PRERENDER] Could not queue prerender for '{item_id}': {e}")
+
+
+def _conditional_json(version_info, build):
+    """
+    Answer a GET with 304 Not Modified if the client's If-None-Match still matches.
+
+    Args:
+        version_info: (version, etag) of the data the response is built from
+        build: Returns the response dictionary (only called when it must be sent)
+    """
+    version, etag = version_info
+    if etag in request.if_none_match:
+        response = Response(status=304)
+    else:
+        payload = build()
+        payload["version"] = version
+        response = jsonify(payload)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'  # Cache, but revalidate every time
+    return response
+
+
+def _optional_float_arg(name: str):
+    value = request.args.get(name)
+    return float(value) if value not in (None, '') else None
+
+
+def _optional_int_arg(name: str):
+    value = request.args.get(name)
+    return int(value) if value not in (None, '') else None
+
+
+def _library_listing(kind: str, key: str):
+    """
+    Answer a content library listing from the request's arguments.
+
+    household, q (search words), offset and limit (default DEFAULT_PAGE_SIZE) are
+    all optional. Documents come back under key as {id: document}, plus order
+    (the ids in page order: by name, or best match first when searching) and
+    next_offset (None on the last page). The ETag covers the arguments too.
+
+    Raises:
+        ValueError: for an invalid household, offset or limit
+    """
+    household = request.args.get('household') or DEFAULT_HOUSEHOLD
+    query = request.args.get('q', '').strip()
+    offset = max(0, _optional_int_arg('offset') or 0)
+    limit = max(1, min(_optional_int_arg('limit') or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+    library = get_content_library()
+    version, etag = library.version(kind, household)
+    arguments = f"{household}\n{query}\n{offset}\n{limit}".encode('utf-8')
+    etag = f"{etag}.{zlib.crc32(arguments):08x}"
+
+    def build():
+        page = library.list(kind, household, query, offset, limit)
+        items = page["items"]
+        next_offset = offset + len(items)
+        return {
+            "status": "success",
+            "household": household,
+            key: dict(items),
+            "order": [item_id for item_id, _ in items],
+            "count": len(items),
+            "total": page["total"],
+            "offset": offset,
+            "limit": limit,
+            "next_offset": next_offset if next_offset < page["total"] else None
+        }
+    return _conditional_json((version, etag), build)
+
+
+def _query_events(room):
+    """
+    Run an event query from the request's arguments.
+
+    after=<id> returns the events logged after that cursor, oldest first (incremental
+    sync); otherwise the newest events are returned, optionally narrowed by since_id,
+    since/until timestamps and event_type. Plain "latest N", since_id and after
+    queries are served from the hot cache.
+
+    Returns:
+        Response dictionary with events, count and cursor (newest id seen, pass back as after)
+    """
+    limit = int(request.args.get('limit', 20))  # Default to 20 events
+    after = _optional_int_arg('after')
+    since_id = _optional_int_arg('since_id')
+    since = _optional_float_arg('since')
+    until = _optional_float_arg('until')
+    event_type = request.args.get('event_type') or None
+    if after is not None:
+        events = get_events_after(after, room=room, limit=limit)
+        return {
+            "events": events,
+            "count": len(events),
+            "cursor": events[-1]["id"] if events else after,
+            "has_more": len(events) == limit
+        }
+    if since is None and until is None and event_type is None:
+        events = get_recent_events(room=room, limit=limit, since_id=since_id)
+    else:
+        events = get_event_store().query(room=room, event_type=event_type, since=since,
+                                         until=until, limit=limit, since_id=since_id)
+    return {
+        "events": events,
+        "count": len(events),
+        "cursor": max((event["id"] for event in events), default=since_id or 0)
+    }
+
 
 @app.route('/api/events', methods=['GET'])
 def get_events():
-    """Get recent events from the activity monitor."""
+    """
+    Get recent events from the activity monitor.
+    Pollers should pass the returned cursor back as ?after=<cursor> to receive only new events.
+    """
     room = request.args.get('room', 'kitchen')  # Default to kitchen
-    limit = int(request.args.get('limit', 20))  # Default to 20 events
+    try:
+        result = _query_events(room)
+    except ValueError:
+        return jsonify({"error": "limit, after, since_id, since and until must be numbers"}), 400
     
-    events = get_recent_events(room=room, limit=limit)
+    result["total_events"] = get_event_count()
+    return jsonify(result)
+
+
+@app.route('/api/events/stream', methods=['GET'])
+def stream_events():
+    """
+    Server-Sent Events stream of activity events as they are logged.
+    Optional ?room= filter. Each "activity" event carries the event id, so a
+    reconnecting client (Last-Event-ID header, or ?last_event_id=) first
+    receives what it missed and then continues live. Heartbeats keep idle
+    connections open.
+    """
+    room = request.args.get('room') or None
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        return jsonify({"error": "Last-Event-ID must be an event id"}), 400
     
-    return jsonify({
-        "events": events,
-        "count": len(events),
-        "total_events": get_event_count()
+    # Subscribe before reading the backlog so no event can fall in between
+    subscription = subscribe_events()
+    backlog = []
+    if last_event_id is not None:
+        backlog = get_events_after(last_event_id, room=room, limit=EVENT_STREAM_REPLAY_LIMIT)
+    room_key = room.lower() if room else None
+
+    def generate():
+        last_sent = last_event_id or 0
+        dropped = 0
+        try:
+            for event in backlog:
+                yield format_sse(event, event="activity", event_id=event["id"])
+                last_sent = event["id"]
+            while True:
+                try:
+                    event = subscription.get(timeout=SSE_HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    yield sse_heartbeat()
+                    continue
+                if subscription.dropped != dropped:
+                    # This client fell behind and lost queued events - resend them from the store
+                    dropped = subscription.dropped
+                    for missed in get_events_after(last_sent, room=room, limit=EVENT_STREAM_REPLAY_LIMIT):
+                        yield format_sse(missed, event="activity", event_id=missed["id"])
+                        last_sent = missed["id"]
+                if event["id"] <= last_sent or (room_key and event["room"].lower() != room_key):
+                    continue
+                yield format_sse(event, event="activity", event_id=event["id"])
+                last_sent = event["id"]
+        finally:
+            subscription.close()
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
     })
 
 
 @app.route('/api/events/<room>', methods=['GET'])
 def get_room_events(room):
-    """Get recent events for a specific room (kitchen, bathroom, etc.)."""
-    limit = int(request.args.get('limit', 20))
-    events = get_recent_events(room=room, limit=limit)
+    """Get recent events for a specific room (kitchen, bathroom, etc.); supports ?after=<cursor>."""
+    try:
+        result = _query_events(room)
+    except ValueError:
+        return jsonify({"error": "limit, after, since_id, since and until must be numbers"}), 400
     
-    return jsonify({
-        "events": events,
-        "count": len(events)
-    })
+    return jsonify(result)
 
 
 @app.route('/api/health', methods=['GET'])
@@ -152,31 +454,70 @@ def create_test_event():
 
 @app.route('/api/events/internal', methods=['POST'])
 def receive_event():
-    """Receive events from external processes (like ifmagic_trial.py)."""
-    from utils.event_logger import log_event
-    
+    """
+    Receive events from external processes (like ifmagic_trial.py).
+    Events forwarded with origin/origin_id are stored once, so retries are safe.
+    """
     try:
         event_data = request.get_json()
         if not event_data:
             return jsonify({"error": "No JSON data provided"}), 400
         
-        # Log the received event
-        log_event(
-            event_type=event_data.get('event_type', 'unknown'),
-            message=event_data.get('message', ''),
-            room=event_data.get('room', 'kitchen'),
-            severity=event_data.get('severity', 'info'),
-            metadata=event_data.get('metadata', {})
-        )
+        # Log the received event (skipped if this origin id was already stored)
+        event_id, duplicate = ingest_event(event_data)
         
         return jsonify({
             "status": "success",
-            "message": "Event received and logged"
+            "message": "Duplicate event ignored" if duplicate else "Event received and logged",
+            "id": event_id,
+            "duplicate": duplicate
         })
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": f"Invalid event: {e}"}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+@app.route('/api/events/internal/batch', methods=['POST'])
+def receive_event_batch():
+    """
+    Receive many events in one request (used by the room processes' event forwarders).
+    Body: a JSON array of events, or NDJSON (one event per line,
+    Content-Type: application/x-ndjson). Valid events are stored in a single
+    transaction; the response has one result per item, in order.
+    """
+    if request.mimetype == 'application/x-ndjson':
+        items = []
+        for line in request.get_data(as_text=True).splitlines():
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except json.JSONDecodeError:
+                items.append(None)  # Reported as an invalid item below
+    else:
+        items = request.get_json(silent=True)
+        if not isinstance(items, list):
+            return jsonify({"error": "Expected a JSON array of events (or NDJSON)"}), 400
+    if not items:
+        return jsonify({"error": "No events provided"}), 400
+    if len(items) > EVENT_BATCH_LIMIT:
+        return jsonify({"error": f"At most {EVENT_BATCH_LIMIT} events per batch"}), 413
+    
+    try:
+        results = ingest_events(items)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    
+    return jsonify({
+        "status": "success",
+        "results": results,
+        "stored": sum(1 for result in results if result["status"] == "stored"),
+        "duplicates": sum(1 for result in results if result["status"] == "duplicate"),
+        "errors": sum(1 for result in results if result["status"] == "error")
+    })
+
+
 @app.route('/api/daily-log/generate', methods=['POST'])
 def generate_daily_log():
     """Generate a daily log from events in the last 24 hours and create it in OpenNote."""
@@ -200,14 +541,21 @@ def generate_daily_log():
 
 @app.route('/api/recipes', methods=['GET'])
 def get_recipes():
-    """Get all recipes."""
+    """
+    Get a page of recipes (supports If-None-Match; 304 when unchanged).
+    
+    Query params:
+        household: Household namespace (default: "default")
+        q: Search words matched against names, descriptions and steps
+        offset, limit: Paging (limit defaults to 100, max 500)
+    """
     try:
-        recipes = get_all_recipes()
+        return _library_listing("recipe", "recipes")
+    except ValueError as e:
         return jsonify({
-            "status": "success",
-            "recipes": recipes,
-            "count": len(recipes)
-        })
+            "status": "error",
+            "message": str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             "status": "error",
@@ -217,11 +565,13 @@ def get_recipes():
 
 @app.route('/api/recipes/<recipe_id>', methods=['GET'])
 def get_recipe_by_id(recipe_id):
-    """Get a specific recipe by ID."""
+    """Get a specific recipe by ID (?household=; supports If-None-Match; 304 when unchanged)."""
     try:
-        recipe = get_recipe(recipe_id)
+        household = request.args.get('household') or DEFAULT_HOUSEHOLD
+        version_info = get_content_library().version("recipe", household)
+        recipe = get_recipe(recipe_id, household)
         if recipe:
-            return jsonify({
+            return _conditional_json(version_info, lambda: {
                 "status": "success",
                 "recipe": recipe
             })
@@ -230,6 +580,11 @@ def get_recipe_by_id(recipe_id):
                 "status": "error",
                 "message": f"Recipe '{recipe_id}' not found"
             }), 404
+    except ValueError as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             "status": "error",
@@ -239,7 +594,7 @@ def get_recipe_by_id(recipe_id):
 
 @app.route('/api/recipes', methods=['POST'])
 def create_recipe():
-    """Add a new recipe."""
+    """Add a new recipe (optionally to another household with "household")."""
     try:
         data = request.get_json()
         if not data:
@@ -252,14 +607,16 @@ def create_recipe():
         name = data.get('name', '')
         steps = data.get('steps', [])
         description = data.get('description', '')
+        household = data.get('household') or None
         
         if not recipe_id:
             # Generate recipe_id from name if not provided
             recipe_id = name.lower().replace(' ', '_').replace('-', '_')
         
-        result = add_recipe(recipe_id, name, steps, description)
+        result = add_recipe(recipe_id, name, steps, description, household)
         
         if result.get("status") == "success":
+            _prerender_in_background(recipe_items, result["recipe_id"], get_recipe(result["recipe_id"], household))
             return jsonify(result)
         else:
             return jsonify(result), 400
@@ -274,113 +631,44 @@ def create_recipe():
 @app.route('/api/recipe-guidance/start', methods=['POST'])
 def start_recipe_guidance():
     """Start recipe guidance mode."""
-    global RECIPE_GUIDANCE_ACTIVE, ACTIVE_RECIPE_ID, ACTIVE_RECIPE_DATA
-    
-    try:
-        data = request.get_json()
-        if not data:
-            return jsonify({
-                "status": "error",
-                "message": "No JSON data provided"
-            }), 400
-        
-        recipe_id = data.get('recipe_id', '')
-        if not recipe_id:
-            return jsonify({
-                "status": "error",
-                "message": "recipe_id is required"
-            }), 400
-        
-        recipe = get_recipe(recipe_id)
-        if not recipe:
-            return jsonify({
-                "status": "error",
-                "message": f"Recipe '{recipe_id}' not found"
-            }), 404
-        
-        RECIPE_GUIDANCE_ACTIVE = True
-        ACTIVE_RECIPE_ID = recipe_id
-        ACTIVE_RECIPE_DATA = recipe
-        
-        return jsonify({
-            "status": "success",
-            "message": "Recipe guidance started",
-            "recipe_id": recipe_id,
-            "recipe_name": recipe.get('name', recipe_id),
-            "total_steps": len(recipe.get('steps', []))
-        })
-    except Exception as e:
-        return jsonify({
-            "status": "error",
-            "message": f"Error starting recipe guidance: {str(e)}"
-        }), 500
+    return _start_guidance("recipe", "recipe", get_recipe)
 
 
 @app.route('/api/recipe-guidance/stop', methods=['POST'])
 def stop_recipe_guidance():
     """Stop recipe guidance mode."""
-    global RECIPE_GUIDANCE_ACTIVE, ACTIVE_RECIPE_ID, ACTIVE_RECIPE_DATA
-    
-    RECIPE_GUIDANCE_ACTIVE = False
-    ACTIVE_RECIPE_ID = None
-    ACTIVE_RECIPE_DATA = None
-    
-    return jsonify({
-        "status": "success",
-        "message": "Recipe guidance stopped"
-    })
+    return _stop_guidance("recipe", "recipe")
 
 
 @app.route('/api/recipe-guidance/status', methods=['GET'])
 def get_recipe_guidance_status():
     """Get current recipe guidance status."""
-    global RECIPE_GUIDANCE_ACTIVE, ACTIVE_RECIPE_ID, ACTIVE_RECIPE_DATA
-    
-    if RECIPE_GUIDANCE_ACTIVE and ACTIVE_RECIPE_DATA:
-        return jsonify({
-            "status": "success",
-            "active": True,
-            "recipe_id": ACTIVE_RECIPE_ID,
-            "recipe_name": ACTIVE_RECIPE_DATA.get('name', ACTIVE_RECIPE_ID),
-            "total_steps": len(ACTIVE_RECIPE_DATA.get('steps', []))
-        })
-    else:
-        return jsonify({
-            "status": "success",
-            "active": False
-        })
+    return _guidance_status("recipe")
 
 
 @app.route('/api/recipe-guidance/get-active', methods=['GET'])
 def get_active_recipe():
     """Get the currently active recipe (for ifmagic_trial.py to read)."""
-    global RECIPE_GUIDANCE_ACTIVE, ACTIVE_RECIPE_ID, ACTIVE_RECIPE_DATA
-    
-    if RECIPE_GUIDANCE_ACTIVE and ACTIVE_RECIPE_DATA:
-        return jsonify({
-            "status": "success",
-            "active": True,
-            "recipe_id": ACTIVE_RECIPE_ID,
-            "recipe": ACTIVE_RECIPE_DATA
-        })
-    else:
-        return jsonify({
-            "status": "success",
-            "active": False,
-            "recipe": None
-        })
+    return _guidance_active("recipe")
 
 
 @app.route('/api/routines', methods=['GET'])
 def get_routines():
-    """Get all routines."""
+    """
+    Get a page of routines (supports If-None-Match; 304 when unchanged).
+    
+    Query params:
+        household: Household namespace (default: "default")
+        q: Search words matched against names, descriptions and steps
+        offset, limit: Paging (limit defaults to 100, max 500)
+    """
     try:
-        routines = get_all_routines()
+        return _library_listing("routine", "routines")
+    except ValueError as e:
         return jsonify({
-            "status": "success",
-            "routines": routines,
-            "count": len(routines)
-        })
+            "status": "error",
+            "message": str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             "status": "error",
@@ -390,11 +678,13 @@ def get_routines():
 
 @app.route('/api/routines/<routine_id>', methods=['GET'])
 def get_routine_by_id(routine_id):
-    """Get a specific routine by ID."""
+    """Get a specific routine by ID (?household=; supports If-None-Match; 304 when unchanged)."""
     try:
-        routine = get_routine(routine_id)
+        household = request.args.get('household') or DEFAULT_HOUSEHOLD
+        version_info = get_content_library().version("routine", household)
+        routine = get_routine(routine_id, household)
         if routine:
-            return jsonify({
+            return _conditional_json(version_info, lambda: {
                 "status": "success",
                 "routine": routine
             })
@@ -403,6 +693,11 @@ def get_routine_by_id(routine_id):
                 "status": "error",
                 "message": f"Routine '{routine_id}' not found"
             }), 404
+    except ValueError as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             "status": "error",
@@ -412,7 +707,7 @@ def get_routine_by_id(routine_id):
 
 @app.route('/api/routines', methods=['POST'])
 def create_routine():
-    """Add a new routine."""
+    """Add a new routine (optionally to another household with "household")."""
     try:
         data = request.get_json()
         if not data:
@@ -425,14 +720,16 @@ def create_routine():
         name = data.get('name', '')
         steps = data.get('steps', [])
         description = data.get('description', '')
+        household = data.get('household') or None
         
         if not routine_id:
             # Generate routine_id from name if not provided
             routine_id = name.lower().replace(' ', '_').replace('-', '_')
         
-        result = add_routine(routine_id, name, steps, description)
+        result = add_routine(routine_id, name, steps, description, household)
         
         if result.get("status") == "success":
+            _prerender_in_background(routine_items, result["routine_id"], get_routine(result["routine_id"], household))
             return jsonify(result)
         else:
             return jsonify(result), 400
@@ -447,201 +744,121 @@ def create_routine():
 @app.route('/api/routine-guidance/start', methods=['POST'])
 def start_routine_guidance():
     """Start routine guidance mode."""
-    global ROUTINE_GUIDANCE_ACTIVE, ACTIVE_ROUTINE_ID, ACTIVE_ROUTINE_DATA
-    
-    try:
-        data = request.get_json()
-        if not data:
-            return jsonify({
-                "status": "error",
-                "message": "No JSON data provided"
-            }), 400
-        
-        routine_id = data.get('routine_id', '')
-        if not routine_id:
-            return jsonify({
-                "status": "error",
-                "message": "routine_id is required"
-            }), 400
-        
-        routine = get_routine(routine_id)
-        if not routine:
-            return jsonify({
-                "status": "error",
-                "message": f"Routine '{routine_id}' not found"
-            }), 404
-        
-        ROUTINE_GUIDANCE_ACTIVE = True
-        ACTIVE_ROUTINE_ID = routine_id
-        ACTIVE_ROUTINE_DATA = routine
-        
-        return jsonify({
-            "status": "success",
-            "message": "Routine guidance started",
-            "routine_id": routine_id,
-            "routine_name": routine.get('name', routine_id),
-            "total_steps": len(routine.get('steps', []))
-        })
-    except Exception as e:
-        return jsonify({
-            "status": "error",
-            "message": f"Error starting routine guidance: {str(e)}"
-        }), 500
+    return _start_guidance("routine", "routine", get_routine)
 
 
 @app.route('/api/routine-guidance/stop', methods=['POST'])
 def stop_routine_guidance():
     """Stop routine guidance mode."""
-    global ROUTINE_GUIDANCE_ACTIVE, ACTIVE_ROUTINE_ID, ACTIVE_ROUTINE_DATA
-    
-    ROUTINE_GUIDANCE_ACTIVE = False
-    ACTIVE_ROUTINE_ID = None
-    ACTIVE_ROUTINE_DATA = None
-    
-    return jsonify({
-        "status": "success",
-        "message": "Routine guidance stopped"
-    })
+    return _stop_guidance("routine", "routine")
 
 
 @app.route('/api/routine-guidance/status', methods=['GET'])
 def get_routine_guidance_status():
     """Get current routine guidance status."""
-    global ROUTINE_GUIDANCE_ACTIVE, ACTIVE_ROUTINE_ID, ACTIVE_ROUTINE_DATA
-    
-    if ROUTINE_GUIDANCE_ACTIVE and ACTIVE_ROUTINE_DATA:
-        return jsonify({
-            "status": "success",
-            "active": True,
-            "routine_id": ACTIVE_ROUTINE_ID,
-            "routine_name": ACTIVE_ROUTINE_DATA.get('name', ACTIVE_ROUTINE_ID),
-            "total_steps": len(ACTIVE_ROUTINE_DATA.get('steps', []))
-        })
-    else:
-        return jsonify({
-            "status": "success",
-            "active": False
-        })
+    return _guidance_status("routine")
 
 
 @app.route('/api/routine-guidance/get-active', methods=['GET'])
 def get_active_routine():
     """Get the currently active routine (for ifmagic_trial.py to read)."""
-    global ROUTINE_GUIDANCE_ACTIVE, ACTIVE_ROUTINE_ID, ACTIVE_ROUTINE_DATA
-    
-    if ROUTINE_GUIDANCE_ACTIVE and ACTIVE_ROUTINE_DATA:
-        return jsonify({
-            "status": "success",
-            "active": True,
-            "routine_id": ACTIVE_ROUTINE_ID,
-            "routine": ACTIVE_ROUTINE_DATA
-        })
-    else:
-        return jsonify({
-            "status": "success",
-            "active": False,
-            "routine": None
-        })
+    return _guidance_active("routine")
 
 
-@app.route('/api/laundry-routine-guidance/start', methods=['POST'])
-def start_laundry_routine_guidance():
-    """Start laundry routine guidance mode."""
-    global LAUNDRY_ROUTINE_GUIDANCE_ACTIVE, ACTIVE_LAUNDRY_ROUTINE_ID, ACTIVE_LAUNDRY_ROUTINE_DATA
-    
+@app.route('/api/cycle-types', methods=['GET'])
+def get_cycle_types():
+    """
+    Get a page of laundry cycle types (same query params as /api/recipes).
+    """
     try:
-        data = request.get_json()
-        if not data:
-            return jsonify({
-                "status": "error",
-                "message": "No JSON data provided"
-            }), 400
-        
-        routine_id = data.get('routine_id', '')
-        if not routine_id:
-            return jsonify({
-                "status": "error",
-                "message": "routine_id is required"
-            }), 400
-        
-        routine = get_routine(routine_id)
-        if not routine:
-            return jsonify({
-                "status": "error",
-                "message": f"Routine '{routine_id}' not found"
-            }), 404
-        
-        LAUNDRY_ROUTINE_GUIDANCE_ACTIVE = True
-        ACTIVE_LAUNDRY_ROUTINE_ID = routine_id
-        ACTIVE_LAUNDRY_ROUTINE_DATA = routine
-        
+        return _library_listing("cycle_type", "cycle_types")
+    except ValueError as e:
         return jsonify({
-            "status": "success",
-            "message": "Laundry routine guidance started",
-            "routine_id": routine_id,
-            "routine_name": routine.get('name', routine_id),
-            "total_steps": len(routine.get('steps', []))
-        })
+            "status": "error",
+            "message": str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             "status": "error",
-            "message": f"Error starting laundry routine guidance: {str(e)}"
+            "message": f"Error loading cycle types: {str(e)}"
         }), 500
 
 
+@app.route('/api/laundry-routine-guidance/start', methods=['POST'])
+def start_laundry_routine_guidance():
+    """Start laundry routine guidance mode."""
+    return _start_guidance("laundry", "laundry routine", get_routine)
+
+
 @app.route('/api/laundry-routine-guidance/stop', methods=['POST'])
 def stop_laundry_routine_guidance():
     """Stop laundry routine guidance mode."""
-    global LAUNDRY_ROUTINE_GUIDANCE_ACTIVE, ACTIVE_LAUNDRY_ROUTINE_ID, ACTIVE_LAUNDRY_ROUTINE_DATA
-    
-    LAUNDRY_ROUTINE_GUIDANCE_ACTIVE = False
-    ACTIVE_LAUNDRY_ROUTINE_ID = None
-    ACTIVE_LAUNDRY_ROUTINE_DATA = None
-    
-    return jsonify({
-        "status": "success",
-        "message": "Laundry routine guidance stopped"
-    })
+    return _stop_guidance("laundry", "laundry routine")
 
 
 @app.route('/api/laundry-routine-guidance/status', methods=['GET'])
 def get_laundry_routine_guidance_status():
     """Get current laundry routine guidance status."""
-    global LAUNDRY_ROUTINE_GUIDANCE_ACTIVE, ACTIVE_LAUNDRY_ROUTINE_ID, ACTIVE_LAUNDRY_ROUTINE_DATA
-    
-    if LAUNDRY_ROUTINE_GUIDANCE_ACTIVE and ACTIVE_LAUNDRY_ROUTINE_DATA:
-        return jsonify({
-            "status": "success",
-            "active": True,
-            "routine_id": ACTIVE_LAUNDRY_ROUTINE_ID,
-            "routine_name": ACTIVE_LAUNDRY_ROUTINE_DATA.get('name', ACTIVE_LAUNDRY_ROUTINE_ID),
-            "total_steps": len(ACTIVE_LAUNDRY_ROUTINE_DATA.get('steps', []))
-        })
-    else:
-        return jsonify({
-            "status": "success",
-            "active": False
-        })
+    return _guidance_status("laundry")
 
 
 @app.route('/api/laundry-routine-guidance/get-active', methods=['GET'])
 def get_active_laundry_routine():
     """Get the currently active laundry routine (for ifmagic_trial.py to read)."""
-    global LAUNDRY_ROUTINE_GUIDANCE_ACTIVE, ACTIVE_LAUNDRY_ROUTINE_ID, ACTIVE_LAUNDRY_ROUTINE_DATA
-    
-    if LAUNDRY_ROUTINE_GUIDANCE_ACTIVE and ACTIVE_LAUNDRY_ROUTINE_DATA:
-        return jsonify({
-            "status": "success",
-            "active": True,
-            "routine_id": ACTIVE_LAUNDRY_ROUTINE_ID,
-            "routine": ACTIVE_LAUNDRY_ROUTINE_DATA
-        })
-    else:
+    return _guidance_active("laundry")
+
+
+@app.route('/api/guidance/stream', methods=['GET'])
+def stream_guidance():
+    """
+    Server-Sent Events stream of guidance start/stop (for the hardware process).
+    Sends a "snapshot" event with every guidance kind on connect, then a
+    "guidance" event ({kind, room, device, state}) on every change made by any
+    API process, with heartbeats in between. ?device= selects the device
+    (default: "default").
+    """
+    device = _guidance_device()
+    sessions = get_guidance_sessions()
+    try:
+        # Subscribe before taking the snapshot so no change can fall in between
+        subscription = sessions.subscribe()
+        snapshot = sessions.snapshot(device)
+    except ValueError as e:
+        subscription.close()
         return jsonify({
-            "status": "success",
-            "active": False,
-            "routine": None
-        })
+            "status": "error",
+            "message": str(e)
+        }), 400
+
+    def generate():
+        try:
+            yield format_sse(snapshot, event="snapshot")
+            while True:
+                try:
+                    message = subscription.get(timeout=SSE_HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    yield sse_heartbeat()
+                    continue
+                if message["device"] == device:
+                    yield format_sse(message, event="guidance")
+        finally:
+            subscription.close()
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+
+@app.route('/api/guidance/sessions', methods=['GET'])
+def get_guidance_sessions_list():
+    """Get every active guidance session (kind, room, device and state)."""
+    sessions = get_guidance_sessions().sessions()
+    return jsonify({
+        "status": "success",
+        "sessions": sessions,
+        "count": len(sessions)
+    })
 
 
 @app.route('/api/voice-preference', methods=['GET'])
@@ -706,27 +923,33 @@ if __name__ == '__main__':
     print("API endpoints:")
     print("  GET /api/events?room=kitchen&limit=20")
     print("  GET /api/events/kitchen?limit=20")
+    print("  GET /api/events/stream?room=kitchen (live activity event stream)")
+    print("  POST /api/events/internal/batch (JSON array or NDJSON of events)")
     print("  GET /api/health")
     print("  GET /api/test-opennote (test OpenNote API key)")
     print("  POST /api/daily-log/generate")
-    print("  GET /api/recipes")
+    print("  GET /api/recipes (?household=&q=&offset=&limit=)")
     print("  GET /api/recipes/<recipe_id>")
     print("  POST /api/recipes (add new recipe)")
     print("  POST /api/recipe-guidance/start (start recipe guidance)")
     print("  POST /api/recipe-guidance/stop (stop recipe guidance)")
     print("  GET /api/recipe-guidance/status (get guidance status)")
     print("  GET /api/recipe-guidance/get-active (get active recipe for hardware)")
-    print("  GET /api/routines")
+    print("  GET /api/routines (?household=&q=&offset=&limit=)")
     print("  GET /api/routines/<routine_id>")
     print("  POST /api/routines (add new routine)")
     print("  POST /api/routine-guidance/start (start routine guidance)")
     print("  POST /api/routine-guidance/stop (stop routine guidance)")
     print("  GET /api/routine-guidance/status (get guidance status)")
     print("  GET /api/routine-guidance/get-active (get active routine for hardware)")
+    print("  GET /api/cycle-types (?household=&q=&offset=&limit=)")
     print("  POST /api/laundry-routine-guidance/start (start laundry routine guidance)")
     print("  POST /api/laundry-routine-guidance/stop (stop laundry routine guidance)")
     print("  GET /api/laundry-routine-guidance/status (get laundry guidance status)")
     print("  GET /api/laundry-routine-guidance/get-active (get active laundry routine for hardware)")
+    print("  GET /api/guidance/stream (guidance start/stop push stream for hardware)")
+    print("  GET /api/guidance/sessions (active guidance sessions by room and device)")
+    print("  (guidance routes take an optional device; start/stop take expected_version, 409 on conflict)")
     print(f"\nServer running on http://localhost:{port}")
     print(f"(Set API_PORT environment variable to use a different port)")
     app.run(host='0.0.0.0', port=port, debug=True)
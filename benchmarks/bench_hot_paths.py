@@ -0,0 +1,459 @@
+"""
+Benchmarks for the sensor loop's hot paths.
+Measures per-call latency (p50/p99) and throughput of:
+
+- warning detection: each room's DetectorEngine (built by main.build_warning_engine)
+  over synthetic sensor streams
+- guidance: each room's GuidanceEngine ticks (main.build_guidance_engine)
+- thermal frame summaries (ThermalFrameProcessor.process)
+- event logging: log_event, and get_recent_events/get_events_after against
+  event stores of 100 to 1M events
+
+Synthetic streams (seeded, so every run sees the same samples):
+    stable       readings well inside the safe range, with sensor noise
+    oscillating  readings flapping across a threshold every few samples
+    burst        mostly stable, with short excursions past the highest level
+
+Everything runs offline: speech is replaced with a no-op, HTTP posts are
+disabled and events go to a throwaway local store in a temp directory.
+
+Usage:
+    python benchmarks/bench_hot_paths.py                  # run, compare with the baseline if present
+    python benchmarks/bench_hot_paths.py --save-baseline  # run and store the results as the baseline
+    python benchmarks/bench_hot_paths.py --quick --only detectors guidance
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+# Add project root to path so we can import main and utils
+_script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(_script_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+# Events go to a throwaway store in this process only (no forwarding over HTTP);
+# must be set before utils.event_logger is imported
+_work_dir = tempfile.mkdtemp(prefix="hh_bench_")
+os.environ["EVENT_DB_PATH"] = os.path.join(_work_dir, "events.db")
+os.environ["EVENT_SINK"] = "local"
+
+DEFAULT_BASELINE_PATH = os.path.join(_script_dir, "baseline.json")
+DEFAULT_SAMPLES = 5000  # Snapshots per synthetic stream
+DEFAULT_STORE_SIZES = [100, 1000, 10000, 100000, 1000000]
+QUICK_STORE_SIZES = [100, 1000, 10000]
+DEFAULT_MAX_REGRESSION_PCT = 25.0  # p50/p99 slowdown vs. the baseline that fails the run
+QUERY_CALLS = 2000  # Calls per event query benchmark
+LOG_EVENT_CALLS = 5000
+SAMPLE_INTERVAL_S = 0.1  # Synthetic snapshot spacing (the warning/guidance tick rate)
+STREAMS = ("stable", "oscillating", "burst")
+ROOMS = ("kitchen", "bathroom", "laundry")
+EVENT_ROOMS = ("kitchen", "bathroom", "laundry")
+
+
+@contextlib.contextmanager
+def _quiet():
+    """Discard console output (the code under test prints on every event and announcement)."""
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+with _quiet():
+    import main
+    from utils import event_logger
+    from utils.sensor_acquisition import SensorSnapshot
+
+# Offline: speech is a no-op (the real speak_text only queues anyway) and nothing is posted
+main.speak_text = lambda *args, **kwargs: None
+main.AUDIO_AVAILABLE = True
+main.REQUESTS_AVAILABLE = False
+
+
+# ----------------------------------------------------------------------
+# Measurement
+# ----------------------------------------------------------------------
+
+def _percentile(sorted_values: List[int], percent: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(percent / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+def measure(fn: Callable[[Any], Any], args: Iterable, before: Optional[Callable[[Any], None]] = None) -> Dict[str, float]:
+    """
+    Time fn(arg) for every arg.
+
+    Args:
+        fn: Function under test
+        args: One argument per call
+        before: Optional untimed setup called with the argument before each call
+
+    Returns:
+        Dictionary with calls, p50_us, p99_us, max_us, mean_us and ops_per_s
+    """
+    timings = []
+    clock = time.perf_counter_ns
+    with _quiet():
+        for arg in args:
+            if before is not None:
+                before(arg)
+            start = clock()
+            fn(arg)
+            timings.append(clock() - start)
+    timings.sort()
+    total_ns = sum(timings)
+    calls = len(timings)
+    return {
+        "calls": calls,
+        "p50_us": round(_percentile(timings, 50) / 1000, 3),
+        "p99_us": round(_percentile(timings, 99) / 1000, 3),
+        "max_us": round(timings[-1] / 1000, 3) if timings else 0.0,
+        "mean_us": round(total_ns / calls / 1000, 3) if calls else 0.0,
+        "ops_per_s": round(calls / (total_ns / 1e9)) if total_ns else 0
+    }
+
+
+# ----------------------------------------------------------------------
+# Synthetic sensor streams
+# ----------------------------------------------------------------------
+
+def _thermal_frame(center: float, edge: float, rng: random.Random) -> List[List[float]]:
+    """8x8 frame with the given center 4x4 and edge temperatures (Celsius, with noise)."""
+    return [[(center if 2 <= row < 6 and 2 <= col < 6 else edge) + rng.uniform(-0.3, 0.3)
+             for col in range(8)] for row in range(8)]
+
+
+# Per-room channel levels: (safe value, threshold to flap across, value past the highest level)
+STREAM_LEVELS = {
+    "kitchen": {"thermal": (21.0, 25.0, 60.0), "volume": (600, 1500, 2500), "distance_mm": (800, 200, 50)},
+    "bathroom": {"thermal": (30.0, 39.0, 55.0), "volume": (600, 1500, 2500), "distance_mm": (800, 200, 50)},
+    "laundry": {"thermal": (21.0, 25.0, 30.0), "volume": (600, 1500, 2500), "distance_mm": (800, 200, 50)},
+}
+
+
+def sensor_stream(room: str, kind: str, samples: int, seed: int = 1) -> List[SensorSnapshot]:
+    """
+    Build a synthetic snapshot stream for a room's warning rules.
+
+    Args:
+        room: Room whose thresholds the stream is shaped around
+        kind: "stable", "oscillating" or "burst"
+        samples: Number of snapshots
+        seed: Random seed (same seed, same stream)
+
+    Returns:
+        Snapshots spaced SAMPLE_INTERVAL_S apart, with thermal frames already summarized
+    """
+    rng = random.Random(f"{room}:{kind}:{seed}")
+    levels = STREAM_LEVELS[room]
+    stream = []
+    start = 1_700_000_000.0
+    for index in range(samples):
+        values = {}
+        for channel, (safe, threshold, extreme) in levels.items():
+            if kind == "oscillating":
+                # Flip across the threshold every 3 samples
+                offset = abs(threshold - safe) * 0.05
+                above_safe = threshold > safe
+                crossing = (index // 3) % 2 == 1
+                value = threshold + (offset if crossing == above_safe else -offset)
+            elif kind == "burst" and index % 200 < 10:
+                value = extreme
+            else:
+                value = safe
+            values[channel] = value
+        temperature = values.pop("thermal") + rng.uniform(-0.2, 0.2)
+        edge = temperature if kind != "burst" or index % 200 >= 10 else temperature + 10
+        values["thermal"] = main.THERMAL_PROCESSOR.process(_thermal_frame(temperature, edge, rng))
+        values["volume"] = int(values["volume"] + rng.randint(-20, 20))
+        values["distance_mm"] = int(values["distance_mm"] + rng.randint(-5, 5))
+        values["pressure"] = 0
+        stream.append(SensorSnapshot(index + 1, start + index * SAMPLE_INTERVAL_S, values))
+    return stream
+
+
+def guidance_stream(kind: str, samples: int, field: str, rest: float, pressed: float) -> List[SensorSnapshot]:
+    """
+    Build a snapshot stream for a guidance input.
+
+    stable never presses; oscillating presses every other sample (one step per
+    press); burst presses a few times in quick succession every 100 samples.
+    """
+    stream = []
+    start = 1_700_000_000.0
+    for index in range(samples):
+        if kind == "oscillating":
+            down = index % 2 == 1
+        elif kind == "burst":
+            down = index % 100 < 10 and index % 2 == 1
+        else:
+            down = False
+        values = {field: pressed if down else rest}
+        stream.append(SensorSnapshot(index + 1, start + index * SAMPLE_INTERVAL_S, values))
+    return stream
+
+
+# ----------------------------------------------------------------------
+# Benchmarks
+# ----------------------------------------------------------------------
+
+def _null_leds(names: Iterable[str]) -> Dict[str, Callable[[int], None]]:
+    return {name: (lambda value: None) for name in names if name}
+
+
+def bench_detectors(samples: int) -> Dict[str, Dict[str, float]]:
+    """Warning engine tick (every rule of the room) per stream."""
+    results = {}
+    for room in ROOMS:
+        leds = _null_leds(rule.get("led") for rule in main.ROOM_WARNING_RULES[room])
+        for kind in STREAMS:
+            stream = sensor_stream(room, kind, samples)
+            with _quiet():
+                engine = main.build_warning_engine(room, leds)
+            # The acquisition thread records each read into the history (untimed)
+            main.SENSOR_HISTORY.clear()
+            results[f"detectors.{room}.{kind}"] = measure(engine.evaluate, stream,
+                                                          before=main.SENSOR_HISTORY.record_snapshot)
+    return results
+
+
+def bench_thermal(samples: int) -> Dict[str, Dict[str, float]]:
+    """Thermal frame summary (runs once per hardware read)."""
+    rng = random.Random("thermal")
+    frames = [_thermal_frame(rng.uniform(18, 60), rng.uniform(18, 60), rng) for _ in range(samples)]
+    return {"thermal.process": measure(main.THERMAL_PROCESSOR.process, frames)}
+
+
+def bench_guidance(samples: int) -> Dict[str, Dict[str, float]]:
+    """Guidance engine tick (apply pushed updates, advance sessions) per stream."""
+    document = {
+        "name": "Benchmark",
+        "steps": [f"Step {number}" for number in range(1, 13)],
+        "cycle_duration_minutes": 45
+    }
+    results = {}
+    for room in ROOMS:
+        programs = main.ROOM_GUIDANCE_PROGRAMS[room]
+        leds = _null_leds(program.get("led") for program in programs)
+        for kind in STREAMS:
+            with _quiet():
+                guidance = main.build_guidance_engine(room, leds)
+            program = guidance.programs[programs[0]["kind"]]
+            pressed = program.threshold + 1 if program.above else program.threshold - 1
+            stream = guidance_stream(kind, samples, program.field, program.rest, pressed)
+            state = {"active": True, program.id_field: "benchmark", program.document: document}
+
+            main.SENSOR_HISTORY.clear()
+
+            def restart(snapshot, guidance=guidance, program=program, state=state):
+                # Record the read as the acquisition thread does, and keep a session running
+                # for the whole stream (untimed)
+                main.SENSOR_HISTORY.record_snapshot(snapshot)
+                if not guidance.sessions[program.kind].active:
+                    guidance.stop(program.kind)
+                    guidance.apply(program.kind, state)
+
+            results[f"guidance.{room}.{kind}"] = measure(
+                lambda snapshot, guidance=guidance: main.run_guidance(guidance, snapshot), stream, before=restart
+            )
+    return results
+
+
+def _synthetic_events(count: int, first_id: int, rng: random.Random) -> Iterable[List[Dict]]:
+    """Events in chunks of up to 10000, one per second ending now, rooms and types mixed."""
+    now = time.time()
+    types = ("heat_warning", "decibel_warning", "proximity_warning", "routine_step", "laundry_cycle_complete")
+    for chunk_start in range(0, count, 10000):
+        chunk = []
+        for index in range(chunk_start, min(count, chunk_start + 10000)):
+            event_type = rng.choice(types)
+            chunk.append({
+                "id": first_id + index,
+                "timestamp": now - (count - index),
+                "event_type": event_type,
+                "message": f"Synthetic {event_type} {index}",
+                "room": rng.choice(EVENT_ROOMS),
+                "severity": "warning",
+                "metadata": {"value": index}
+            })
+        yield chunk
+
+
+def _fill_event_store(count: int):
+    """Replace the global event store's contents with count synthetic events."""
+    with _quiet():
+        event_logger.clear_events()
+    store = event_logger.get_event_store()
+    rng = random.Random(count)
+    for chunk in _synthetic_events(count, 1, rng):
+        store.append_many(chunk)
+        store.flush(timeout=600)
+    # Load the newest events into the hot cache, as on startup
+    event_logger._warm_cache(store)
+
+
+def bench_log_event(samples: int) -> Dict[str, Dict[str, float]]:
+    """log_event (id, store queue, hot cache, subscribers), and committing its events in batches of 100."""
+    with _quiet():
+        event_logger.clear_events()
+    store = event_logger.get_event_store()
+    calls = min(samples, LOG_EVENT_CALLS)
+    rooms = [EVENT_ROOMS[index % len(EVENT_ROOMS)] for index in range(calls)]
+
+    def log(room):
+        event_logger.log_event("heat_warning", "Benchmark event", room=room,
+                               severity="warning", metadata={"temperature_c": 30.0})
+
+    results = {"events.log_event": measure(log, rooms)}
+    store.flush(timeout=600)
+    # Untimed: log 100 events; timed: wait for the writer thread to commit them
+    batches = [rooms[start:start + 100] for start in range(0, calls, 100)]
+    results["events.commit_100"] = measure(
+        lambda batch: store.flush(timeout=600), batches, before=lambda batch: [log(room) for room in batch]
+    )
+    return results
+
+
+def bench_event_queries(sizes: List[int]) -> Dict[str, Dict[str, float]]:
+    """Event queries the API server serves on every poll, per store size."""
+    results = {}
+    for size in sizes:
+        print(f"[BENCH] Filling event store with {size} events...")
+        _fill_event_store(size)
+        rng = random.Random(size)
+        rooms = [rng.choice(EVENT_ROOMS) for _ in range(QUERY_CALLS)]
+        # Cursors a little behind the newest id (a client catching up) and far behind it (cache miss)
+        near = [max(0, size - rng.randint(1, 50)) for _ in range(QUERY_CALLS)]
+        far = [rng.randint(0, max(0, size - 1000)) for _ in range(QUERY_CALLS // 10)]
+        results[f"events.recent.{size}"] = measure(lambda _: event_logger.get_recent_events(limit=20), rooms)
+        results[f"events.recent_room.{size}"] = measure(
+            lambda room: event_logger.get_recent_events(room=room, limit=20), rooms
+        )
+        results[f"events.recent_1000.{size}"] = measure(
+            lambda _: event_logger.get_recent_events(limit=1000), rooms[:QUERY_CALLS // 10]
+        )
+        results[f"events.after_near.{size}"] = measure(
+            lambda cursor: event_logger.get_events_after(cursor, limit=100), near
+        )
+        results[f"events.after_far.{size}"] = measure(
+            lambda cursor: event_logger.get_events_after(cursor, limit=100), far
+        )
+    return results
+
+
+GROUPS = ("detectors", "thermal", "guidance", "log_event", "queries")
+
+
+def run(groups: Iterable[str], samples: int, sizes: List[int]) -> Dict[str, Dict[str, float]]:
+    """Run the selected benchmark groups and return name -> measurement."""
+    results = {}
+    for group in groups:
+        print(f"[BENCH] Running {group}...")
+        if group == "detectors":
+            results.update(bench_detectors(samples))
+        elif group == "thermal":
+            results.update(bench_thermal(samples))
+        elif group == "guidance":
+            results.update(bench_guidance(samples))
+        elif group == "log_event":
+            results.update(bench_log_event(samples))
+        elif group == "queries":
+            results.update(bench_event_queries(sizes))
+    return results
+
+
+# ----------------------------------------------------------------------
+# Reporting
+# ----------------------------------------------------------------------
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            max_regression_pct: float) -> List[str]:
+    """
+    Compare results with a baseline.
+
+    Returns:
+        Names of benchmarks whose p50 or p99 is more than max_regression_pct slower
+    """
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        for key in ("p50_us", "p99_us"):
+            if previous.get(key) and result[key] > previous[key] * (1 + max_regression_pct / 100.0):
+                regressions.append(name)
+                break
+    return regressions
+
+
+def _change(result: Dict[str, float], previous: Optional[Dict[str, float]], key: str) -> str:
+    if not previous or not previous.get(key):
+        return ""
+    return f"{(result[key] / previous[key] - 1) * 100:+.0f}%"
+
+
+def print_report(results: Dict[str, Dict[str, float]], baseline: Optional[Dict[str, Dict[str, float]]],
+                 regressions: List[str]):
+    """Print a table of the results (with changes vs. the baseline when given)."""
+    width = max([len(name) for name in results] + [9])
+    print(f"\n{'benchmark':<{width}}  {'calls':>7}  {'p50 us':>10}  {'p99 us':>10}  {'ops/s':>10}"
+          + ("  vs baseline (p50 / p99)" if baseline else ""))
+    for name, result in results.items():
+        line = (f"{name:<{width}}  {result['calls']:>7}  {result['p50_us']:>10.2f}  {result['p99_us']:>10.2f}  "
+                f"{result['ops_per_s']:>10}")
+        if baseline:
+            previous = baseline.get(name)
+            line += f"  {_change(result, previous, 'p50_us'):>6} / {_change(result, previous, 'p99_us'):<6}"
+            if name in regressions:
+                line += "  REGRESSION"
+        print(line)
+
+
+def main_cli(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the sensor loop's hot paths")
+    parser.add_argument("--only", nargs="+", choices=GROUPS, help="Benchmark groups to run (default: all)")
+    parser.add_argument("--samples", type=int, default=DEFAULT_SAMPLES, help="Snapshots per synthetic stream")
+    parser.add_argument("--sizes", type=int, nargs="+", help="Event store sizes (default: 100 to 1M)")
+    parser.add_argument("--quick", action="store_true", help="Fewer samples and event stores up to 10k")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH, help="Baseline file to compare with")
+    parser.add_argument("--save-baseline", action="store_true", help="Store the results as the new baseline")
+    parser.add_argument("--max-regression", type=float, default=DEFAULT_MAX_REGRESSION_PCT,
+                        help="Percent p50/p99 slowdown vs. the baseline that fails the run")
+    args = parser.parse_args(argv)
+
+    samples = min(args.samples, 1000) if args.quick else args.samples
+    sizes = args.sizes or (QUICK_STORE_SIZES if args.quick else DEFAULT_STORE_SIZES)
+    try:
+        results = run(args.only or GROUPS, samples, sizes)
+    finally:
+        shutil.rmtree(_work_dir, ignore_errors=True)
+
+    baseline = None
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f).get("results", {})
+    regressions = compare(results, baseline, args.max_regression) if baseline else []
+    print_report(results, baseline, regressions)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"created_at": time.time(), "python": sys.version.split()[0], "results": results}, f, indent=2)
+        print(f"\n[BENCH] Baseline saved to {args.baseline}")
+    elif regressions:
+        print(f"\n[BENCH] {len(regressions)} benchmarks more than {args.max_regression:.0f}% slower than the baseline")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -1353,6 +1353,7 @@ if (app) {
     // 5. Activity Monitor - Fetch and Display Events
     const activityEventList = document.getElementById('activity-event-list');
     let eventRefreshInterval: number | null = null;
+    let eventStream: EventSource | null = null;
 
     function formatTimeAgo(timestamp: number): string {
         const seconds = Math.floor((Date.now() / 1000) - timestamp);
@@ -1433,6 +1434,10 @@ if (app) {
             clearInterval(eventRefreshInterval);
             eventRefreshInterval = null;
         }
+        if (eventStream !== null) {
+            eventStream.close();
+            eventStream = null;
+        }
     }
 
     // Monitor when Activity Monitor panel becomes visible to start/stop refresh
@@ -1574,15 +1579,28 @@ if (app) {
 
     // Panel-aware version of startEventRefresh
     function startEventRefreshForPanel(room: string = 'kitchen') {
-        // Clear existing interval
-        if (eventRefreshInterval !== null) {
-            clearInterval(eventRefreshInterval);
-        }
+        // Clear existing interval and stream
+        stopEventRefresh();
         // Fetch events immediately
         fetchActivityEventsForPanel(room);
-        // Set up periodic refresh (every 5 seconds)
+
+        if (typeof EventSource === 'undefined') {
+            // No SSE support - fall back to polling (every 5 seconds)
+            eventRefreshInterval = window.setInterval(() => {
+                fetchActivityEventsForPanel(room);
+            }, 5000);
+            return;
+        }
+
+        // Live updates: the server pushes each new event for this room, and the
+        // browser resumes from the last event id by itself after a reconnect
+        eventStream = new EventSource(`${API_BASE_URL}/events/stream?room=${encodeURIComponent(room)}`);
+        eventStream.addEventListener('activity', () => {
+            fetchActivityEventsForPanel(room);
+        });
+        // Slow refresh only to keep the "x minutes ago" labels current
         eventRefreshInterval = window.setInterval(() => {
             fetchActivityEventsForPanel(room);
-        }, 5000);
+        }, 60000);
     }
 }
\ No newline at end of file
@@ -7,6 +7,7 @@ import time
 import sys
 import os
 import random
+import itertools
 from typing import Dict, Optional, Any
 
 # Add project root to path so imports work when running this file directly
@@ -25,6 +26,10 @@ except Exception as e:
     speak_text = None
     print(f"[SYSTEM] Audio module warning: {e}")
 
+# Water temperature and noise warnings run on the shared rule engine
+from utils.detector_engine import DetectorEngine
+from utils.sensor_acquisition import SensorSnapshot
+
 # ============================================================================
 # CONFIGURATION & THRESHOLDS
 # ============================================================================
@@ -44,6 +49,49 @@ GHOST_TAP_TIMEOUT = 10        # Seconds of water running alone triggers alert
 TOILET_LIMIT_SEC = 15         # Seconds before gentle reminder (Short for Demo)
 PROXIMITY_SIT_VAL = 100       # Sensor value threshold for sitting
 
+# 5. Warning Rules (evaluated by the detector engine, see utils/detector_engine.py)
+# A rule announces once when it is entered and keeps its LED output on until it clears.
+SCALD_RULE = {
+    "name": "water_hot",
+    "field": "water_temp",
+    "direction": "above",
+    "led": "red",
+    "levels": [
+        {
+            "threshold": TEMP_SCALD_C,
+            "say": ("water_heat_warning_critical", "Warning. The water is very hot. Please be careful.")
+        }
+    ]
+}
+
+COLD_WATER_RULE = {
+    "name": "water_cold",
+    "field": "water_temp",
+    "direction": "below",
+    "led": "blue",
+    "levels": [
+        {
+            "threshold": TEMP_COLD_C,
+            "say": ("cold_water_warning", "The water is quite cold.")
+        }
+    ]
+}
+
+NOISE_RULE = {
+    "name": "noise",
+    "field": "noise_db",
+    "direction": "above",
+    "led": "calming",  # Calming scene: soft orange light and nature sounds while it is loud
+    "levels": [
+        {
+            "threshold": NOISE_LIMIT_DB,
+            "say": ("calming_sounds", "It is getting loud. Playing calming sounds.")
+        }
+    ]
+}
+
+BATHROOM_WARNING_RULES = [SCALD_RULE, COLD_WATER_RULE, NOISE_RULE]
+
 # State Variables
 state = {
     "wash_step": 0,           # 0=Idle, 1=Water, 2=Soap, 3=Scrub, 4=Done
@@ -76,6 +124,33 @@ def announce(text: str, led_color: Optional[str] = None):
     if AUDIO_AVAILABLE and speak_text:
         speak_text(text)
 
+def _led_output(color: str):
+    """Build a warning LED output (prints the LED change, as announce() does)."""
+    def output(value: int):
+        if value:
+            print(f"[{time.strftime('%H:%M:%S')}] 💡 LED OUTPUT: Set to {color}")
+    return output
+
+
+def _calming_scene(value: int):
+    """LED output of the noise rule: calming scene on while it is loud."""
+    state["calming_mode"] = bool(value)
+    if value:
+        print(f"[{time.strftime('%H:%M:%S')}] 💡 LED OUTPUT: Set to SOFT_ORANGE")
+        print("🎵 [AUDIO SYSTEM] Playing: 'Nature_Sounds.mp3'")
+    else:
+        print("✓ Noise levels returned to normal. Fading music.")
+
+
+BATHROOM_WARNINGS = DetectorEngine(
+    BATHROOM_WARNING_RULES,
+    room="bathroom",
+    leds={"red": _led_output("RED"), "blue": _led_output("BLUE"), "calming": _calming_scene},
+    announce=lambda dialogue_key, text, priority: announce(text)
+)
+_SENSOR_SEQ = itertools.count(1)
+
+
 def log_caregiver(message: str):
     """Simulates logging an event to the Caregiver Dashboard/OpenNote."""
     timestamp = time.strftime("%H:%M:%S")
@@ -101,34 +176,18 @@ def get_valid_number(prompt: str) -> float:
 
 def process_sensory(noise_db: float, water_temp: float):
     """
-    Handles Thermal and Noise sensors.
+    Handles Thermal and Noise sensors (BATHROOM_WARNING_RULES).
     Output: LED changes and Audio Warnings.
     """
-    global state
-    
     print(f"--- SENSOR CHECK: Noise={noise_db}dB | Temp={water_temp}°C ---")
 
-    # 1. Thermal Logic
-    if water_temp > TEMP_SCALD_C:
-        announce("Warning. The water is very hot. Please be careful.", led_color="RED")
-    elif water_temp < TEMP_COLD_C:
-        announce("The water is quite cold.", led_color="BLUE")
-    else:
-        # Ideal temperature logic
-        if not state["calming_mode"] and not state["is_sitting"]: 
-             # Only show green if we aren't busy elsewhere
-            print("💡 LED OUTPUT: Set to GREEN (Temp OK)")
-
-    # 2. Auditory Logic
-    if noise_db > NOISE_LIMIT_DB:
-        if not state["calming_mode"]:
-            state["calming_mode"] = True
-            announce("It is getting loud. Playing calming sounds.", led_color="SOFT_ORANGE")
-            print("🎵 [AUDIO SYSTEM] Playing: 'Nature_Sounds.mp3'")
-    else:
-        if state["calming_mode"]:
-            state["calming_mode"] = False
-            print("✓ Noise levels returned to normal. Fading music.")
+    snapshot = SensorSnapshot(next(_SENSOR_SEQ), time.time(), {"noise_db": noise_db, "water_temp": water_temp})
+    BATHROOM_WARNINGS.evaluate(snapshot)
+    levels = BATHROOM_WARNINGS.active_levels()
+
+    # Ideal temperature: only show green if we aren't busy elsewhere
+    if not (levels["water_hot"] or levels["water_cold"] or state["calming_mode"] or state["is_sitting"]):
+        print("💡 LED OUTPUT: Set to GREEN (Temp OK)")
 
 
 def process_hygiene(action: str) -> bool:
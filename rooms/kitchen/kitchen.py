@@ -6,8 +6,8 @@ Simulates Indistinguishable From Magic hardware interactions
 import time
 import sys
 import os
+import itertools
 from typing import Dict, List, Optional
-from indistinguishable_from_magic import magic as Magic
 
 # Add project root to path so imports work when running this file directly
 _script_dir = os.path.dirname(os.path.abspath(__file__))  # rooms/kitchen/
@@ -16,6 +16,15 @@ project_root = os.path.dirname(_rooms_dir)  # project root (HelpingHome/)
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
+# Hardware library (not needed to replay a sensor recording)
+try:
+    from indistinguishable_from_magic import magic as Magic
+    MAGIC_AVAILABLE = True
+except Exception as e:
+    MAGIC_AVAILABLE = False
+    Magic = None
+    print(f"[DEBUG] Hardware library import failed: {e}")
+
 # Import audio agent
 try:
     from utils.audio import speak_text
@@ -37,6 +46,18 @@ except Exception as e:
     get_dialogue = None
     print(f"[DEBUG] Dialogue system import failed: {e}")
 
+# Thermal frame statistics (center average with Kelvin detection)
+from utils.thermal import ThermalFrameProcessor
+from utils.ring_buffer import RingBuffer
+from utils.module_probe import ModuleProbe
+
+# Sound, stove and loud-object warnings run on the shared rule engine
+from utils.detector_engine import DetectorEngine
+from utils.sensor_acquisition import SensorSnapshot
+
+# Recipes are shared with the API server's content library
+from utils.recipe_storage import get_all_recipes as get_all_recipes_from_storage
+
 
 # ============================================================================
 # CONFIGURATION VARIABLES - Adjust these to test different scenarios
@@ -54,73 +75,7 @@ RELAY_CUTOFF_ENABLED = True  # Whether to cut power to loud devices
 # Recipe data structure (JSON-friendly for frontend integration)
 # Format: {recipe_id: {"name": str, "steps": [str], "description": str}}
 # This structure can be easily serialized to/from JSON for API integration
-RECIPES = {
-    "scrambled_eggs": {
-        "name": "Scrambled Eggs",
-        "description": "Simple scrambled eggs recipe",
-        "steps": [
-            "Gather ingredients: 2 eggs, butter, salt, pepper",
-            "Crack eggs into a bowl",
-            "Add salt and pepper, whisk gently",
-            "Heat pan with butter over medium heat",
-            "Pour eggs into pan",
-            "Stir gently until cooked",
-            "Serve on plate"
-        ]
-    },
-    "pasta_basic": {
-        "name": "Basic Pasta",
-        "description": "Simple pasta with sauce",
-        "steps": [
-            "Fill pot with water and bring to boil",
-            "Add pasta to boiling water",
-            "Cook pasta for 8-10 minutes",
-            "Drain pasta in colander",
-            "Heat sauce in separate pan",
-            "Mix pasta with sauce",
-            "Serve in bowl"
-        ]
-    },
-    "grilled_cheese": {
-        "name": "Grilled Cheese Sandwich",
-        "description": "Classic grilled cheese",
-        "steps": [
-            "Gather bread and cheese",
-            "Butter one side of each bread slice",
-            "Place cheese between bread slices",
-            "Heat pan over medium heat",
-            "Cook sandwich 2-3 minutes per side",
-            "Check if golden brown",
-            "Remove from pan and serve"
-        ]
-    },
-    "smoothie": {
-        "name": "Fruit Smoothie",
-        "description": "Healthy fruit smoothie",
-        "steps": [
-            "Gather fruits: banana, berries, yogurt",
-            "Wash fruits if needed",
-            "Cut banana into chunks",
-            "Add fruits to blender",
-            "Add yogurt and ice",
-            "Blend until smooth",
-            "Pour into glass and serve"
-        ]
-    },
-    "salad": {
-        "name": "Simple Salad",
-        "description": "Fresh green salad",
-        "steps": [
-            "Wash lettuce and vegetables",
-            "Dry lettuce with paper towel",
-            "Chop lettuce into bite-sized pieces",
-            "Slice tomatoes and cucumbers",
-            "Add vegetables to bowl",
-            "Add dressing and toss",
-            "Serve in salad bowl"
-        ]
-    }
-}
+RECIPES = get_all_recipes_from_storage()  # Loaded from data/recipes.json (shared with the API server)
 
 CURRENT_RECIPE_ID = None  # ID of currently active recipe
 CURRENT_RECIPE = None  # Full recipe dictionary
@@ -147,9 +102,9 @@ STOVE_ABOVE_SECOND_THRESHOLD_START = None  # Timestamp when stove first exceeded
 SECOND_THRESHOLD_REMINDER_INTERVAL = 30  # Seconds between reminders when above second threshold
 LAST_REMINDER_TIME = None  # Timestamp of last reminder
 # Proximity-based motion detection for kitchen
-KITCHEN_PROXIMITY_READINGS = []  # Recent proximity readings for motion detection
 PROXIMITY_MOTION_THRESHOLD_CM = 5  # Change in proximity (cm) to indicate motion
-PROXIMITY_READINGS_TO_TRACK = 10  # Number of recent readings to track
+PROXIMITY_READINGS_TO_TRACK = 5  # Number of recent readings compared for variation
+KITCHEN_PROXIMITY_READINGS = RingBuffer(PROXIMITY_READINGS_TO_TRACK)  # Recent proximity readings (rolling min/max)
 LAST_PROXIMITY_READING = None  # Last proximity reading
 
 # 4. Emotional Regulation (Stress & Frustration)
@@ -159,7 +114,7 @@ SAFE_SONG = "Calming Nature Sounds"  # Pre-selected safe song
 LIGHTS_DIMMED = False
 
 # 5. Proximity Detection for Loud Objects
-PROXIMITY_THRESHOLD_CM = 15  # Distance threshold in centimeters (hand detected within this range)
+PROXIMITY_THRESHOLD_CM = 10  # Distance threshold in centimeters (100mm from ifmagic_trial.py; hand detected within this range)
 LOUD_OBJECTS = ["blender", "garbage disposal", "food processor", "mixer"]  # List of loud objects
 CURRENT_PROXIMITY_CM = 50  # Current proximity reading (cm) - default far away
 CURRENT_NEAR_OBJECT = None  # Which loud object is currently being approached
@@ -171,15 +126,109 @@ HARDWARE_CONNECTION_PATH = "/dev/cu.SLAB_USBtoUART"  # Adjust for your system
 PROXIMITY_PORT = 3  # Proximity sensor module port
 SOUND_PORT = 2  # Sound sensor module port (may be same as proximity or different)
 THERMAL_PORT = 4  # Thermal sensor module port (for stove temperature)
+# Stove temperature = center 2x2 average; frames may be Kelvin or Celsius depending on the module,
+# detected from the frame minimum (a hot burner pixel does not make a Celsius frame look like Kelvin)
+THERMAL_PROCESSOR = ThermalFrameProcessor(center_size=2, unit="auto")
 GLOW_PORT = 7  # Glow module port for visual feedback
 MOTION_PORT = 3  # Motion sensor module port (optional)
 VIBRATION_PORT = 7  # Vibration motor module port
 
+# 7. Warning Rules (evaluated by the detector engine, see utils/detector_engine.py)
+# A rule announces each level once when it escalates to it and holds the warning
+# glow while any level is active. The check_* helpers feed it their readings.
+SOUND_CRITICAL_DB = 90  # Noise level that cuts power to the appliance (if RELAY_CUTOFF_ENABLED)
+
+SOUND_RULE = {
+    "name": "sound",
+    "field": "sound_db",
+    "direction": "above",
+    "led": "glow",
+    "levels": [
+        {
+            "threshold": SOUND_THRESHOLD_DB,
+            "say": ("sound_warning", "Warning. Loud noise detected. Please prepare for the sound."),
+            "priority": "warning"
+        }
+    ] + ([
+        {
+            "threshold": SOUND_CRITICAL_DB,
+            "say": ("sound_critical", "Critical alert. Very loud noise detected. Cutting power to appliance."),
+            "priority": "critical"
+        }
+    ] if RELAY_CUTOFF_ENABLED else [])
+}
+
+STOVE_HEAT_RULE = {
+    "name": "stove_heat",
+    "field": "stove_c",
+    "direction": "above",
+    "led": "glow",
+    "levels": [
+        {
+            "threshold": STOVE_TEMP_THRESHOLD_C,
+            "say": ("heat_warning_critical", "It's not safe to touch the stove"),
+            "priority": "warning"
+        },
+        {
+            "threshold": STOVE_TEMP_SECOND_THRESHOLD_C,
+            "say": ("heat_warning_warming", "The stove is getting too hot, turn it off"),
+            "priority": "warning"
+        }
+    ]
+}
+
+LOUD_OBJECT_RULE = {
+    "name": "loud_object",
+    "field": "object_distance_cm",
+    "direction": "below",
+    "inclusive": True,  # Fires at exactly PROXIMITY_THRESHOLD_CM too
+    "led": "glow",
+    "levels": [
+        {
+            "threshold": PROXIMITY_THRESHOLD_CM,
+            "say": ("proximity_warning", "This item could get loud"),
+            "priority": "warning"
+        }
+    ]
+}
+
+KITCHEN_WARNING_RULES = [SOUND_RULE, STOVE_HEAT_RULE, LOUD_OBJECT_RULE]
+
 
 # ============================================================================
 # HARDWARE INTEGRATION - Sensor Reading Functions
 # ============================================================================
 
+def _stove_temperature_from_frame(pixels):
+    """Average center 2x2 pixels (as in ifmagic_trial.py), converted from Kelvin if the frame is in Kelvin."""
+    if not isinstance(pixels, (list, tuple)) or len(pixels) < 4:
+        return None
+    stats = THERMAL_PROCESSOR.process(pixels)
+    return stats.center_mean if stats is not None else None
+
+
+def _celsius_from_reading(temp):
+    """Direct temperature reading (Kelvin if above 200)."""
+    temp = float(temp)
+    return temp - 273.15 if temp > 200 else temp
+
+
+# Where each reading lives on its module; resolved once per module instead of per sample
+KITCHEN_SENSORS = ModuleProbe({
+    "proximity": (PROXIMITY_PORT, ["amount()", "distance", "proximity"]),
+    "sound": (SOUND_PORT, ["sound()", "decibel", "volume"]),
+    "thermal": (THERMAL_PORT, [("pixel_temperatures", _stove_temperature_from_frame),
+                               ("temperature", _celsius_from_reading)]),
+})
+
+
+def _read_kitchen_sensor(name, ports):
+    try:
+        return KITCHEN_SENSORS.read(name, ports)
+    except (AttributeError, IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
 def read_proximity_sensor(ports):
     """
     Read proximity sensor from hardware and return distance in millimeters.
@@ -190,19 +239,7 @@ def read_proximity_sensor(ports):
     Returns:
         Distance in millimeters, or None if sensor unavailable
     """
-    try:
-        if hasattr(ports, 'modules') and ports.modules[PROXIMITY_PORT] is not None:
-            # Try different possible property names
-            module = ports.modules[PROXIMITY_PORT]
-            if hasattr(module, 'amount'):
-                return int(module.amount())
-            elif hasattr(module, 'distance'):
-                return int(module.distance)
-            elif hasattr(module, 'proximity'):
-                return int(module.proximity)
-    except (AttributeError, IndexError, TypeError) as e:
-        pass
-    return None
+    return _read_kitchen_sensor("proximity", ports)
 
 
 def read_sound_sensor(ports):
@@ -215,18 +252,7 @@ def read_sound_sensor(ports):
     Returns:
         Decibel level, or None if sensor unavailable
     """
-    try:
-        if hasattr(ports, 'modules') and ports.modules[SOUND_PORT] is not None:
-            module = ports.modules[SOUND_PORT]
-            if hasattr(module, 'sound'):
-                return int(module.sound())
-            elif hasattr(module, 'decibel'):
-                return int(module.decibel)
-            elif hasattr(module, 'volume'):
-                return int(module.volume)
-    except (AttributeError, IndexError, TypeError) as e:
-        pass
-    return None
+    return _read_kitchen_sensor("sound", ports)
 
 
 def read_thermal_sensor(ports):
@@ -238,28 +264,9 @@ def read_thermal_sensor(ports):
         ports: Hardware data object from h.read()
         
     Returns:
-        Temperature in Kelvin (or Celsius if module provides it directly), or None
+        Temperature in Celsius, or None
     """
-    try:
-        if hasattr(ports, 'modules') and ports.modules[THERMAL_PORT] is not None:
-            module = ports.modules[THERMAL_PORT]
-            # Check if it has pixel_temperatures array (thermal camera module)
-            if hasattr(module, 'pixel_temperatures'):
-                # Average center pixels (as in ifmagic_trial.py)
-                pixels = module.pixel_temperatures
-                if isinstance(pixels, (list, tuple)) and len(pixels) >= 4:
-                    center_avg = (pixels[3][3] + pixels[3][4] + pixels[4][3] + pixels[4][4]) / 4
-                    # Convert from Kelvin to Celsius if needed (typical thermal modules use Kelvin)
-                    # If already in Celsius, remove the -273.15
-                    temp_celsius = center_avg - 273.15 if center_avg > 200 else center_avg
-                    return temp_celsius
-            elif hasattr(module, 'temperature'):
-                # Direct temperature reading
-                temp = float(module.temperature)
-                return temp - 273.15 if temp > 200 else temp
-    except (AttributeError, IndexError, TypeError) as e:
-        pass
-    return None
+    return _read_kitchen_sensor("thermal", ports)
 
 
 def set_glow_warning(ports, active: bool = True):
@@ -285,6 +292,55 @@ def set_glow_warning(ports, active: bool = True):
         pass
 
 
+WARNING_GLOW_HARDWARE = None  # Hardware the warning glow is written to (set by the check_* helpers)
+
+
+def _set_warning_glow(value: int):
+    """LED output of the warning rules: pulse the glow module while any warning is active."""
+    if WARNING_GLOW_HARDWARE is not None:
+        set_glow_warning(WARNING_GLOW_HARDWARE, active=bool(value))
+
+
+def _announce_warning(dialogue_key: str, default_text: str, priority: str):
+    """Speak a warning level announced by the detector engine."""
+    if not (AUDIO_AVAILABLE and speak_text):
+        return
+    if DIALOGUE_AVAILABLE and get_dialogue:
+        message = get_dialogue(dialogue_key, default_text)
+    else:
+        message = default_text
+    speak_text(message, priority=priority)
+
+
+KITCHEN_WARNINGS = DetectorEngine(
+    KITCHEN_WARNING_RULES,
+    room="kitchen",
+    leds={"glow": _set_warning_glow},
+    announce=_announce_warning
+)
+_WARNING_SEQ = itertools.count(1)
+
+
+def _evaluate_warnings(hardware_ports, **readings) -> Dict[str, int]:
+    """
+    Evaluate the kitchen warning rules against a set of readings.
+    Rules whose field is not among the readings are skipped, so each check_*
+    helper only advances its own rule.
+    
+    Args:
+        hardware_ports: Optional hardware object for the warning glow
+        **readings: Rule field -> reading (e.g. sound_db=72)
+        
+    Returns:
+        Rule name -> active level (0 = clear, 1 = first threshold, ...)
+    """
+    global WARNING_GLOW_HARDWARE
+    if hardware_ports is not None:
+        WARNING_GLOW_HARDWARE = hardware_ports
+    KITCHEN_WARNINGS.evaluate(SensorSnapshot(next(_WARNING_SEQ), time.time(), readings))
+    return KITCHEN_WARNINGS.active_levels()
+
+
 def set_glow_recipe_step(ports, step_index: int, total_steps: int):
     """
     Set glow module to indicate current recipe step (visual step indicator).
@@ -314,7 +370,7 @@ def set_glow_recipe_step(ports, step_index: int, total_steps: int):
 
 def check_sound_level(db_level: float, hardware_ports=None) -> Dict[str, any]:
     """
-    Monitor sound levels and trigger calm down scene if too loud.
+    Monitor sound levels and trigger calm down scene if too loud (SOUND_RULE).
     
     Args:
         db_level: Current decibel reading from sound sensor
@@ -323,58 +379,25 @@ def check_sound_level(db_level: float, hardware_ports=None) -> Dict[str, any]:
     Returns:
         Dictionary with action taken and status
     """
-    global CALM_DOWN_COLOR, RELAY_CUTOFF_ENABLED
-    
-    if db_level > SOUND_THRESHOLD_DB:
-        # Trigger "Calm Down" Scene
-        print(f"🔵 SOUND ALERT: {db_level}dB detected (threshold: {SOUND_THRESHOLD_DB}dB)")
-        print(f"   → Activating calm down scene: {CALM_DOWN_COLOR.upper()} LED pulsing")
-        
-        # Activate hardware glow if available
-        if hardware_ports is not None:
-            set_glow_warning(hardware_ports, active=True)
-        
-        # Play audio warning
-        if AUDIO_AVAILABLE and speak_text:
-            print(f"[DEBUG] Audio available, calling speak_text...")
-            if DIALOGUE_AVAILABLE and get_dialogue:
-                warning_msg = get_dialogue("sound_warning", f"Warning. Loud noise detected. {int(db_level)} decibels. Please prepare for the sound.")
-            else:
-                warning_msg = f"Warning. Loud noise detected. {int(db_level)} decibels. Please prepare for the sound."
-            speak_text(warning_msg)
-        else:
-            print(f"[DEBUG] Audio not available. AUDIO_AVAILABLE={AUDIO_AVAILABLE}, speak_text={speak_text}")
-        
-        if RELAY_CUTOFF_ENABLED and db_level > 90:
-            print(f"   → ⚠️  CRITICAL: Cutting power to appliance (noise > 90dB)")
-            if AUDIO_AVAILABLE and speak_text:
-                if DIALOGUE_AVAILABLE and get_dialogue:
-                    critical_msg = get_dialogue("sound_critical", "Critical alert. Very loud noise detected. Cutting power to appliance.")
-                else:
-                    critical_msg = "Critical alert. Very loud noise detected. Cutting power to appliance."
-                speak_text(critical_msg)
-            return {
-                "action": "calm_down_activated",
-                "led_color": CALM_DOWN_COLOR,
-                "relay_cutoff": True,
-                "db_level": db_level
-            }
-        
-        return {
-            "action": "calm_down_activated",
-            "led_color": CALM_DOWN_COLOR,
-            "relay_cutoff": False,
-            "db_level": db_level
-        }
-    
-        # Turn off warning glow if noise is normal
-        if hardware_ports is not None:
-            set_glow_warning(hardware_ports, active=False)
-        
+    level = _evaluate_warnings(hardware_ports, sound_db=db_level)["sound"]
+    if level == 0:
         return {
             "action": "normal",
             "db_level": db_level
         }
+    
+    # Trigger "Calm Down" Scene
+    print(f"🔵 SOUND ALERT: {db_level}dB detected (threshold: {SOUND_THRESHOLD_DB}dB)")
+    print(f"   → Activating calm down scene: {CALM_DOWN_COLOR.upper()} LED pulsing")
+    relay_cutoff = level == 2  # Only present when RELAY_CUTOFF_ENABLED
+    if relay_cutoff:
+        print(f"   → ⚠️  CRITICAL: Cutting power to appliance (noise > {SOUND_CRITICAL_DB}dB)")
+    return {
+        "action": "calm_down_activated",
+        "led_color": CALM_DOWN_COLOR,
+        "relay_cutoff": relay_cutoff,
+        "db_level": db_level
+    }
 
 
 def adjust_ambient_light(light_level: int) -> Dict[str, any]:
@@ -721,7 +744,7 @@ def detect_motion_via_proximity(proximity_cm: float) -> bool:
     Returns:
         True if motion detected, False otherwise
     """
-    global KITCHEN_PROXIMITY_READINGS, LAST_PROXIMITY_READING, PROXIMITY_MOTION_THRESHOLD_CM
+    global LAST_PROXIMITY_READING, PROXIMITY_MOTION_THRESHOLD_CM
     
     # Convert mm to cm if needed (ifmagic proximity returns mm)
     proximity_in_cm = proximity_cm / 10.0 if proximity_cm > 100 else proximity_cm
@@ -733,28 +756,18 @@ def detect_motion_via_proximity(proximity_cm: float) -> bool:
             # Significant change detected - motion detected
             LAST_PROXIMITY_READING = proximity_in_cm
             KITCHEN_PROXIMITY_READINGS.append(proximity_in_cm)
-            # Keep only recent readings
-            if len(KITCHEN_PROXIMITY_READINGS) > PROXIMITY_READINGS_TO_TRACK:
-                KITCHEN_PROXIMITY_READINGS.pop(0)
             return True
     
-    # Update tracking
+    # Update tracking (the ring buffer drops the oldest reading itself)
     LAST_PROXIMITY_READING = proximity_in_cm
     KITCHEN_PROXIMITY_READINGS.append(proximity_in_cm)
-    # Keep only recent readings
-    if len(KITCHEN_PROXIMITY_READINGS) > PROXIMITY_READINGS_TO_TRACK:
-        KITCHEN_PROXIMITY_READINGS.pop(0)
     
     # Check if recent readings show variation (indicating movement)
     if len(KITCHEN_PROXIMITY_READINGS) >= 3:
-        # Calculate variance in recent readings
-        recent_readings = KITCHEN_PROXIMITY_READINGS[-5:]
-        if len(recent_readings) >= 2:
-            min_reading = min(recent_readings)
-            max_reading = max(recent_readings)
-            variation = max_reading - min_reading
-            if variation >= PROXIMITY_MOTION_THRESHOLD_CM:
-                return True
+        # Rolling max - min over the recent readings (O(1))
+        variation = KITCHEN_PROXIMITY_READINGS.range()
+        if variation >= PROXIMITY_MOTION_THRESHOLD_CM:
+            return True
     
     return False
 
@@ -762,7 +775,9 @@ def detect_motion_via_proximity(proximity_cm: float) -> bool:
 def check_stove_safety(temp_celsius: float, motion_detected: bool, hardware_ports=None, proximity_cm: float = None) -> Dict[str, any]:
     """
     Monitor stove temperature and motion to detect safety issues.
-    Includes check for second fire hazard threshold with proximity-based motion detection.
+    The heat warnings (announcement and glow per level) come from STOVE_HEAT_RULE;
+    this helper adds the motion-dependent escalation on top of the rule's level:
+    vibration, fire hazard reminders above the second threshold, and the safety alert.
     
     Args:
         temp_celsius: Current stove temperature
@@ -783,6 +798,9 @@ def check_stove_safety(temp_celsius: float, motion_detected: bool, hardware_port
     if motion_detected:
         LAST_MOTION_TIME = time.time()
     
+    # 0 = cool, 1 = above STOVE_TEMP_THRESHOLD_C, 2 = above STOVE_TEMP_SECOND_THRESHOLD_C
+    heat_level = _evaluate_warnings(hardware_ports, stove_c=temp_celsius)["stove_heat"]
+    
     # Check for proximity-based motion detection if proximity reading is provided
     proximity_motion_detected = False
     motion_within_range = False
@@ -810,9 +828,9 @@ def check_stove_safety(temp_celsius: float, motion_detected: bool, hardware_port
                 STOVE_ABOVE_SECOND_THRESHOLD_START = None
                 LAST_REMINDER_TIME = None
     
-    # Check fire warning threshold (40°C) - trigger vibration after 10 seconds with no motion
+    # Check fire warning threshold - trigger vibration after 10 seconds with no motion
     # Vibration will continue until movement is detected (even if temperature drops)
-    if temp_celsius > STOVE_TEMP_THRESHOLD_C:
+    if heat_level >= 1:
         # Track when stove first exceeded warning threshold
         if STOVE_ABOVE_WARNING_THRESHOLD_START is None:
             STOVE_ABOVE_WARNING_THRESHOLD_START = time.time()
@@ -864,7 +882,7 @@ def check_stove_safety(temp_celsius: float, motion_detected: bool, hardware_port
                 set_vibration_motor(hardware_ports, 1)
     
     # Check second fire hazard threshold (300°C) with proximity-based motion detection
-    if temp_celsius > STOVE_TEMP_SECOND_THRESHOLD_C:
+    if heat_level >= 2:
         # Track when stove first exceeded second threshold
         if STOVE_ABOVE_SECOND_THRESHOLD_START is None:
             STOVE_ABOVE_SECOND_THRESHOLD_START = time.time()
@@ -884,10 +902,7 @@ def check_stove_safety(temp_celsius: float, motion_detected: bool, hardware_port
                 if LAST_REMINDER_TIME is None or (current_time - LAST_REMINDER_TIME) >= SECOND_THRESHOLD_REMINDER_INTERVAL:
                     LAST_REMINDER_TIME = current_time
                     
-                    if hardware_ports is not None:
-                        set_glow_warning(hardware_ports, active=True)
-                    
-                    # Play audio reminder
+                    # Play audio reminder (the rule already holds the warning glow)
                     if AUDIO_AVAILABLE and speak_text:
                         if DIALOGUE_AVAILABLE and get_dialogue:
                             reminder_msg = get_dialogue("fire_hazard_reminder", 
@@ -895,7 +910,7 @@ def check_stove_safety(temp_celsius: float, motion_detected: bool, hardware_port
                                                        temp=int(STOVE_TEMP_SECOND_THRESHOLD_C))
                         else:
                             reminder_msg = f"Fire hazard alert. The stove has been above {int(STOVE_TEMP_SECOND_THRESHOLD_C)} degrees for over a minute with no movement detected. Please turn off the stove to avoid a fire."
-                        speak_text(reminder_msg)
+                        speak_text(reminder_msg, priority="critical")
                     
                     print(f"🔥 FIRE HAZARD REMINDER: Stove at {temp_celsius}°C for {int(time_above_threshold)}s with no motion")
                     print(f"   → Reminder: Turn off the stove to avoid a fire")
@@ -913,44 +928,18 @@ def check_stove_safety(temp_celsius: float, motion_detected: bool, hardware_port
                 STOVE_ABOVE_SECOND_THRESHOLD_START = None
                 LAST_REMINDER_TIME = None
     
-    # Reset second threshold tracking if temperature drops below threshold
-    if temp_celsius <= STOVE_TEMP_SECOND_THRESHOLD_C:
-        if STOVE_ABOVE_SECOND_THRESHOLD_START is not None:
-            STOVE_ABOVE_SECOND_THRESHOLD_START = None
-            LAST_REMINDER_TIME = None
+    elif STOVE_ABOVE_SECOND_THRESHOLD_START is not None:
+        # Temperature dropped below the second threshold - reset tracking
+        STOVE_ABOVE_SECOND_THRESHOLD_START = None
+        LAST_REMINDER_TIME = None
     
-    # Thermal warnings based on temperature (from ifmagic_trial.py logic)
-    if temp_celsius > STOVE_TEMP_SECOND_THRESHOLD_C:  # Very hot - critical warning (using constant)
-        if hardware_ports is not None:
-            set_glow_warning(hardware_ports, active=True)
-        if AUDIO_AVAILABLE and speak_text:
-            if DIALOGUE_AVAILABLE and get_dialogue:
-                hot_msg = get_dialogue("heat_warning_warming", "The stove is getting too hot, turn it off")
-            else:
-                hot_msg = "The stove is getting too hot, turn it off"
-            speak_text(hot_msg)
+    if heat_level == 2:
         print(f"🔥 CRITICAL: Stove temperature very high ({temp_celsius}°C) - turn it off")
-    elif temp_celsius > STOVE_TEMP_THRESHOLD_C:  # Hot - safety warning (using constant)
-        if hardware_ports is not None:
-            # Moderate warning - less saturation
-            try:
-                if hasattr(hardware_ports, 'modules') and hardware_ports.modules[GLOW_PORT] is not None:
-                    hardware_ports.modules[GLOW_PORT].out.setFade(
-                        start=0, end=2000, hue=100, saturation=175,  # Lower saturation
-                        movement=1, speed=1, low=1, high=1, bounce=1
-                    )
-            except (AttributeError, IndexError):
-                pass
-        if AUDIO_AVAILABLE and speak_text:
-            if DIALOGUE_AVAILABLE and get_dialogue:
-                touch_msg = get_dialogue("heat_warning_critical", "It's not safe to touch the stove")
-            else:
-                touch_msg = "It's not safe to touch the stove"
-            speak_text(touch_msg)
+    elif heat_level == 1:
         print(f"⚠️  WARNING: Stove is hot ({temp_celsius}°C) - not safe to touch")
     
     # Check if stove is hot
-    if temp_celsius > STOVE_TEMP_THRESHOLD_C:
+    if heat_level >= 1:
         # Stove is hot - check motion status
         if not motion_detected:
             # No motion detected - check how long
@@ -976,7 +965,7 @@ def check_stove_safety(temp_celsius: float, motion_detected: bool, hardware_port
                                                     temp=int(temp_celsius), minutes=int(time_since_motion // 60))
                         else:
                             alert_msg = f"Safety alert. Stove is hot at {int(temp_celsius)} degrees. No motion detected for {int(time_since_motion // 60)} minutes. Please return to the kitchen."
-                        speak_text(alert_msg)
+                        speak_text(alert_msg, priority="critical")
                     
                     return {
                         "action": "safety_alert",
@@ -985,15 +974,8 @@ def check_stove_safety(temp_celsius: float, motion_detected: bool, hardware_port
                         "should_cut_power": True
                     }
             else:
-                # Stove is hot but motion was recent - just warn about heat
+                # Stove is hot but motion was recent - the rule has already warned about the heat
                 print(f"⚠️  WARNING: Stove is hot ({temp_celsius}°C) - monitoring for safety")
-                if AUDIO_AVAILABLE and speak_text:
-                    if DIALOGUE_AVAILABLE and get_dialogue:
-                        warning_msg = get_dialogue("stove_hot_warning", f"Warning. Stove is hot at {int(temp_celsius)} degrees. Please monitor carefully.",
-                                                   temp=int(temp_celsius))
-                    else:
-                        warning_msg = f"Warning. Stove is hot at {int(temp_celsius)} degrees. Please monitor carefully."
-                    speak_text(warning_msg)
                 return {
                     "action": "stove_hot_warning",
                     "temp": temp_celsius,
@@ -1003,13 +985,6 @@ def check_stove_safety(temp_celsius: float, motion_detected: bool, hardware_port
         else:
             # Motion detected - stove is hot but user is present
             print(f"⚠️  WARNING: Stove is hot ({temp_celsius}°C) - motion detected, monitoring")
-            if AUDIO_AVAILABLE and speak_text:
-                if DIALOGUE_AVAILABLE and get_dialogue:
-                    warning_msg = get_dialogue("stove_hot_warning", f"Warning. Stove is hot at {int(temp_celsius)} degrees. Motion detected. Please monitor carefully.",
-                                               temp=int(temp_celsius))
-                else:
-                    warning_msg = f"Warning. Stove is hot at {int(temp_celsius)} degrees. Motion detected. Please monitor carefully."
-                speak_text(warning_msg)
             return {
                 "action": "stove_hot_monitoring",
                 "temp": temp_celsius,
@@ -1018,8 +993,7 @@ def check_stove_safety(temp_celsius: float, motion_detected: bool, hardware_port
     
     # Stove is cool - reset alert
     SAFETY_ALERT_ACTIVE = False
-    if temp_celsius <= STOVE_TEMP_THRESHOLD_C:
-        print(f"✓ Stove temperature: {temp_celsius}°C (normal, threshold: {STOVE_TEMP_THRESHOLD_C}°C)")
+    print(f"✓ Stove temperature: {temp_celsius}°C (normal, threshold: {STOVE_TEMP_THRESHOLD_C}°C)")
     return {
         "action": "normal",
         "temp": temp_celsius,
@@ -1102,7 +1076,7 @@ def exit_deescalation_mode() -> Dict[str, any]:
 def check_proximity_to_loud_object(proximity_cm: float, object_name: str, hardware_ports=None) -> Dict[str, any]:
     """
     Detect when a hand is in close proximity to a loud object (blender, garbage disposal, etc.)
-    and play a warning message before the object is turned on.
+    and play a warning message before the object is turned on (LOUD_OBJECT_RULE).
     
     Args:
         proximity_cm: Distance reading from proximity sensor in centimeters (or millimeters, will be converted)
@@ -1112,59 +1086,38 @@ def check_proximity_to_loud_object(proximity_cm: float, object_name: str, hardwa
     Returns:
         Dictionary with proximity status and action taken
     """
-    global CURRENT_PROXIMITY_CM, CURRENT_NEAR_OBJECT, PROXIMITY_THRESHOLD_CM
+    global CURRENT_PROXIMITY_CM, CURRENT_NEAR_OBJECT
     
     # Convert mm to cm if needed (ifmagic proximity returns mm)
     proximity_in_cm = proximity_cm / 10.0 if proximity_cm > 100 else proximity_cm
     CURRENT_PROXIMITY_CM = proximity_in_cm
     
-    # Check if hand is within warning threshold (100mm = 10cm from ifmagic_trial.py)
-    threshold_cm = 10.0  # 100mm threshold from ifmagic_trial.py
-    if proximity_in_cm <= threshold_cm:
+    was_warning = KITCHEN_WARNINGS.active_levels()["loud_object"] > 0
+    level = _evaluate_warnings(hardware_ports, object_distance_cm=proximity_in_cm)["loud_object"]
+    if level:
         CURRENT_NEAR_OBJECT = object_name.lower()
-        
-        print(f"⚠️  PROXIMITY ALERT: Hand detected {proximity_in_cm:.1f}cm from {object_name}")
-        print(f"   → Warning: {object_name.upper()} can create loud noise")
-        print(f"   → Activating pre-warning system")
-        
-        # Activate hardware glow if available
-        if hardware_ports is not None:
-            set_glow_warning(hardware_ports, active=True)
-        
-        # Play audio warning
-        if AUDIO_AVAILABLE and speak_text:
-            if DIALOGUE_AVAILABLE and get_dialogue:
-                warning_msg = get_dialogue("proximity_warning", "This item could get loud")
-            else:
-                warning_msg = "This item could get loud"
-            speak_text(warning_msg)
-        
-        # Activate visual warning (RGB LED pulsing)
-        print(f"   → RGB LED: Pulsing {CALM_DOWN_COLOR.upper()} light")
-        
+        if not was_warning:
+            print(f"⚠️  PROXIMITY ALERT: Hand detected {proximity_in_cm:.1f}cm from {object_name}")
+            print(f"   → Warning: {object_name.upper()} can create loud noise")
+            print(f"   → RGB LED: Pulsing {CALM_DOWN_COLOR.upper()} light")
         return {
             "action": "proximity_warning_activated",
             "object_name": object_name,
-            "proximity_cm": proximity_cm,
+            "proximity_cm": proximity_in_cm,
             "threshold_cm": PROXIMITY_THRESHOLD_CM,
-            "warning_played": True,
+            "warning_played": not was_warning,  # Announced once per approach
             "led_activated": True
         }
-    else:
-        # Hand moved away or not close enough - turn off glow
-        if hardware_ports is not None:
-            set_glow_warning(hardware_ports, active=False)
-        
-        if CURRENT_NEAR_OBJECT == object_name.lower():
-            CURRENT_NEAR_OBJECT = None
-            print(f"✅ Hand moved away from {object_name} ({proximity_in_cm:.1f}cm)")
-        
-        return {
-            "action": "proximity_safe",
-            "object_name": object_name,
-            "proximity_cm": proximity_in_cm,
-            "threshold_cm": threshold_cm
-        }
+    
+    if CURRENT_NEAR_OBJECT == object_name.lower():
+        CURRENT_NEAR_OBJECT = None
+        print(f"✅ Hand moved away from {object_name} ({proximity_in_cm:.1f}cm)")
+    return {
+        "action": "proximity_safe",
+        "object_name": object_name,
+        "proximity_cm": proximity_in_cm,
+        "threshold_cm": PROXIMITY_THRESHOLD_CM
+    }
 
 
 # Configuration setup functions removed - all thresholds are hardcoded above
@@ -1402,11 +1355,15 @@ def run_demo():
             break
 
 
-def run_demo_with_hardware():
+def run_demo_with_hardware(hardware=None):
     """
     Run kitchen system with ifmagic hardware integration.
     Continuously polls hardware sensors and triggers appropriate responses.
     Replaces keyboard input with hardware sensor readings.
+    
+    Args:
+        hardware: Optional hardware object to use instead of opening
+            HARDWARE_CONNECTION_PATH, e.g. a utils.sensor_replay.ReplayHardware
     """
     global LAST_MOTION_TIME, CURRENT_RECIPE, CURRENT_STEP
     
@@ -1417,7 +1374,9 @@ def run_demo_with_hardware():
     print("\n" + "="*60)
     print("KITCHEN SYSTEM - HARDWARE MODE")
     print("="*60)
-    print(f"\nConnecting to hardware at {HARDWARE_CONNECTION_PATH}...")
+    if hardware is None:
+        hardware = Magic.Hardware(HARDWARE_CONNECTION_PATH)
+    print(f"\nConnecting to hardware at {getattr(hardware, 'path', HARDWARE_CONNECTION_PATH)}...")
     print("Hardware sensor ports:")
     print(f"  Proximity: Port {PROXIMITY_PORT}")
     print(f"  Sound: Port {SOUND_PORT}")
@@ -1427,9 +1386,10 @@ def run_demo_with_hardware():
     print("(Press Ctrl+C to exit)\n")
     
     try:
-        with Magic.Hardware(HARDWARE_CONNECTION_PATH) as h:
+        with hardware as h:
             h.connect()
             print("✓ Hardware connected successfully\n")
+            KITCHEN_SENSORS.probe(h)
             
             # Track previous states to avoid repeated warnings
             last_proximity_warning = False
@@ -1486,7 +1446,14 @@ def run_demo_with_hardware():
                             pass  # Timer completed - already handled in check_timer()
                     
                     # Small delay to prevent overwhelming the system
-                    time.sleep(0.1)  # Check sensors 10 times per second
+                    # (a replay already waits for each recorded sample)
+                    if not getattr(h, "self_paced", False):
+                        time.sleep(0.1)  # Check sensors 10 times per second
+                    
+                except EOFError:
+                    print("\n\nSensor replay finished")
+                    h.disconnect()
+                    break
                     
                 except KeyboardInterrupt:
                     print("\n\nExiting hardware mode...")
@@ -1930,7 +1897,11 @@ def demo_proximity():
 if __name__ == "__main__":
     # Choose between hardware mode and keyboard input mode
     # Set HARDWARE_ENABLED = True to use hardware sensors, False for keyboard input
-    if HARDWARE_ENABLED:
+    if len(sys.argv) > 1:
+        # python kitchen.py <sensor log> [speed]: run hardware mode on a recording
+        from utils.sensor_replay import ReplayHardware
+        run_demo_with_hardware(ReplayHardware(sys.argv[1], speed=float(sys.argv[2]) if len(sys.argv) > 2 else 1.0))
+    elif HARDWARE_ENABLED:
         run_demo_with_hardware()
     else:
         run_demo()
\ No newline at end of file
@@ -45,6 +45,12 @@ except Exception as e:
     get_dialogue = None
     print(f"[DEBUG] Dialogue system import failed: {e}")
 
+# Rolling vibration history
+from utils.ring_buffer import RingBuffer
+
+# Cycle types are shared with the API server's content library
+from utils.cycle_type_storage import get_all_cycle_types
+
 
 # =============================================================================
 # CONFIGURATION (User-customizable expected time defaults to 45)
@@ -56,56 +62,7 @@ EXPECTED_CYCLE_MINUTES = DEFAULT_EXPECTED_CYCLE_MINUTES  # user can override in
 # Cycle Types - Similar to recipes in kitchen
 # Format: {cycle_id: {"name": str, "description": str, "expected_minutes": int, 
 #                     "detergent_amount": str, "temperature": str, "soil_level": str}}
-CYCLE_TYPES = {
-    "heavily_soiled": {
-        "name": "Heavily Soiled",
-        "description": "Very dirty clothes requiring extra cleaning",
-        "expected_minutes": 60,
-        "detergent_amount": "High",
-        "temperature": "Hot",
-        "soil_level": "Heavy"
-    },
-    "normal": {
-        "name": "Normal",
-        "description": "Standard everyday laundry",
-        "expected_minutes": 45,
-        "detergent_amount": "Medium",
-        "temperature": "Warm",
-        "soil_level": "Normal"
-    },
-    "lightly_soiled": {
-        "name": "Lightly Soiled",
-        "description": "Minimally dirty clothes requiring gentle cleaning",
-        "expected_minutes": 35,
-        "detergent_amount": "Low",
-        "temperature": "Cold",
-        "soil_level": "Light"
-    },
-    "delicates": {
-        "name": "Delicates",
-        "description": "Delicate fabrics requiring gentle care",
-        "expected_minutes": 30,
-        "detergent_amount": "Low",
-        "temperature": "Cold",
-        "soil_level": "Light"
-    },
-    "sanitize": {
-        "name": "Sanitize",
-        "description": "Deep cleaning for germ removal",
-        "expected_minutes": 65,
-        "detergent_amount": "High",
-        "temperature": "Hot",
-        "soil_level": "Heavy"
-    },
-    "quick_wash": {
-        "name": "Quick Wash",
-        "description": "Fast cycle for lightly soiled items",
-        "expected_minutes": 25,
-        "detergent_amount": "Low",
-        "temperature": "Cold",
-        "soil_level": "Light"
-    }
-}
+CYCLE_TYPES = get_all_cycle_types()  # Loaded from data/cycle_types.json
 
 CURRENT_CYCLE_TYPE_ID = None  # ID of currently active cycle type
 CURRENT_CYCLE_TYPE = None  # Full cycle type dictionary
@@ -142,8 +99,11 @@ CYCLE_CANCELLED_BY_FALSE_POSITIVE = False
 WASHER_RUNNING = False
 WASHER_STARTED_AT: Optional[float] = None
 
-LAST_VIBRATION_TIME: Optional[float] = None
 LAST_VIBRATION_LEVEL: float = 0.0
+VIBRATION_HISTORY_SIZE = 512  # Vibration readings kept (quiet time and rolling statistics)
+VIBRATION_HISTORY = RingBuffer(VIBRATION_HISTORY_SIZE)
+
+CLOCK_OFFSET_SECONDS = 0.0  # Demo fast-forward added to the wall clock (see _advance_time)
 
 DOOR_STATUS = "CLOSED"  # OPEN/CLOSED
 LAST_DOOR_OPENED_AT: Optional[float] = None
@@ -174,7 +134,7 @@ def _reset_for_next_cycle() -> None:
     global CYCLE_ARMED, ALMOST_DONE_NOTIFIED, OVERRUN_MOTION_NOTIFIED
     global CYCLE_CANCELLED_BY_DOOR_OPEN, CYCLE_CANCELLED_BY_FALSE_POSITIVE
     global REMINDER_STAGE, LAUNDRY_FINISHED_AT, SNOOZE_UNTIL
-    global LAST_VIBRATION_TIME, LAST_VIBRATION_LEVEL
+    global LAST_VIBRATION_LEVEL
 
     # Clear reminder/finish state
     LAUNDRY_FINISHED_AT = None
@@ -188,8 +148,8 @@ def _reset_for_next_cycle() -> None:
     CYCLE_CANCELLED_BY_FALSE_POSITIVE = False
 
     # Optional: reset vibration baseline so door jostle doesn't carry over
-    LAST_VIBRATION_TIME = None
     LAST_VIBRATION_LEVEL = 0.0
+    VIBRATION_HISTORY.clear()
 
     # Re-arm will be set after OPEN->CLOSE
     CYCLE_ARMED = False
@@ -199,7 +159,17 @@ def _say(text: str) -> None:
         speak_text(text)
 
 def _now() -> float:
-    return time.time()
+    return time.time() + CLOCK_OFFSET_SECONDS
+
+def _quiet_seconds() -> Optional[float]:
+    """
+    Seconds since the last vibration, from the vibration history.
+    While a cycle runs its start counts as vibration. None if there was none.
+    """
+    last = VIBRATION_HISTORY.last_time_above(0)
+    if WASHER_RUNNING and WASHER_STARTED_AT is not None and (last is None or last < WASHER_STARTED_AT):
+        last = WASHER_STARTED_AT
+    return _now() - last if last is not None else None
 
 def _elapsed_minutes(since: Optional[float]) -> Optional[float]:
     if since is None:
@@ -295,12 +265,11 @@ def load_cycle_type(cycle_id: str) -> Dict[str, Any]:
 
 def start_laundry_cycle() -> Dict[str, Any]:
     """Start laundry cycle and reset alert state."""
-    global WASHER_RUNNING, WASHER_STARTED_AT, LAST_VIBRATION_TIME, LAUNDRY_FINISHED_AT, REMINDER_STAGE
+    global WASHER_RUNNING, WASHER_STARTED_AT, LAUNDRY_FINISHED_AT, REMINDER_STAGE
     global ALMOST_DONE_NOTIFIED, OVERRUN_MOTION_NOTIFIED, CYCLE_CANCELLED_BY_DOOR_OPEN, CYCLE_CANCELLED_BY_FALSE_POSITIVE
 
     WASHER_RUNNING = True
-    WASHER_STARTED_AT = _now()
-    LAST_VIBRATION_TIME = _now()  # assume motion at start
+    WASHER_STARTED_AT = _now()  # assume motion at start (see _quiet_seconds)
     LAUNDRY_FINISHED_AT = None
     REMINDER_STAGE = 0
     ALMOST_DONE_NOTIFIED = False
@@ -332,11 +301,11 @@ def start_laundry_cycle() -> Dict[str, Any]:
 
 def update_vibration(vibration_level: float) -> Dict[str, Any]:
     """Update vibration readings; triggers auto-start if conditions are met."""
-    global LAST_VIBRATION_TIME, LAST_VIBRATION_LEVEL
+    global LAST_VIBRATION_LEVEL
     LAST_VIBRATION_LEVEL = vibration_level
+    VIBRATION_HISTORY.append(vibration_level, _now())
 
     if vibration_level > 0:
-        LAST_VIBRATION_TIME = _now()
         _maybe_auto_start()
 
     return {"action": "vibration_updated", "vibration": vibration_level}
@@ -468,7 +437,8 @@ def _check_early_false_positive() -> Dict[str, Any]:
 
     # Only applies BEFORE expected-5
     if elapsed < window_start:
-        quiet_seconds = int(_now() - LAST_VIBRATION_TIME) if LAST_VIBRATION_TIME else 10**9
+        quiet = _quiet_seconds()
+        quiet_seconds = int(quiet) if quiet is not None else 10**9
 
         if quiet_seconds >= EARLY_FALSE_POSITIVE_QUIET_SECONDS:
             WASHER_RUNNING = False
@@ -512,10 +482,8 @@ def _check_finish_logic() -> Dict[str, Any]:
 
     # Only evaluate finish based on quiet-time inside the window
     if elapsed >= window_start and elapsed <= window_end:
-        if LAST_VIBRATION_TIME is None:
-            quiet_seconds = 10**9
-        else:
-            quiet_seconds = int(_now() - LAST_VIBRATION_TIME)
+        quiet = _quiet_seconds()
+        quiet_seconds = int(quiet) if quiet is not None else 10**9
 
         if quiet_seconds >= FINISH_QUIET_SECONDS:
             # Stage 1: Laundry done
@@ -667,7 +635,8 @@ def print_input_key():
 def show_system_status():
     """Display current status of all system sections."""
     elapsed = _elapsed_minutes(WASHER_STARTED_AT) if WASHER_STARTED_AT else None
-    quiet = int(_now() - LAST_VIBRATION_TIME) if LAST_VIBRATION_TIME else None
+    quiet = _quiet_seconds()
+    quiet = int(quiet) if quiet is not None else None
     mins_since_finish = _elapsed_minutes(LAUNDRY_FINISHED_AT) if LAUNDRY_FINISHED_AT else None
     
     print("\n" + "-"*60)
@@ -697,6 +666,9 @@ def show_system_status():
     
     print(f"\nVibration:")
     print(f"  Last level: {LAST_VIBRATION_LEVEL}")
+    if len(VIBRATION_HISTORY):
+        print(f"  Last {len(VIBRATION_HISTORY)} readings: mean {VIBRATION_HISTORY.mean():.2f}, "
+              f"min {VIBRATION_HISTORY.min():.2f}, max {VIBRATION_HISTORY.max():.2f}, std {VIBRATION_HISTORY.std():.2f}")
     print(f"  Quiet for: {quiet} seconds" if quiet is not None else "  Quiet for: N/A")
     
     if LAUNDRY_FINISHED_AT:
@@ -817,23 +789,9 @@ def run_demo():
 
 
 def _advance_time(minutes: float) -> None:
-    """Simulate time passing by shifting internal timestamps backward."""
-    seconds = minutes * 60
-    global WASHER_STARTED_AT, LAST_VIBRATION_TIME, LAUNDRY_FINISHED_AT, SNOOZE_UNTIL
-    global LAST_DOOR_OPENED_AT, LAST_DOOR_CLOSED_AT
-
-    if WASHER_STARTED_AT is not None:
-        WASHER_STARTED_AT -= seconds
-    if LAST_VIBRATION_TIME is not None:
-        LAST_VIBRATION_TIME -= seconds
-    if LAUNDRY_FINISHED_AT is not None:
-        LAUNDRY_FINISHED_AT -= seconds
-    if SNOOZE_UNTIL is not None:
-        SNOOZE_UNTIL -= seconds
-    if LAST_DOOR_OPENED_AT is not None:
-        LAST_DOOR_OPENED_AT -= seconds
-    if LAST_DOOR_CLOSED_AT is not None:
-        LAST_DOOR_CLOSED_AT -= seconds
+    """Simulate time passing by moving the demo clock forward (history timestamps stay valid)."""
+    global CLOCK_OFFSET_SECONDS
+    CLOCK_OFFSET_SECONDS += minutes * 60
 
 
 if __name__ == "__main__":
@@ -4,7 +4,13 @@ Handles audio warnings and messages for HelpingHome.
 """
 
 import os
-from typing import Optional
+import heapq
+import itertools
+import shutil
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
 
 try:
     from dotenv import load_dotenv
@@ -15,12 +21,22 @@ except ImportError:
     ELEVENLABS_AVAILABLE = False
     elevenlabs_play = None
 
+try:
+    from elevenlabs.play import stream as elevenlabs_stream
+    # ElevenLabs streams playback through mpv; without it we play whole clips
+    STREAMING_AVAILABLE = shutil.which("mpv") is not None
+except ImportError:
+    elevenlabs_stream = None
+    STREAMING_AVAILABLE = False
+
 try:
     import requests
     REQUESTS_AVAILABLE = True
 except ImportError:
     REQUESTS_AVAILABLE = False
 
+from utils.tts_cache import TTSCache, get_tts_cache, make_cache_key
+
 
 # Load environment variables
 load_dotenv()
@@ -31,13 +47,19 @@ class AudioAgent:
     ElevenLabs audio agent for text-to-speech warnings and messages.
     """
     
-    def __init__(self, api_key: Optional[str] = None, voice_id: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, voice_id: Optional[str] = None,
+                 cache: Optional[TTSCache] = None, use_cache: bool = True,
+                 streaming: Optional[bool] = None):
         """
         Initialize the ElevenLabs audio agent.
         
         Args:
             api_key: ElevenLabs API key. If not provided, will try to get from ELEVENLABS_API_KEY env variable.
             voice_id: Voice ID to use. If not provided, uses a default calm voice.
+            cache: TTS audio cache to use. If not provided, uses the shared on-disk cache.
+            use_cache: Set to False to always call the ElevenLabs API.
+            streaming: Start playback as soon as the first audio chunks arrive.
+                       Defaults to the TTS_STREAMING env variable (on) when mpv is installed.
         """
         if not ELEVENLABS_AVAILABLE:
             raise ImportError(
@@ -68,35 +90,166 @@ class AudioAgent:
             "style": 0.3,  # Lower style = less variation, more soothing
             "use_speaker_boost": True  # Enhances clarity
         }
+        self.output_format = "mp3_44100_128"
+        self.cache = (cache or get_tts_cache()) if use_cache else None
+        if streaming is None:
+            streaming = os.getenv("TTS_STREAMING", "1") != "0"
+        self.streaming = streaming and STREAMING_AVAILABLE
+        # Recent utterance latencies (see latency_stats)
+        self.latencies: deque = deque(maxlen=200)
     
-    def speak(self, text: str, voice_id: Optional[str] = None) -> bool:
+    def cache_key(self, text: str, voice_id: Optional[str] = None) -> str:
+        """Get the TTS cache key for a text spoken with the given (or default) voice."""
+        return make_cache_key(text, voice_id or self.voice_id, self.model_id,
+                              self.voice_settings, self.output_format)
+    
+    def synthesize(self, text: str, voice_id: Optional[str] = None) -> bytes:
         """
-        Convert text to speech and play it.
+        Get MP3 audio for a text, from the cache if possible.
         
         Args:
             text: Text to convert to speech
             voice_id: Optional voice ID (uses default if not provided)
         
         Returns:
-            True if successful, False otherwise
+            MP3 audio bytes
         """
         voice = voice_id or self.voice_id
+        key = self.cache_key(text, voice)
         
-        try:
-            print(f"[DEBUG] Calling ElevenLabs API with text: {text[:50]}...")
-            print(f"[DEBUG] Voice ID: {voice}, Model: {self.model_id}")
-            audio = self.client.text_to_speech.convert(
+        if self.cache is not None:
+            audio = self.cache.get(key, characters=len(text))
+            if audio is not None:
+                print(f"[DEBUG] TTS cache hit ({len(audio)} bytes)")
+                return audio
+        return self._synthesize_uncached(text, voice, key)
+    
+    def _synthesize_uncached(self, text: str, voice: str, key: str) -> bytes:
+        """Call the API for a clip that missed the cache and store the result."""
+        print(f"[DEBUG] Calling ElevenLabs API with text: {text[:50]}...")
+        print(f"[DEBUG] Voice ID: {voice}, Model: {self.model_id}")
+        audio = self.client.text_to_speech.convert(
+            voice_id=voice,
+            text=text,
+            model_id=self.model_id,
+            voice_settings=self.voice_settings,
+            output_format=self.output_format
+        )
+        # The SDK may return a chunk iterator; keep the full clip for the cache
+        if not isinstance(audio, (bytes, bytearray)):
+            audio = b"".join(audio)
+        print("[DEBUG] API call successful, audio received")
+        
+        if self.cache is not None:
+            self.cache.put(key, bytes(audio))
+            stats = self.cache.stats()
+            print(f"[DEBUG] TTS cache: {stats['hits']} hits, {stats['misses']} misses, "
+                  f"{stats['characters_saved']} characters saved")
+        return audio
+    
+    def _record_latency(self, text: str, source: str, first_audio_s: float, total_s: float):
+        """Record and report time-to-first-audio for one utterance."""
+        self.latencies.append({
+            "source": source,
+            "first_audio_ms": round(first_audio_s * 1000, 1),
+            "total_ms": round(total_s * 1000, 1),
+            "characters": len(text)
+        })
+        print(f"[DEBUG] Time to first audio: {first_audio_s * 1000:.0f} ms ({source})")
+    
+    def latency_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Summarize time-to-first-audio over recent utterances.
+        
+        Returns:
+            Dictionary of source ("cache", "stream", "api") -> count, mean, p50 and max in ms
+        """
+        by_source: Dict[str, List[float]] = {}
+        for entry in list(self.latencies):
+            by_source.setdefault(entry["source"], []).append(entry["first_audio_ms"])
+        summary = {}
+        for source, values in by_source.items():
+            values.sort()
+            summary[source] = {
+                "count": len(values),
+                "mean_ms": round(sum(values) / len(values), 1),
+                "p50_ms": values[len(values) // 2],
+                "max_ms": values[-1]
+            }
+        return summary
+    
+    def _speak_streaming(self, text: str, voice: str) -> bytes:
+        """
+        Stream synthesis straight into playback and return the full clip.
+        Playback starts with the first chunk instead of after the whole clip arrives.
+        """
+        start = time.perf_counter()
+        chunks = []
+        first_chunk_at = []
+        
+        def _timed_chunks():
+            for chunk in self.client.text_to_speech.stream(
                 voice_id=voice,
                 text=text,
                 model_id=self.model_id,
                 voice_settings=self.voice_settings,
-                output_format="mp3_44100_128"
-            )
-            print("[DEBUG] API call successful, audio received")
+                output_format=self.output_format
+            ):
+                if not chunk:
+                    continue
+                if not chunks:
+                    first_chunk_at.append(time.perf_counter())
+                chunks.append(chunk)
+                yield chunk
+        
+        print(f"[DEBUG] Streaming ElevenLabs audio for text: {text[:50]}...")
+        try:
+            elevenlabs_stream(_timed_chunks())
+        finally:
+            # Recorded even if playback fails part-way, as long as audio started
+            if first_chunk_at:
+                self._record_latency(text, "stream", first_chunk_at[0] - start, time.perf_counter() - start)
+        return b"".join(chunks)
+    
+    def speak(self, text: str, voice_id: Optional[str] = None) -> bool:
+        """
+        Convert text to speech and play it.
+        
+        Cached clips are played from local disk. Otherwise, in streaming mode,
+        playback starts as soon as the first audio chunks arrive and the full
+        clip is stored in the cache afterwards.
+        
+        Args:
+            text: Text to convert to speech
+            voice_id: Optional voice ID (uses default if not provided)
+        
+        Returns:
+            True if successful, False otherwise
+        """
+        voice = voice_id or self.voice_id
+        
+        try:
+            start = time.perf_counter()
+            key = self.cache_key(text, voice)
+            # One counted lookup per utterance, so streamed misses show up in the hit rate
+            audio = self.cache.get(key, characters=len(text)) if self.cache is not None else None
+            cached = audio is not None
+            
+            if self.streaming and not cached:
+                audio = self._speak_streaming(text, voice)
+                if self.cache is not None and audio:
+                    self.cache.put(key, audio)
+                print("[DEBUG] Audio playback completed")
+                return True
+            
+            if not cached:
+                audio = self._synthesize_uncached(text, voice, key)
+            first_audio = time.perf_counter() - start
             print("[DEBUG] Playing audio...")
-            # Play the audio directly (no file saved)
+            # Play the audio (repeat phrases come from the local TTS cache)
             elevenlabs_play.play(audio)
             print("[DEBUG] Audio playback completed")
+            self._record_latency(text, "cache" if cached else "api", first_audio, time.perf_counter() - start)
             return True
             
         except Exception as e:
@@ -175,17 +328,210 @@ def get_audio_agent(voice_id: Optional[str] = None) -> Optional[AudioAgent]:
     return _audio_agent
 
 
-def speak_text(text: str) -> bool:
+# Speech queue configuration
+# Lower rank is spoken first; messages of equal rank are spoken in arrival order.
+SPEECH_PRIORITIES = {
+    "critical": 0,
+    "warning": 1,
+    "info": 2
+}
+SPEECH_QUEUE_CAPACITY = 8  # Maximum number of utterances waiting for playback
+# Seconds a message may wait before it is no longer worth saying (None = never stale)
+SPEECH_MAX_AGE_SECONDS = {
+    "critical": None,
+    "warning": 15.0,
+    "info": 30.0
+}
+
+
+class _SpeechItem:
+    """A single utterance waiting in the speech queue."""
+
+    __slots__ = ("rank", "seq", "text", "priority", "enqueued_at", "cancelled")
+
+    def __init__(self, rank: int, seq: int, text: str, priority: str):
+        self.rank = rank
+        self.seq = seq
+        self.text = text
+        self.priority = priority
+        self.enqueued_at = time.monotonic()
+        self.cancelled = False
+
+    def __lt__(self, other: "_SpeechItem") -> bool:
+        return (self.rank, self.seq) < (other.rank, other.seq)
+
+
+class SpeechQueue:
     """
-    Convenience function to speak text using the global audio agent.
-    
-    Args:
-        text: Text to speak
+    Bounded, prioritised speech queue drained by a dedicated playback worker.
     
-    Returns:
-        True if successful, False otherwise
+    Callers enqueue text and return immediately, so sensor loops never wait on
+    ElevenLabs synthesis or audio playback. Critical messages are spoken before
+    warnings and info, identical pending messages are merged, and low-priority
+    messages that waited too long are dropped instead of being spoken late.
     """
-    print(f"[DEBUG] speak_text called with: {text[:50]}...")
+    
+    def __init__(self, speak_fn, capacity: int = SPEECH_QUEUE_CAPACITY):
+        """
+        Initialize the speech queue.
+        
+        Args:
+            speak_fn: Callable that synchronously speaks a text and returns True on success
+            capacity: Maximum number of pending utterances
+        """
+        self._speak_fn = speak_fn
+        self.capacity = capacity
+        self._heap = []
+        self._pending: Dict[str, _SpeechItem] = {}  # text -> pending item (for merging)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._speaking = False
+        self._worker: Optional[threading.Thread] = None
+        self.stats = {
+            "queued": 0,
+            "merged": 0,
+            "dropped_full": 0,
+            "dropped_stale": 0,
+            "spoken": 0,
+            "failed": 0
+        }
+    
+    def put(self, text: str, priority: str = "info") -> bool:
+        """
+        Queue a message for playback.
+        
+        Args:
+            text: Text to speak
+            priority: "critical", "warning" or "info"
+        
+        Returns:
+            True if the message was queued (or merged with an identical pending one),
+            False if it was dropped because the queue is full of more important messages
+        """
+        rank = SPEECH_PRIORITIES.get(priority, SPEECH_PRIORITIES["info"])
+        
+        with self._cond:
+            existing = self._pending.get(text)
+            if existing is not None:
+                if existing.rank <= rank:
+                    # Same message already waiting at equal or higher priority
+                    self.stats["merged"] += 1
+                    return True
+                # Re-queue the pending copy at the higher priority
+                existing.cancelled = True
+                del self._pending[text]
+            
+            if len(self._pending) >= self.capacity and not self._evict_for(rank):
+                self.stats["dropped_full"] += 1
+                print(f"[DEBUG] Speech queue full, dropping {priority} message: {text[:50]}...")
+                return False
+            
+            item = _SpeechItem(rank, next(self._seq), text, priority)
+            heapq.heappush(self._heap, item)
+            self._pending[text] = item
+            self.stats["queued"] += 1
+            self._ensure_worker()
+            self._cond.notify()
+        return True
+    
+    def _evict_for(self, rank: int) -> bool:
+        """Drop the least important pending message to make room for one of the given rank."""
+        victim = None
+        for item in self._pending.values():
+            if victim is None or (item.rank, -item.seq) > (victim.rank, -victim.seq):
+                victim = item
+        if victim is None or victim.rank < rank:
+            return False
+        victim.cancelled = True
+        del self._pending[victim.text]
+        self.stats["dropped_full"] += 1
+        print(f"[DEBUG] Speech queue full, dropping {victim.priority} message: {victim.text[:50]}...")
+        return True
+    
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name="speech-worker", daemon=True)
+            self._worker.start()
+    
+    def _next_item(self) -> _SpeechItem:
+        """Block until a live, non-stale item is available and return it."""
+        with self._cond:
+            while True:
+                while not self._heap:
+                    self._speaking = False
+                    self._cond.notify_all()
+                    self._cond.wait()
+                item = heapq.heappop(self._heap)
+                if item.cancelled:
+                    continue
+                del self._pending[item.text]
+                max_age = SPEECH_MAX_AGE_SECONDS.get(item.priority)
+                if max_age is not None and time.monotonic() - item.enqueued_at > max_age:
+                    self.stats["dropped_stale"] += 1
+                    print(f"[DEBUG] Dropping stale {item.priority} message: {item.text[:50]}...")
+                    continue
+                self._speaking = True
+                return item
+    
+    def _run(self):
+        while True:
+            item = self._next_item()
+            try:
+                ok = self._speak_fn(item.text)
+            except Exception as e:
+                print(f"[DEBUG] Error speaking queued text: {e}")
+                ok = False
+            with self._cond:
+                self.stats["spoken" if ok else "failed"] += 1
+    
+    def pending(self) -> int:
+        """Number of messages waiting for playback."""
+        with self._cond:
+            return len(self._pending)
+    
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every queued message has been played or dropped.
+        
+        Args:
+            timeout: Maximum seconds to wait (None waits forever)
+        
+        Returns:
+            True if the queue drained, False on timeout
+        """
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and not self._speaking, timeout)
+
+
+# Global speech queue instance (created on first non-blocking speak_text call)
+_speech_queue: Optional[SpeechQueue] = None
+_speech_queue_lock = threading.Lock()
+
+
+def get_speech_queue() -> SpeechQueue:
+    """Get or create the global speech queue."""
+    global _speech_queue
+    
+    if _speech_queue is None:
+        with _speech_queue_lock:
+            if _speech_queue is None:
+                _speech_queue = SpeechQueue(_speak_now)
+    return _speech_queue
+
+
+def get_tts_cache_stats() -> Optional[Dict[str, any]]:
+    """Get hit/miss counters for the shared TTS audio cache (None if unavailable)."""
+    cache = get_tts_cache()
+    return cache.stats() if cache else None
+
+
+def get_tts_latency_stats() -> Dict[str, Dict[str, float]]:
+    """Get time-to-first-audio statistics for the global audio agent (empty if not initialized)."""
+    return _audio_agent.latency_stats() if _audio_agent else {}
+
+
+def _speak_now(text: str) -> bool:
+    """Speak text synchronously on the calling thread."""
     agent = get_audio_agent()
     if agent:
         print("[DEBUG] Audio agent found, calling speak()...")
@@ -202,3 +548,24 @@ def speak_text(text: str) -> bool:
         print("[DEBUG] No audio agent available")
     return False
 
+
+def speak_text(text: str, block: bool = False, priority: str = "info") -> bool:
+    """
+    Convenience function to speak text using the global audio agent.
+    
+    By default the text is handed to the background speech queue and this
+    function returns immediately, so callers in the sensor loop are not
+    delayed by synthesis or playback.
+    
+    Args:
+        text: Text to speak
+        block: If True, synthesize and play on the calling thread before returning
+        priority: Queue priority for non-blocking calls ("critical", "warning" or "info")
+    
+    Returns:
+        True if successful (or queued when block=False), False otherwise
+    """
+    print(f"[DEBUG] speak_text called with: {text[:50]}...")
+    if block:
+        return _speak_now(text)
+    return get_speech_queue().put(text, priority=priority)
@@ -0,0 +1,280 @@
+"""
+Indexed content library for recipes, routines and laundry cycle types.
+Documents stay in their journaled JSON repositories (data/recipes.json etc.
+for the default household, data/households/<household>/ for the others);
+the library keeps a SQLite index of them at data/library.db so the API can
+page, sort and full-text search (names, descriptions and steps) without
+loading and shipping whole catalogs.
+
+The index is derived data: each (household, kind) remembers the ETag of the
+repository it was built from and is rebuilt in one transaction whenever the
+repository changed, whichever process made the change.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from utils import cycle_type_storage, recipe_storage, routine_storage
+from utils.json_repository import JsonDocumentRepository
+
+# Get project root directory
+_script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(_script_dir)
+
+LIBRARY_DB_PATH = os.getenv('LIBRARY_DB_PATH', os.path.join(project_root, 'data', 'library.db'))
+HOUSEHOLDS_DIR = os.path.join(project_root, 'data', 'households')
+DEFAULT_HOUSEHOLD = "default"
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+# Kind -> (storage module of the default household, file name used for other households)
+KINDS = {
+    "recipe": (recipe_storage, "recipes.json"),
+    "routine": (routine_storage, "routines.json"),
+    "cycle_type": (cycle_type_storage, "cycle_types.json"),
+}
+
+_HOUSEHOLD_PATTERN = re.compile(r'^[a-z0-9_-]{1,64}$')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    household TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    item_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    body TEXT NOT NULL,
+    document TEXT NOT NULL,
+    UNIQUE (household, kind, item_id)
+);
+CREATE INDEX IF NOT EXISTS idx_items_name ON items (household, kind, name COLLATE NOCASE);
+CREATE TABLE IF NOT EXISTS sources (
+    household TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    etag TEXT NOT NULL,
+    PRIMARY KEY (household, kind)
+);
+"""
+
+FTS_SCHEMA = "CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(name, body)"
+
+
+def _searchable_text(document: Dict[str, any]) -> str:
+    """Description and steps (and any other text fields) of a document, for search."""
+    parts = [str(document.get("description") or "")]
+    parts.extend(str(step) for step in document.get("steps") or [])
+    for key, value in document.items():
+        if key not in ("name", "description", "steps") and isinstance(value, str):
+            parts.append(value)
+    return "\n".join(part for part in parts if part)
+
+
+def _fts_query(query: str) -> str:
+    """Turn user input into an FTS5 query: every word must match as a prefix."""
+    words = re.findall(r'\w+', query)
+    return " ".join(f'"{word}"*' for word in words)
+
+
+class ContentLibrary:
+    """
+    SQLite index over the per-household document repositories.
+
+    Uses FTS5 for search when SQLite was built with it, otherwise falls back
+    to LIKE matching (same results for whole words, slower on large catalogs).
+    """
+
+    def __init__(self, path: str = LIBRARY_DB_PATH, households_dir: str = HOUSEHOLDS_DIR):
+        """
+        Open (or create) the index.
+
+        Args:
+            path: SQLite database file
+            households_dir: Directory holding the non-default households' repositories
+        """
+        self.path = path
+        self.households_dir = households_dir
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connection = sqlite3.connect(path, timeout=5.0, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(SCHEMA)
+        try:
+            self._connection.execute(FTS_SCHEMA)
+            self.fts_available = True
+        except sqlite3.OperationalError:
+            self.fts_available = False
+            print("[LIBRARY] SQLite has no FTS5 support, search falls back to LIKE matching")
+        self._connection.commit()
+        self._lock = threading.Lock()
+        self._repositories: Dict[Tuple[str, str], JsonDocumentRepository] = {}
+
+    # ------------------------------------------------------------------
+    # Repositories
+    # ------------------------------------------------------------------
+
+    def repository(self, kind: str, household: str = DEFAULT_HOUSEHOLD) -> JsonDocumentRepository:
+        """
+        Get the repository holding a household's documents of one kind.
+
+        Raises:
+            ValueError: for an unknown kind or an invalid household name
+        """
+        if kind not in KINDS:
+            raise ValueError(f"Unknown content kind '{kind}'. Must be one of: {', '.join(KINDS)}")
+        storage, file_name = KINDS[kind]
+        if household == DEFAULT_HOUSEHOLD:
+            return storage.get_repository()
+        if not _HOUSEHOLD_PATTERN.match(household or ""):
+            raise ValueError("Household must be 1-64 characters of a-z, 0-9, '_' or '-'")
+        key = (household, kind)
+        with self._lock:
+            repository = self._repositories.get(key)
+            if repository is None:
+                path = os.path.join(self.households_dir, household, file_name)
+                repository = JsonDocumentRepository(path, default_factory=dict, label=f"{household} {kind}s")
+                self._repositories[key] = repository
+        return repository
+
+    def households(self) -> List[str]:
+        """Names of every household with stored content."""
+        names = {DEFAULT_HOUSEHOLD}
+        if os.path.isdir(self.households_dir):
+            names.update(name for name in os.listdir(self.households_dir)
+                         if _HOUSEHOLD_PATTERN.match(name))
+        return sorted(names)
+
+    # ------------------------------------------------------------------
+    # Index maintenance
+    # ------------------------------------------------------------------
+
+    def sync(self, kind: str, household: str = DEFAULT_HOUSEHOLD) -> bool:
+        """
+        Rebuild the index of a household's documents if the repository changed.
+
+        Returns:
+            True if the index was rebuilt
+        """
+        repository = self.repository(kind, household)
+        etag = repository.etag()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT etag FROM sources WHERE household = ? AND kind = ?", (household, kind)
+            ).fetchone()
+            if row and row[0] == etag:
+                return False
+            documents = repository.all()
+            with self._connection:
+                self._delete_index_locked(kind, household)
+                for item_id, document in documents.items():
+                    self._index_locked(kind, household, item_id, document)
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO sources (household, kind, etag) VALUES (?, ?, ?)",
+                    (household, kind, etag)
+                )
+        return True
+
+    def _delete_index_locked(self, kind: str, household: str):
+        if self.fts_available:
+            self._connection.execute(
+                "DELETE FROM items_fts WHERE rowid IN (SELECT id FROM items WHERE household = ? AND kind = ?)",
+                (household, kind)
+            )
+        self._connection.execute("DELETE FROM items WHERE household = ? AND kind = ?", (household, kind))
+
+    def _index_locked(self, kind: str, household: str, item_id: str, document: Dict[str, any]):
+        name = str(document.get("name") or item_id)
+        body = _searchable_text(document)
+        cursor = self._connection.execute(
+            "INSERT INTO items (household, kind, item_id, name, body, document) VALUES (?, ?, ?, ?, ?, ?)",
+            (household, kind, item_id, name, body, json.dumps(document, ensure_ascii=False))
+        )
+        if self.fts_available:
+            self._connection.execute(
+                "INSERT INTO items_fts (rowid, name, body) VALUES (?, ?, ?)", (cursor.lastrowid, name, body)
+            )
+
+    # ------------------------------------------------------------------
+    # Queries and writes
+    # ------------------------------------------------------------------
+
+    def list(self, kind: str, household: str = DEFAULT_HOUSEHOLD, query: Optional[str] = None,
+             offset: int = 0, limit: int = DEFAULT_PAGE_SIZE) -> Dict[str, any]:
+        """
+        Get one page of a household's documents, optionally filtered by a search query.
+
+        Args:
+            kind: "recipe", "routine" or "cycle_type"
+            household: Household namespace
+            query: Search words (prefix match on names, descriptions and steps); best matches first
+            offset: Number of matching documents to skip
+            limit: Page size (capped at MAX_PAGE_SIZE)
+
+        Returns:
+            Dictionary with items (list of (item_id, document) in page order) and total matches
+        """
+        self.sync(kind, household)
+        offset = max(0, int(offset))
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        match = _fts_query(query) if query else ""
+        with self._lock:
+            if not match:
+                where, params, order = "household = ? AND kind = ?", [household, kind], "name COLLATE NOCASE, item_id"
+                source = "items"
+            elif self.fts_available:
+                where = "items.household = ? AND items.kind = ? AND items_fts MATCH ?"
+                params = [household, kind, match]
+                order = "bm25(items_fts), items.name COLLATE NOCASE"
+                source = "items JOIN items_fts ON items_fts.rowid = items.id"
+            else:
+                clauses = ["household = ?", "kind = ?"]
+                params = [household, kind]
+                for word in re.findall(r'\w+', query):
+                    clauses.append("(name LIKE ? OR body LIKE ?)")
+                    params.extend([f"%{word}%", f"%{word}%"])
+                where, order, source = " AND ".join(clauses), "name COLLATE NOCASE, item_id", "items"
+            total = self._connection.execute(f"SELECT COUNT(*) FROM {source} WHERE {where}", params).fetchone()[0]
+            rows = self._connection.execute(
+                f"SELECT items.item_id, items.document FROM {source} WHERE {where} ORDER BY {order} LIMIT ? OFFSET ?",
+                params + [limit, offset]
+            ).fetchall()
+        return {
+            "items": [(item_id, json.loads(document)) for item_id, document in rows],
+            "total": total
+        }
+
+    def get(self, kind: str, item_id: str, household: str = DEFAULT_HOUSEHOLD) -> Optional[Dict[str, any]]:
+        """Get one document (straight from its repository)."""
+        return self.repository(kind, household).get(item_id)
+
+    def put(self, kind: str, item_id: str, document: Dict[str, any],
+            household: str = DEFAULT_HOUSEHOLD) -> bool:
+        """Add or replace a document in a household (the index catches up on the next query)."""
+        return self.repository(kind, household).put(item_id, document)
+
+    def delete(self, kind: str, item_id: str, household: str = DEFAULT_HOUSEHOLD) -> bool:
+        """Remove a document from a household."""
+        return self.repository(kind, household).delete(item_id)
+
+    def version(self, kind: str, household: str = DEFAULT_HOUSEHOLD) -> Tuple[int, str]:
+        """Get (version, ETag) of a household's documents of one kind."""
+        repository = self.repository(kind, household)
+        etag = repository.etag()
+        return repository.version, etag
+
+
+_library: Optional[ContentLibrary] = None
+_library_lock = threading.Lock()
+
+
+def get_content_library() -> ContentLibrary:
+    """Get or create the global content library."""
+    global _library
+
+    if _library is None:
+        with _library_lock:
+            if _library is None:
+                _library = ContentLibrary()
+    return _library
@@ -0,0 +1,111 @@
+"""
+Laundry cycle type storage in a local JSON file (data/cycle_types.json).
+Reads are served from an in-memory cache of the parsed file (see json_repository).
+"""
+
+import os
+from typing import Dict, Optional, Tuple
+
+from utils.json_repository import JsonDocumentRepository
+
+# Get project root directory
+_script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(_script_dir)
+CYCLE_TYPES_FILE = os.path.join(project_root, 'data', 'cycle_types.json')
+
+
+def _default_cycle_types() -> Dict[str, Dict[str, any]]:
+    """Cycle types written to a new cycle_types.json."""
+    return {
+        "heavily_soiled": {
+            "name": "Heavily Soiled",
+            "description": "Very dirty clothes requiring extra cleaning",
+            "expected_minutes": 60,
+            "detergent_amount": "High",
+            "temperature": "Hot",
+            "soil_level": "Heavy"
+        },
+        "normal": {
+            "name": "Normal",
+            "description": "Standard everyday laundry",
+            "expected_minutes": 45,
+            "detergent_amount": "Medium",
+            "temperature": "Warm",
+            "soil_level": "Normal"
+        },
+        "lightly_soiled": {
+            "name": "Lightly Soiled",
+            "description": "Minimally dirty clothes requiring gentle cleaning",
+            "expected_minutes": 35,
+            "detergent_amount": "Low",
+            "temperature": "Cold",
+            "soil_level": "Light"
+        },
+        "delicates": {
+            "name": "Delicates",
+            "description": "Delicate fabrics requiring gentle care",
+            "expected_minutes": 30,
+            "detergent_amount": "Low",
+            "temperature": "Cold",
+            "soil_level": "Light"
+        },
+        "sanitize": {
+            "name": "Sanitize",
+            "description": "Deep cleaning for germ removal",
+            "expected_minutes": 65,
+            "detergent_amount": "High",
+            "temperature": "Hot",
+            "soil_level": "Heavy"
+        },
+        "quick_wash": {
+            "name": "Quick Wash",
+            "description": "Fast cycle for lightly soiled items",
+            "expected_minutes": 25,
+            "detergent_amount": "Low",
+            "temperature": "Cold",
+            "soil_level": "Light"
+        }
+    }
+
+
+# Parsed cycle_types.json, reloaded only when the file changes on disk
+_repository = JsonDocumentRepository(CYCLE_TYPES_FILE, default_factory=_default_cycle_types, label="cycle types")
+
+
+def get_repository() -> JsonDocumentRepository:
+    """Get the repository holding the default household's cycle types."""
+    return _repository
+
+
+def get_all_cycle_types() -> Dict[str, Dict[str, any]]:
+    """
+    Get all cycle types.
+    
+    Returns:
+        Dictionary of cycle types (cycle_id -> cycle type data)
+    """
+    return _repository.all()
+
+
+def get_cycle_type(cycle_id: str) -> Optional[Dict[str, any]]:
+    """
+    Get a specific cycle type by ID.
+    
+    Args:
+        cycle_id: Unique identifier for the cycle type
+        
+    Returns:
+        Cycle type data if found, None otherwise
+    """
+    return _repository.get(cycle_id)
+
+
+def get_cycle_types_version() -> Tuple[int, str]:
+    """
+    Get the version of the stored cycle types, for conditional requests.
+    
+    Returns:
+        Tuple of (version counter, ETag string)
+    """
+    etag = _repository.etag()  # Refreshes the cache first, so the version is current
+    return _repository.version, etag
@@ -14,7 +14,7 @@ import os
 from datetime import datetime, timedelta, date
 from typing import List, Dict, Optional
 
-from utils.event_logger import get_recent_events
+from utils.event_logger import get_events_between
 
 
 def get_events_last_24_hours(room: Optional[str] = None) -> List[Dict]:
@@ -29,15 +29,8 @@ def get_events_last_24_hours(room: Optional[str] = None) -> List[Dict]:
     """
     cutoff_time = time.time() - (24 * 60 * 60)  # 24 hours ago
     
-    events = get_recent_events(room=room, limit=1000)  # Get more events to filter
-    
-    # Filter to last 24 hours
-    recent_events = [e for e in events if e["timestamp"] >= cutoff_time]
-    
-    # Sort by timestamp (oldest first for chronological order)
-    recent_events.sort(key=lambda x: x["timestamp"])
-    
-    return recent_events
+    # Indexed range query, already oldest first for chronological order
+    return get_events_between(since=cutoff_time, room=room)
 
 
 def events_to_csv(events: List[Dict]) -> str:
@@ -0,0 +1,275 @@
+"""
+Table-driven warning detector engine.
+Warnings are declared as rule dictionaries (sensor field, threshold ladder,
+hysteresis band, debounce window and actions) and compiled once per room.
+Each rule keeps its own small state machine, so adding a room or a threshold
+means adding a table entry instead of another copy of the transition logic.
+
+Rule definition:
+    {
+        "name": "heat",                  # Detector name (used in timing reports)
+        "field": "thermal_center",       # Snapshot channel or derived field
+        "direction": "above",            # "above" (value > threshold) or "below" (value < threshold)
+        "inclusive": False,              # True: a reading equal to the threshold also counts (>= / <=)
+        "hysteresis": 0,                 # Band the value must clear before a level is left
+        "debounce_s": 0,                 # Seconds a level must hold before it is entered
+        "led": "heat",                   # Key into the engine's LED outputs (on while any rule using it is active)
+        "value_key": "temperature_c",    # Metadata key for the reading
+        "threshold_key": "threshold_c",  # Metadata key for the level's threshold
+        "metadata": {"temp_type": "stove"},
+        "levels": [                      # Ordered from least to most severe
+            {
+                "threshold": 25,
+                "say": ("heat_warning_warming", "The stove is getting too hot, turn it off"),
+                "priority": "warning",
+                "event_type": "heat_warning",
+                "severity": "warning",
+                "message": "Warning: Stove temperature rising ({value:.1f}°C)"
+            },
+            ...
+        ]
+    }
+
+A rule with several levels is a ladder: the announcement and event for a level
+fire only when the rule escalates past the highest level reached since it was
+last clear, and the LED turns off only when the rule returns to clear.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class CompiledLevel:
+    """One rung of a rule's threshold ladder."""
+
+    __slots__ = ("threshold", "exit_threshold", "say", "priority", "event_type",
+                 "severity", "message")
+
+    def __init__(self, definition: Dict[str, Any], direction: str, hysteresis: float):
+        self.threshold = definition["threshold"]
+        # Value the reading must cross back over before this level is left
+        if direction == "above":
+            self.exit_threshold = self.threshold - hysteresis
+        else:
+            self.exit_threshold = self.threshold + hysteresis
+        self.say = definition.get("say")
+        self.priority = definition.get("priority", "warning")
+        self.event_type = definition.get("event_type")
+        self.severity = definition.get("severity", "warning")
+        self.message = definition.get("message")
+
+
+class CompiledRule:
+    """A rule definition with its levels sorted and its comparisons fixed."""
+
+    __slots__ = ("name", "field", "above", "inclusive", "debounce_s", "led", "value_key",
+                 "threshold_key", "metadata", "levels")
+
+    def __init__(self, definition: Dict[str, Any]):
+        direction = definition.get("direction", "above")
+        if direction not in ("above", "below"):
+            raise ValueError(f"Rule {definition.get('name')}: direction must be 'above' or 'below'")
+        if not definition.get("levels"):
+            raise ValueError(f"Rule {definition.get('name')}: at least one level is required")
+        hysteresis = definition.get("hysteresis", 0)
+
+        self.name = definition["name"]
+        self.field = definition["field"]
+        self.above = direction == "above"
+        self.inclusive = bool(definition.get("inclusive", False))
+        self.debounce_s = definition.get("debounce_s", 0)
+        self.led = definition.get("led")
+        self.value_key = definition.get("value_key", "value")
+        self.threshold_key = definition.get("threshold_key", "threshold")
+        self.metadata = dict(definition.get("metadata", {}))
+        # Least severe first: "above" ladders climb, "below" ladders descend
+        levels = sorted(definition["levels"], key=lambda level: level["threshold"],
+                        reverse=not self.above)
+        self.levels = tuple(CompiledLevel(level, direction, hysteresis) for level in levels)
+
+    def level_for(self, value: float, current: int) -> int:
+        """
+        Get the ladder level for a reading (0 = clear, 1 = first level, ...).
+
+        Levels at or below the current one are held until the reading clears
+        their exit threshold, which gives the hysteresis band.
+        """
+        level = 0
+        for index, compiled in enumerate(self.levels, start=1):
+            threshold = compiled.exit_threshold if index <= current else compiled.threshold
+            if value == threshold:
+                reached = self.inclusive
+            else:
+                reached = (value > threshold) if self.above else (value < threshold)
+            if not reached:
+                break
+            level = index
+        return level
+
+
+class RuleState:
+    """Per-rule transition state."""
+
+    __slots__ = ("level", "peak", "pending_level", "pending_since")
+
+    def __init__(self):
+        self.level = 0  # Level currently active (0 = clear)
+        self.peak = 0  # Highest level announced since the rule was last clear
+        self.pending_level = 0  # Level waiting out the debounce window
+        self.pending_since = None
+
+
+def compile_rules(definitions: List[Dict[str, Any]]) -> List[CompiledRule]:
+    """
+    Compile rule definitions (validates them and precomputes level thresholds).
+
+    Args:
+        definitions: Rule definition dictionaries
+
+    Returns:
+        List of CompiledRule objects in definition order
+    """
+    return [CompiledRule(definition) for definition in definitions]
+
+
+class DetectorEngine:
+    """
+    Evaluates a room's compiled rule table against sensor snapshots.
+
+    Derived fields (e.g. the thermal center average) are computed at most once
+    per snapshot and shared by every rule that reads them, so a tick costs one
+    comparison walk per rule.
+    """
+
+    def __init__(self, rules: List[Dict[str, Any]], room: str,
+                 leds: Optional[Dict[str, Callable[[int], None]]] = None,
+                 derived: Optional[Dict[str, Callable[[Any], Any]]] = None,
+                 announce: Optional[Callable[[str, str, str], None]] = None,
+                 log: Optional[Callable[..., None]] = None):
+        """
+        Initialize the engine.
+
+        Args:
+            rules: Rule definitions for the room (see module docstring)
+            room: Room name recorded on logged events
+            leds: LED name -> output callable taking 1 (on) or 0 (off)
+            derived: Derived field name -> function computing it from a snapshot
+            announce: Called with (dialogue_key, default_text, priority) when a level is announced
+            log: Called with log_event keyword arguments when a level is announced
+        """
+        self.rules = compile_rules(rules)
+        self.room = room
+        self.leds = leds or {}
+        self.derived = derived or {}
+        self.announce = announce
+        self.log = log
+        self.states: Dict[str, RuleState] = {rule.name: RuleState() for rule in self.rules}
+        # LED name -> rules currently holding it on (several rules may share one LED)
+        self._led_holders: Dict[str, set] = {rule.led: set() for rule in self.rules if rule.led}
+        missing = [rule.led for rule in self.rules if rule.led and rule.led not in self.leds]
+        if missing:
+            raise ValueError(f"No LED output configured for: {', '.join(missing)}")
+        self._field_seq = None
+        self._field_cache: Dict[str, Any] = {}
+
+    def _field(self, snapshot, name: str):
+        if snapshot.seq != self._field_seq:
+            self._field_seq = snapshot.seq
+            self._field_cache = {}
+        if name in self._field_cache:
+            return self._field_cache[name]
+        compute = self.derived.get(name)
+        if compute is None:
+            value = snapshot.get(name)
+        else:
+            try:
+                value = compute(snapshot)
+            except (TypeError, IndexError, ValueError):
+                value = None
+        self._field_cache[name] = value
+        return value
+
+    def evaluate(self, snapshot):
+        """Evaluate every rule against the snapshot."""
+        for rule in self.rules:
+            self.evaluate_rule(rule, snapshot)
+
+    def detectors(self) -> List[Tuple[str, Callable[[Any], None]]]:
+        """Get one (name, callback) pair per rule, for a DetectorPipeline."""
+        return [(rule.name, lambda snapshot, rule=rule: self.evaluate_rule(rule, snapshot))
+                for rule in self.rules]
+
+    def evaluate_rule(self, rule: CompiledRule, snapshot):
+        """Evaluate a single rule against the snapshot and run its actions."""
+        value = self._field(snapshot, rule.field)
+        if value is None:
+            return  # Sensor not readable in this snapshot
+        state = self.states[rule.name]
+        level = rule.level_for(value, state.level)
+
+        # Escalations must hold for the debounce window; de-escalations apply at once
+        if level > state.level and rule.debounce_s:
+            if level != state.pending_level:
+                state.pending_level = level
+                state.pending_since = snapshot.timestamp
+            if snapshot.timestamp - state.pending_since < rule.debounce_s:
+                return
+        state.pending_level = 0
+        state.pending_since = None
+
+        if level == state.level:
+            return
+        previous = state.level
+        state.level = level
+
+        if level == 0:
+            # Rule is clear again: release its LED and re-arm announcements
+            state.peak = 0
+            if rule.led:
+                self._release_led(rule)
+            return
+        if previous == 0 and rule.led:
+            self._hold_led(rule)
+        if level > state.peak:
+            state.peak = level
+            self._fire(rule, rule.levels[level - 1], value)
+
+    def _hold_led(self, rule: CompiledRule):
+        holders = self._led_holders[rule.led]
+        if not holders:
+            self.leds[rule.led](1)
+        holders.add(rule.name)
+
+    def _release_led(self, rule: CompiledRule):
+        holders = self._led_holders[rule.led]
+        holders.discard(rule.name)
+        if not holders:
+            self.leds[rule.led](0)
+
+    def _fire(self, rule: CompiledRule, level: CompiledLevel, value: float):
+        if level.say and self.announce:
+            dialogue_key, default_text = level.say
+            self.announce(dialogue_key, default_text, level.priority)
+        if level.event_type and self.log:
+            metadata = {rule.value_key: value, rule.threshold_key: level.threshold}
+            metadata.update(rule.metadata)
+            print(f"[DEBUG] Logging {level.event_type} event: {rule.field}={value}")
+            self.log(
+                event_type=level.event_type,
+                message=level.message.format(value=value) if level.message else level.event_type,
+                room=self.room,
+                severity=level.severity,
+                metadata=metadata
+            )
+
+    def active_levels(self) -> Dict[str, int]:
+        """Get the active level of every rule (0 = clear)."""
+        return {name: state.level for name, state in self.states.items()}
+
+    def reset(self):
+        """Clear every rule's state (LEDs are left as they are)."""
+        for name in self.states:
+            self.states[name] = RuleState()
+        for holders in self._led_holders.values():
+            holders.clear()
+        self._field_seq = None
+        self._field_cache = {}
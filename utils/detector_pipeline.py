@@ -0,0 +1,197 @@
+"""
+Per-tick warning detector pipeline.
+Every detector for a room is evaluated against the same sensor snapshot on
+every tick, with per-detector timing and a latency budget for the whole tick.
+Slow side effects (event POSTs, LED writes) are handed to an AsyncSink so a
+detector never blocks the next one.
+"""
+
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+DEFAULT_TICK_BUDGET_MS = 20.0  # Target time to evaluate every detector once
+DEFAULT_SINK_CAPACITY = 64  # Side effects waiting to run before new ones are dropped
+
+
+class AsyncSink:
+    """
+    Background worker that runs side-effect callables in submission order.
+
+    submit() never blocks: if the worker falls behind and the queue is full,
+    the new side effect is dropped and counted rather than stalling the
+    sensor loop.
+    """
+
+    def __init__(self, name: str, capacity: int = DEFAULT_SINK_CAPACITY):
+        """
+        Initialize the sink and start its worker thread.
+
+        Args:
+            name: Thread name (shown in debug output)
+            capacity: Maximum number of pending side effects
+        """
+        self.name = name
+        self._queue: "queue.Queue[Tuple[Callable, tuple, dict]]" = queue.Queue(maxsize=capacity)
+        self.stats = {
+            "submitted": 0,
+            "completed": 0,
+            "dropped": 0,
+            "errors": 0
+        }
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, fn: Callable, *args, **kwargs) -> bool:
+        """
+        Queue fn(*args, **kwargs) to run on the worker thread.
+
+        Returns:
+            True if queued, False if dropped because the sink is full
+        """
+        try:
+            self._queue.put_nowait((fn, args, kwargs))
+        except queue.Full:
+            self.stats["dropped"] += 1
+            return False
+        self.stats["submitted"] += 1
+        return True
+
+    def pending(self) -> int:
+        """Number of side effects waiting to run."""
+        return self._queue.qsize()
+
+    def _run(self):
+        while True:
+            fn, args, kwargs = self._queue.get()
+            try:
+                fn(*args, **kwargs)
+                self.stats["completed"] += 1
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"[DEBUG] {self.name} side effect failed: {e}")
+            finally:
+                self._queue.task_done()
+
+
+class DetectorPipeline:
+    """
+    Runs a fixed list of detectors against one snapshot per tick.
+
+    Detectors are called in order and an exception in one never stops the
+    others. Evaluation time is tracked per detector so a slow detector shows
+    up in the report instead of silently delaying every other warning.
+    """
+
+    def __init__(self, detectors: List[Tuple[str, Callable[[Any], None]]],
+                 budget_ms: float = DEFAULT_TICK_BUDGET_MS):
+        """
+        Initialize the pipeline.
+
+        Args:
+            detectors: (name, callback) pairs; callback receives the SensorSnapshot
+            budget_ms: Latency budget for one tick (all detectors)
+        """
+        self.detectors = list(detectors)
+        self.budget_ms = budget_ms
+        self.ticks = 0
+        self.over_budget = 0
+        self.last_tick_ms = 0.0
+        self.max_tick_ms = 0.0
+        self._timings: Dict[str, Dict[str, float]] = {
+            name: {"calls": 0, "total_ms": 0.0, "max_ms": 0.0, "last_ms": 0.0, "errors": 0}
+            for name, _detector in self.detectors
+        }
+
+    def __call__(self, snapshot):
+        """Evaluate every detector against the snapshot (usable as a snapshot consumer)."""
+        self.run(snapshot)
+
+    def run(self, snapshot) -> float:
+        """
+        Evaluate every detector against the snapshot.
+
+        Args:
+            snapshot: SensorSnapshot to evaluate
+
+        Returns:
+            Time taken for the whole tick in milliseconds
+        """
+        tick_start = time.perf_counter()
+        for name, detector in self.detectors:
+            start = time.perf_counter()
+            try:
+                detector(snapshot)
+            except Exception as e:
+                self._timings[name]["errors"] += 1
+                print(f"[DEBUG] Detector {name} failed: {e}")
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            timing = self._timings[name]
+            timing["calls"] += 1
+            timing["total_ms"] += elapsed_ms
+            timing["last_ms"] = elapsed_ms
+            if elapsed_ms > timing["max_ms"]:
+                timing["max_ms"] = elapsed_ms
+
+        tick_ms = (time.perf_counter() - tick_start) * 1000
+        self.ticks += 1
+        self.last_tick_ms = tick_ms
+        if tick_ms > self.max_tick_ms:
+            self.max_tick_ms = tick_ms
+        if tick_ms > self.budget_ms:
+            self.over_budget += 1
+            slowest = max(self.detectors, key=lambda d: self._timings[d[0]]["last_ms"])[0]
+            print(f"[DEBUG] Detector tick took {tick_ms:.1f}ms (budget {self.budget_ms:.0f}ms), slowest: {slowest}")
+        return tick_ms
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Get per-detector evaluation times.
+
+        Returns:
+            Dictionary with tick counts and mean/max/last milliseconds per detector
+        """
+        detectors = {}
+        for name, timing in self._timings.items():
+            calls = timing["calls"]
+            detectors[name] = {
+                "calls": calls,
+                "mean_ms": round(timing["total_ms"] / calls, 3) if calls else 0.0,
+                "max_ms": round(timing["max_ms"], 3),
+                "last_ms": round(timing["last_ms"], 3),
+                "errors": timing["errors"]
+            }
+        return {
+            "ticks": self.ticks,
+            "budget_ms": self.budget_ms,
+            "over_budget": self.over_budget,
+            "last_tick_ms": round(self.last_tick_ms, 3),
+            "max_tick_ms": round(self.max_tick_ms, 3),
+            "detectors": detectors
+        }
+
+    def print_report(self):
+        """Print the per-detector timing report."""
+        report = self.report()
+        print(f"[DETECTORS] {report['ticks']} ticks, max {report['max_tick_ms']:.2f}ms, "
+              f"{report['over_budget']} over the {report['budget_ms']:.0f}ms budget")
+        for name, timing in report["detectors"].items():
+            print(f"[DETECTORS]   {name}: mean {timing['mean_ms']:.3f}ms, max {timing['max_ms']:.3f}ms"
+                  f"{', ' + str(timing['errors']) + ' errors' if timing['errors'] else ''}")
+
+
+# Global side-effect sink instance (initialized when needed)
+_side_effect_sink: Optional[AsyncSink] = None
+_side_effect_lock = threading.Lock()
+
+
+def get_side_effect_sink() -> AsyncSink:
+    """Get or create the global side-effect sink used by the warning detectors."""
+    global _side_effect_sink
+
+    if _side_effect_sink is None:
+        with _side_effect_lock:
+            if _side_effect_sink is None:
+                _side_effect_sink = AsyncSink("detector-side-effects")
+    return _side_effect_sink
@@ -31,6 +31,14 @@ DIALOGUES = {
         "The stove surface is too hot to touch safely",
     ],
     
+    "stove_hotspot_warning": [
+        "One of the burners is very hot, please be careful",
+        "A burner on the stove is very hot right now",
+        "Careful, one of the burners is on and very hot",
+        "There's a hot burner on the stove, please don't touch it",
+        "One part of the stove is dangerously hot",
+    ],
+    
     "heat_warning_warming": [
         "The stove is getting too hot, turn it off",
         "The stove is heating up too much, please turn it off",
@@ -257,6 +265,34 @@ DIALOGUES = {
 }
 
 
+# Fixed guidance announcements spoken by the hardware loop (main.py).
+# Kept here so the TTS prerender pipeline renders exactly the text that is spoken.
+GUIDANCE_MESSAGES = {
+    "step": "Step {number}: {text}",
+    "recipe_start": "Starting recipe: {name}",
+    "recipe_complete": "Recipe complete! Great job making {name}.",
+    "routine_start": "Starting routine: {name}",
+    "routine_complete": "Routine complete! Great job completing {name}.",
+    "laundry_start": "Starting laundry routine: {name}",
+    "laundry_steps_complete": "All steps complete! The cycle will run for approximately {minutes} minutes. I'll let you know when it's done.",
+    "laundry_load_done": "Your laundry load is done!",
+}
+
+
+def get_guidance_message(message_type: str, **kwargs) -> str:
+    """
+    Get a fixed guidance announcement.
+    
+    Args:
+        message_type: Key in GUIDANCE_MESSAGES (e.g., "step", "recipe_start")
+        **kwargs: Format string arguments (e.g., number=1, text="Crack eggs into a bowl")
+    
+    Returns:
+        The formatted announcement
+    """
+    return GUIDANCE_MESSAGES[message_type].format(**kwargs)
+
+
 def get_dialogue(message_type: str, default_text: str = None, **kwargs) -> str:
     """
     Get a random dialogue variation for a given message type.
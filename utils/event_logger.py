@@ -1,22 +1,361 @@
 """
 Event logging system for tracking kitchen activity monitor events.
-Stores events in memory and provides API for querying recent events.
-Can also send events to API server via HTTP if API_URL is set.
+Stores events in an indexed SQLite store (see event_store) and provides an API
+for querying recent events. The newest events are also kept in append-ordered
+per-room indexes in memory, so the polled "latest N" queries skip the database.
+The API server (EVENT_SINK=local) persists events under data/; other processes
+(EVENT_SINK=remote, the default) keep a small private in-memory store (the
+newest REMOTE_STORE_MAX_EVENTS events) and forward events to the API server
+over HTTP from a background thread.
+
+Every stored event is also published to in-process subscribers (see
+subscribe_events), which back the API server's live event stream.
+
+Event ids are monotonic per process, so they double as sync cursors. Forwarded
+events carry their origin process and original id, and the API server stores
+each (origin, origin_id) pair once however often it is delivered.
 """
 
-import time
+import atexit
+import json
 import os
-from typing import List, Dict, Optional
-from collections import deque
+import socket
+import threading
+import time
+import urllib.error
+import urllib.request
+from typing import List, Dict, Optional, Tuple
+from collections import OrderedDict, deque
+from itertools import islice
 from threading import Lock
 
-# Global event storage (in-memory, can be replaced with database later)
-_events: deque = deque(maxlen=100)  # Keep last 100 events
-_event_lock = Lock()
+from utils.event_store import EventStore, EVENT_DB_PATH
+from utils.pubsub import Broker, Subscription
+
+# Global event store (created on first use, see get_event_store)
+_store: Optional[EventStore] = None
+_store_lock = Lock()
+
+# Hot cache of the newest events, in arrival order (global and per lowercased room)
+HOT_CACHE_SIZE = 500  # Events kept per index
+_recent_all: deque = deque(maxlen=HOT_CACHE_SIZE)
+_recent_by_room: Dict[str, deque] = {}
+_recent_lock = Lock()
+_cache_covers_history = True  # False once the store held more events than the cache at startup
+
+# Fan-out of newly stored events to live stream subscribers
+_event_broker = Broker()
+
+# Event ids: max(last id + 1, current time in ms), assigned under _recent_lock
+_last_event_id = 0
+
+# Identifies this process on forwarded events (for dedup on the API server)
+EVENT_ORIGIN = os.getenv('EVENT_ORIGIN', f"{socket.gethostname()}:{os.getpid()}")
+SEEN_ORIGINS_SIZE = 10000  # Recently ingested (origin, origin_id) pairs checked before the database
+_seen_origins: "OrderedDict[Tuple[str, int], int]" = OrderedDict()
 
 # API server URL (set via environment variable or default)
 API_URL = os.getenv('EVENT_API_URL', 'http://localhost:5001/api/events/internal')
 
+# Where logged events go: "local" stores them in this process only (the API server),
+# "remote" also forwards them to the API server in the background (hardware/room processes)
+EVENT_SINKS = ("local", "remote")
+EVENT_SINK = os.getenv('EVENT_SINK', 'remote')
+# Events kept by a remote-sink process's in-memory store (the API server keeps the history)
+REMOTE_STORE_MAX_EVENTS = int(os.getenv('REMOTE_STORE_MAX_EVENTS', str(2 * HOT_CACHE_SIZE)))
+
+# Background forwarding settings
+FORWARD_BATCH_SIZE = 50  # Events sent per forwarding round
+FORWARD_SPILL_LIMIT = 1000  # Unsent events kept while the API server is unreachable (oldest dropped first)
+FORWARD_TIMEOUT_SECONDS = 2.0
+FORWARD_RETRY_INITIAL_SECONDS = 0.5
+FORWARD_RETRY_MAX_SECONDS = 30.0
+
+_forwarder = None
+_forwarder_lock = Lock()
+
+
+class EventForwarder:
+    """
+    Background thread that forwards logged events to the API server.
+
+    log_event() only appends to a bounded spill queue; this thread drains it
+    in batches, one POST per batch to the batch endpoint (or one POST per event
+    if the server has no batch endpoint). If the server is unreachable, unsent
+    events stay queued and delivery is retried with exponential backoff. If the
+    outage outlasts the spill queue, the oldest events are dropped (and counted)
+    first. Retries are safe: the server deduplicates by origin id.
+    """
+
+    def __init__(self, api_url: Optional[str] = None, batch_size: int = FORWARD_BATCH_SIZE,
+                 spill_limit: int = FORWARD_SPILL_LIMIT):
+        """
+        Initialize the forwarder and start its thread.
+
+        Args:
+            api_url: Endpoint that accepts one event per POST (default: API_URL);
+                     batches go to its /batch sub-path
+            batch_size: Maximum events sent per round
+            spill_limit: Maximum unsent events kept in memory
+        """
+        self.api_url = api_url or API_URL
+        self.batch_url = f"{self.api_url.rstrip('/')}/batch"
+        self.batch_size = batch_size
+        self._batch_supported = True  # Cleared if the server answers 404 (older API server)
+        self._pending: deque = deque(maxlen=spill_limit)
+        self._condition = threading.Condition()
+        self.stats = {
+            "enqueued": 0,
+            "sent": 0,
+            "dropped": 0,
+            "rejected": 0,
+            "failures": 0
+        }
+        self._thread = threading.Thread(target=self._run, name="event-forwarder", daemon=True)
+        self._thread.start()
+
+    def enqueue(self, event: Dict):
+        """Queue an event for forwarding (never blocks on the network)."""
+        with self._condition:
+            if len(self._pending) == self._pending.maxlen:
+                self.stats["dropped"] += 1  # deque drops the oldest event
+            self._pending.append(event)
+            self.stats["enqueued"] += 1
+            self._condition.notify()
+
+    def pending(self) -> int:
+        """Number of events waiting to be forwarded."""
+        with self._condition:
+            return len(self._pending)
+
+    def flush(self, timeout: float = 2.0) -> bool:
+        """
+        Wait until every queued event has been forwarded.
+
+        Returns:
+            True if the queue drained within timeout
+        """
+        deadline = time.time() + timeout
+        with self._condition:
+            while self._pending:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                self._condition.wait(min(remaining, 0.05))
+        return True
+
+    def _post(self, url: str, payload) -> bytes:
+        request = urllib.request.Request(
+            url,
+            data=json.dumps(payload).encode('utf-8'),
+            headers={'Content-Type': 'application/json'},
+            method='POST'
+        )
+        with urllib.request.urlopen(request, timeout=FORWARD_TIMEOUT_SECONDS) as response:
+            return response.read()
+
+    def _send_batch(self, batch: List[Dict]) -> int:
+        """
+        POST a batch to the batch endpoint.
+
+        Returns:
+            Number of events in the batch that were delivered or rejected (len(batch)),
+            or 0 if the server has no batch endpoint
+        """
+        try:
+            body = self._post(self.batch_url, batch)
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                print(f"[EVENT] API server has no batch endpoint, forwarding events one at a time")
+                self._batch_supported = False
+                return 0
+            if e.code >= 500:
+                raise
+            # Rejected as a whole - retrying would never succeed
+            self.stats["rejected"] += len(batch)
+            print(f"[EVENT] API server rejected a batch of {len(batch)} events: HTTP {e.code}")
+            return len(batch)
+        results = json.loads(body).get("results", [])
+        rejected = [result for result in results if result.get("status") == "error"]
+        if rejected:
+            self.stats["rejected"] += len(rejected)
+            print(f"[EVENT] API server rejected {len(rejected)} events: {rejected[0].get('error')}")
+        return len(batch)
+
+    def _send_each(self, batch: List[Dict]) -> int:
+        """POST events one at a time; returns how many were delivered or rejected before a failure."""
+        sent = 0
+        for event in batch:
+            try:
+                self._post(self.api_url, event)
+            except urllib.error.HTTPError as e:
+                if e.code >= 500:
+                    raise
+                # Rejected by the server - retrying would never succeed
+                self.stats["rejected"] += 1
+                print(f"[EVENT] API server rejected event {event.get('event_type')}: HTTP {e.code}")
+            sent += 1
+        return sent
+
+    def _run(self):
+        delay = FORWARD_RETRY_INITIAL_SECONDS
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+                batch = [self._pending[i] for i in range(min(self.batch_size, len(self._pending)))]
+
+            sent = 0
+            try:
+                if self._batch_supported:
+                    sent = self._send_batch(batch)
+                if not self._batch_supported:
+                    sent = self._send_each(batch)
+            except (urllib.error.URLError, OSError, ValueError) as e:
+                self.stats["failures"] += 1
+                if delay == FORWARD_RETRY_INITIAL_SECONDS:
+                    print(f"[EVENT] API server unreachable, will retry: {e}")
+
+            with self._condition:
+                # Remove what was delivered or rejected (unless newer events already pushed it out of the spill queue)
+                for event in batch[:sent]:
+                    if self._pending and self._pending[0] is event:
+                        self._pending.popleft()
+                self.stats["sent"] += sent
+                self._condition.notify_all()
+
+            if sent < len(batch):
+                time.sleep(delay)
+                delay = min(delay * 2, FORWARD_RETRY_MAX_SECONDS)
+            else:
+                if delay != FORWARD_RETRY_INITIAL_SECONDS:
+                    print(f"[EVENT] Reconnected to API server")
+                delay = FORWARD_RETRY_INITIAL_SECONDS
+
+
+def configure_event_sink(sink: str):
+    """
+    Choose where logged events go.
+
+    Args:
+        sink: "local" (store in this process only, e.g. in the API server) or
+              "remote" (store locally and forward to the API server in the background)
+    """
+    global EVENT_SINK
+    if sink not in EVENT_SINKS:
+        raise ValueError(f"Unknown event sink '{sink}'. Must be one of: {', '.join(EVENT_SINKS)}")
+    EVENT_SINK = sink
+
+
+def get_forwarder() -> EventForwarder:
+    """Get or create the global event forwarder."""
+    global _forwarder
+
+    if _forwarder is None:
+        with _forwarder_lock:
+            if _forwarder is None:
+                _forwarder = EventForwarder()
+                atexit.register(_forwarder.flush)
+    return _forwarder
+
+
+def get_event_store() -> EventStore:
+    """
+    Get or create the global event store.
+
+    Only the local sink (the API server) persists to EVENT_DB_PATH; remote-sink
+    processes forward their events there, so they use an in-memory store capped
+    at REMOTE_STORE_MAX_EVENTS.
+    """
+    global _store
+
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if EVENT_SINK == "local":
+                    store = EventStore(EVENT_DB_PATH)
+                else:
+                    store = EventStore(":memory:", max_events=REMOTE_STORE_MAX_EVENTS)
+                _warm_cache(store)
+                atexit.register(store.flush)
+                _store = store
+    return _store
+
+
+def _warm_cache(store: EventStore):
+    """Load the newest stored events into the hot cache and resume the id sequence."""
+    global _cache_covers_history, _last_event_id
+
+    newest = store.query(limit=HOT_CACHE_SIZE)
+    max_id = store.max_id()
+    with _recent_lock:
+        _cache_covers_history = len(newest) < HOT_CACHE_SIZE
+        _last_event_id = max(_last_event_id, max_id)
+        for event in reversed(newest):
+            _cache_event_locked(event)
+
+
+def _cache_event_locked(event: Dict):
+    _recent_all.append(event)
+    key = event["room"].lower()
+    room_events = _recent_by_room.get(key)
+    if room_events is None:
+        room_events = _recent_by_room[key] = deque(maxlen=HOT_CACHE_SIZE)
+    room_events.append(event)
+
+
+def _cached_recent(room: Optional[str], limit: Optional[int], since_id: Optional[int]) -> Optional[List[Dict]]:
+    """
+    Serve a recent-events query from the hot cache.
+
+    Returns:
+        Events newest first, or None if the cache cannot prove it holds every match
+    """
+    with _recent_lock:
+        events = _recent_all if not room else _recent_by_room.get(room.lower())
+        # An index that never evicted holds the room's whole history if the store did at startup
+        complete = _cache_covers_history and (events is None or len(events) < HOT_CACHE_SIZE)
+        if events is None:
+            return [] if complete else None
+        if since_id is None:
+            if len(events) < limit and not complete:
+                return None
+            return list(islice(reversed(events), limit))
+        if not complete and (not events or events[0]["id"] > since_id):
+            return None
+        result = []
+        for event in reversed(events):
+            if event["id"] <= since_id or (limit is not None and len(result) >= limit):
+                break
+            result.append(event)
+        return result
+
+
+def _next_event_id_locked() -> int:
+    global _last_event_id
+    _last_event_id = max(_last_event_id + 1, int(time.time() * 1000))
+    return _last_event_id
+
+
+def _record(event: Dict):
+    """Assign the event its id, then store and cache it (in id order)."""
+    store = get_event_store()
+    with _recent_lock:
+        event["id"] = _next_event_id_locked()
+        store.append(event)
+        _cache_event_locked(event)
+    _event_broker.publish(event)
+
+
+def subscribe_events() -> Subscription:
+    """
+    Subscribe to events as they are stored (logged here or ingested from other processes).
+    
+    Returns:
+        Subscription whose get() yields event dictionaries; close it when done
+    """
+    return _event_broker.subscribe()
+
 
 def log_event(event_type: str, message: str, room: str = "kitchen", severity: str = "info", metadata: Optional[Dict] = None):
     """
@@ -30,7 +369,7 @@ def log_event(event_type: str, message: str, room: str = "kitchen", severity: st
         metadata: Optional additional data (e.g., temperature, distance, volume)
     """
     event = {
-        "id": int(time.time() * 1000),  # Timestamp in milliseconds as ID
+        "id": None,  # Assigned by _record (monotonic, also used as a sync cursor)
         "timestamp": time.time(),
         "event_type": event_type,
         "message": message,
@@ -39,67 +378,222 @@ def log_event(event_type: str, message: str, room: str = "kitchen", severity: st
         "metadata": metadata or {}
     }
     
-    with _event_lock:
-        _events.append(event)
-        event_count = len(_events)
-    
-    print(f"[EVENT LOGGED] {event_type}: {message} (Total events in memory: {event_count})")
-    
-    # Also send to API server if running in separate process (ifmagic_trial.py)
-    # Only send if this is being called from ifmagic_trial.py (not from API server itself)
-    try:
-        import urllib.request
-        import json
-        import inspect
-        # Check if we're being called from api_server.py to avoid duplicate storage
-        call_stack = [frame.filename for frame in inspect.stack()]
-        if 'api_server.py' not in str(call_stack):
-            req = urllib.request.Request(
-                API_URL,
-                data=json.dumps(event).encode('utf-8'),
-                headers={'Content-Type': 'application/json'},
-                method='POST'
-            )
-            urllib.request.urlopen(req, timeout=0.1)  # Non-blocking, short timeout
-            print(f"[EVENT] Sent to API server: {event_type}")
-    except Exception as e:
-        # Silently fail if API server not available (it's optional)
-        pass
-
-
-def get_recent_events(room: Optional[str] = None, limit: int = 20) -> List[Dict]:
+    _record(event)
+    
+    print(f"[EVENT LOGGED] {event_type}: {message}")
+    
+    # Processes other than the API server forward the event to it in the background
+    if EVENT_SINK == "remote":
+        get_forwarder().enqueue(dict(event, origin=EVENT_ORIGIN, origin_id=event["id"]))
+
+
+def _parse_ingested(data: Dict) -> Tuple[Dict, Optional[Tuple[str, int]]]:
+    """
+    Validate a received event and build the event to store.
+    
+    Returns:
+        Tuple of (event without id, (origin, origin_id) key or None)
+        
+    Raises:
+        TypeError/ValueError: if the event is not a JSON object or origin_id is not an integer
+    """
+    if not isinstance(data, dict):
+        raise TypeError("event must be a JSON object")
+    timestamp = data.get('timestamp')
+    event = {
+        "id": None,
+        "timestamp": float(timestamp) if isinstance(timestamp, (int, float)) else time.time(),
+        "event_type": data.get('event_type', 'unknown'),
+        "message": data.get('message', ''),
+        "room": data.get('room', 'kitchen'),
+        "severity": data.get('severity', 'info'),
+        "metadata": data.get('metadata') or {}
+    }
+    origin = data.get('origin')
+    origin_id = data.get('origin_id')
+    if not origin or origin_id is None:
+        return event, None
+    key = (str(origin), int(origin_id))
+    event["origin"], event["origin_id"] = key
+    return event, key
+
+
+def _accept_ingested_locked(store: EventStore, event: Dict, key: Optional[Tuple[str, int]]) -> Tuple[int, bool]:
+    """
+    Assign an ingested event its id and cache it, unless its origin id was already stored.
+    The caller appends accepted events to the store while still holding _recent_lock.
+    
+    Returns:
+        Tuple of (event id on this server, whether it was a duplicate)
+    """
+    if key is not None:
+        existing = _seen_origins.get(key)
+        if existing is None:
+            existing = store.find_origin(*key)
+        if existing is not None:
+            return existing, True
+    event["id"] = _next_event_id_locked()
+    _cache_event_locked(event)
+    if key is not None:
+        _seen_origins[key] = event["id"]
+        if len(_seen_origins) > SEEN_ORIGINS_SIZE:
+            _seen_origins.popitem(last=False)
+    return event["id"], False
+
+
+def ingest_event(data: Dict) -> Tuple[int, bool]:
+    """
+    Store an event received from another process (e.g. forwarded by its EventForwarder).
+    
+    Events carrying origin/origin_id are stored once: a redelivery (e.g. a retry
+    after a lost response) is recognized and not stored again.
+    
+    Args:
+        data: Event fields (event_type, message, room, severity, metadata,
+              optional timestamp, origin and origin_id)
+        
+    Returns:
+        Tuple of (event id on this server, whether it was a duplicate)
+        
+    Raises:
+        TypeError/ValueError: if the event is not a JSON object or origin_id is not an integer
+    """
+    event, key = _parse_ingested(data)
+    store = get_event_store()
+    with _recent_lock:
+        event_id, duplicate = _accept_ingested_locked(store, event, key)
+        if not duplicate:
+            store.append(event)
+    if duplicate:
+        return event_id, True
+    _event_broker.publish(event)
+    
+    source = f" (from {key[0]})" if key else ""
+    print(f"[EVENT LOGGED] {event['event_type']}: {event['message']}{source}")
+    return event_id, False
+
+
+def ingest_events(items: List) -> List[Dict]:
+    """
+    Store a batch of events received from another process.
+    
+    Every item is validated first; the accepted ones are then committed to the
+    store together in a single transaction. Duplicates (by origin/origin_id)
+    are skipped as in ingest_event, including repeats within the batch.
+    
+    Args:
+        items: Event dictionaries (see ingest_event); invalid items are reported, not raised
+        
+    Returns:
+        One result per item, in order: {"status": "stored" | "duplicate" | "error", "id": ...}
+        (errors carry an "error" message instead of an id)
+    """
+    parsed = []
+    results: List[Dict] = []
+    for item in items:
+        try:
+            parsed.append(_parse_ingested(item))
+            results.append({"status": "stored"})
+        except (TypeError, ValueError) as e:
+            parsed.append(None)
+            results.append({"status": "error", "error": f"Invalid event: {e}"})
+    
+    store = get_event_store()
+    accepted = []
+    with _recent_lock:
+        for entry, result in zip(parsed, results):
+            if entry is None:
+                continue
+            event, key = entry
+            result["id"], duplicate = _accept_ingested_locked(store, event, key)
+            if duplicate:
+                result["status"] = "duplicate"
+            else:
+                accepted.append(event)
+        store.append_many(accepted)
+    for event in accepted:
+        _event_broker.publish(event)
+    
+    errors = sum(1 for result in results if result["status"] == "error")
+    print(f"[EVENT LOGGED] Ingested batch of {len(items)}: {len(accepted)} stored, "
+          f"{len(items) - len(accepted) - errors} duplicates, {errors} rejected")
+    return results
+
+
+def get_recent_events(room: Optional[str] = None, limit: int = 20,
+                      since_id: Optional[int] = None) -> List[Dict]:
     """
     Get recent events from the activity monitor.
     
     Args:
         room: Optional room filter (e.g., "kitchen", "bathroom")
         limit: Maximum number of events to return (default: 20)
+        since_id: Optional cursor - only events with a greater id (the newest id a client has seen)
         
     Returns:
-        List of event dictionaries, sorted by timestamp (newest first)
+        List of event dictionaries, newest first
     """
-    with _event_lock:
-        events = list(_events)
+    store = get_event_store()
+    events = _cached_recent(room, limit, since_id)
+    if events is None:
+        events = store.query(room=room, limit=limit, since_id=since_id)
+    return events
+
+
+def get_events_after(after_id: int, room: Optional[str] = None, limit: Optional[int] = 100) -> List[Dict]:
+    """
+    Get the events logged after a cursor, oldest first (incremental sync).
     
-    # Filter by room if specified
-    if room:
-        events = [e for e in events if e["room"].lower() == room.lower()]
+    Pass the id of the last event returned as after_id to fetch the next page.
     
-    # Sort by timestamp (newest first)
-    events.sort(key=lambda x: x["timestamp"], reverse=True)
+    Args:
+        after_id: Cursor - id of the newest event the caller already has (0 for all)
+        room: Optional room filter
+        limit: Maximum number of events to return
+        
+    Returns:
+        List of event dictionaries in id (arrival) order
+    """
+    store = get_event_store()
+    newer = _cached_recent(room, None, after_id)
+    if newer is None:
+        return store.query(room=room, limit=limit, since_id=after_id, order="asc")
+    newer.reverse()
+    return newer if limit is None else newer[:limit]
+
+
+def get_events_between(since: Optional[float] = None, until: Optional[float] = None,
+                       room: Optional[str] = None, event_type: Optional[str] = None,
+                       limit: Optional[int] = None) -> List[Dict]:
+    """
+    Get events in a time range, oldest first.
     
-    # Limit results
-    return events[:limit]
+    Args:
+        since: Start of the range (timestamp, inclusive)
+        until: End of the range (timestamp, exclusive)
+        room: Optional room filter
+        event_type: Optional event type filter
+        limit: Optional maximum number of events
+        
+    Returns:
+        List of event dictionaries, sorted by timestamp (oldest first)
+    """
+    return get_event_store().query(room=room, event_type=event_type, since=since,
+                                   until=until, limit=limit, order="asc")
 
 
 def clear_events():
     """Clear all stored events (for testing/debugging)."""
-    with _event_lock:
-        _events.clear()
+    global _cache_covers_history
 
+    get_event_store().clear()
+    with _recent_lock:
+        _recent_all.clear()
+        _recent_by_room.clear()
+        _seen_origins.clear()
+        _cache_covers_history = True
 
-def get_event_count() -> int:
-    """Get total number of events currently stored."""
-    with _event_lock:
-        return len(_events)
 
+def get_event_count(room: Optional[str] = None) -> int:
+    """Get total number of events currently stored."""
+    return get_event_store().count(room=room)
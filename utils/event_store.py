@@ -0,0 +1,426 @@
+"""
+Durable event store for the activity monitor.
+Events are kept in SQLite (WAL mode) under data/, indexed by (room, timestamp)
+and (event_type, timestamp), so history survives restarts and queries by room
+or time range read an index instead of copying and sorting a list.
+Writes are batched on a background thread; old events are compacted away
+after a retention period, and a store opened with a row cap also drops its
+oldest events once it holds more than the cap.
+"""
+
+import itertools
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+# Get project root directory
+_script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(_script_dir)
+
+# Database location and retention (set via environment variables or defaults)
+EVENT_DB_PATH = os.getenv('EVENT_DB_PATH', os.path.join(project_root, 'data', 'events.db'))
+EVENT_RETENTION_DAYS = float(os.getenv('EVENT_RETENTION_DAYS', '90'))
+
+WRITE_BATCH_SIZE = 200  # Events committed per transaction
+COMPACT_INTERVAL_SECONDS = 60 * 60  # How often the writer prunes expired events
+
+_memory_db_counter = itertools.count(1)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id INTEGER NOT NULL,
+    timestamp REAL NOT NULL,
+    event_type TEXT NOT NULL,
+    room TEXT NOT NULL COLLATE NOCASE,
+    severity TEXT NOT NULL,
+    message TEXT NOT NULL,
+    metadata TEXT NOT NULL DEFAULT '{}',
+    origin TEXT,
+    origin_id INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_events_room_time ON events (room, timestamp);
+CREATE INDEX IF NOT EXISTS idx_events_type_time ON events (event_type, timestamp);
+CREATE INDEX IF NOT EXISTS idx_events_time ON events (timestamp);
+CREATE INDEX IF NOT EXISTS idx_events_id ON events (id);
+"""
+
+# Forwarded events are deduplicated by the (origin, id) pair they were logged with
+ORIGIN_INDEX = """
+CREATE UNIQUE INDEX IF NOT EXISTS idx_events_origin ON events (origin, origin_id)
+WHERE origin IS NOT NULL;
+"""
+
+_COLUMNS = "seq, id, timestamp, event_type, room, severity, message, metadata, origin, origin_id"
+
+
+def _row_to_event(row) -> Dict:
+    seq, event_id, timestamp, event_type, room, severity, message, metadata, origin, origin_id = row
+    try:
+        metadata = json.loads(metadata) if metadata else {}
+    except json.JSONDecodeError:
+        metadata = {}
+    event = {
+        "id": event_id,
+        "timestamp": timestamp,
+        "event_type": event_type,
+        "message": message,
+        "room": room,
+        "severity": severity,
+        "metadata": metadata
+    }
+    if origin is not None:
+        event["origin"] = origin
+        event["origin_id"] = origin_id
+    return event
+
+
+class EventStore:
+    """
+    SQLite-backed event store with a batching writer thread.
+
+    append() only queues the event; the writer commits queued events in one
+    transaction per batch. Every read flushes pending writes first, so callers
+    always see their own events. Each reading thread gets its own connection
+    (WAL lets readers run alongside the writer).
+    """
+
+    def __init__(self, path: str = EVENT_DB_PATH, retention_days: float = EVENT_RETENTION_DAYS,
+                 max_events: Optional[int] = None):
+        """
+        Open (or create) the store and start its writer thread.
+
+        Args:
+            path: Database file, or ":memory:" for a private in-process store
+            retention_days: Events older than this are removed by compact()
+            max_events: Keep at most this many events, dropping the oldest after each
+                        write (None for no cap)
+        """
+        if path == ":memory:":
+            # Shared-cache memory database so the writer and reader connections see the same data
+            self._uri = f"file:events_mem_{os.getpid()}_{next(_memory_db_counter)}?mode=memory&cache=shared"
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._uri = f"file:{os.path.abspath(path)}"
+        self.path = path
+        self.retention_seconds = retention_days * 24 * 60 * 60
+        self.max_events = max_events
+
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        # Keeps a shared-cache memory database alive for the store's lifetime
+        self._keepalive = self._connect()
+        self._keepalive.executescript(SCHEMA)
+        self._migrate(self._keepalive)
+        self._keepalive.executescript(ORIGIN_INDEX)
+        self._keepalive.commit()
+        # Running count of committed events (updated on commit, compaction and clear), so
+        # the total is never a full COUNT(*) - counted once here on open
+        self._total = self._keepalive.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+        self._pending: deque = deque()  # Chunks of events, each committed in one transaction
+        self._condition = threading.Condition()
+        self._enqueued = 0
+        self._written = 0
+        self._last_compact = 0.0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="event-store-writer", daemon=True)
+        self._thread.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self._uri, uri=True, timeout=5.0, check_same_thread=False)
+        if "mode=memory" not in self._uri:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+        with self._connections_lock:
+            self._connections.append(connection)
+        return connection
+
+    @staticmethod
+    def _migrate(connection: sqlite3.Connection):
+        """Add columns introduced after a database file was created."""
+        columns = {row[1] for row in connection.execute("PRAGMA table_info(events)")}
+        for name, definition in (("origin", "TEXT"), ("origin_id", "INTEGER")):
+            if name not in columns:
+                connection.execute(f"ALTER TABLE events ADD COLUMN {name} {definition}")
+
+    def _reader(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._connect()
+            self._local.connection = connection
+        return connection
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def append(self, event: Dict):
+        """Queue an event for writing (returns immediately)."""
+        with self._condition:
+            self._pending.append([event])
+            self._enqueued += 1
+            self._condition.notify_all()
+
+    def append_many(self, events: List[Dict]):
+        """Queue several events to be committed together in a single transaction."""
+        if not events:
+            return
+        with self._condition:
+            self._pending.append(list(events))
+            self._enqueued += len(events)
+            self._condition.notify_all()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        Wait until every event queued so far is committed.
+
+        Returns:
+            True if everything was written within timeout
+        """
+        deadline = time.time() + timeout
+        with self._condition:
+            target = self._enqueued
+            while self._written < target:
+                remaining = deadline - time.time()
+                if remaining <= 0 or not self._thread.is_alive():
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def _run(self):
+        writer = self._connect()
+        while True:
+            with self._condition:
+                while not self._pending and not self._closed:
+                    if not self._condition.wait(timeout=COMPACT_INTERVAL_SECONDS):
+                        break
+                if self._closed and not self._pending:
+                    return
+                # Whole chunks only, so an append_many() is never split across transactions
+                batch = []
+                while self._pending and (not batch or len(batch) + len(self._pending[0]) <= WRITE_BATCH_SIZE):
+                    batch.extend(self._pending.popleft())
+
+            if batch:
+                inserted = 0
+                trimmed = 0
+                try:
+                    inserted = self._write_batch(writer, batch)
+                    # Trimmed before the batch counts as written, so a flushed store is within its cap
+                    trimmed = self._trim(writer, inserted)
+                except sqlite3.Error as e:
+                    print(f"[EVENT STORE] Failed to write {len(batch)} events: {e}")
+                with self._condition:
+                    self._written += len(batch)
+                    self._total += inserted - trimmed
+                    self._condition.notify_all()
+
+            if time.time() - self._last_compact >= COMPACT_INTERVAL_SECONDS:
+                self._last_compact = time.time()
+                try:
+                    self._compact(writer)
+                except sqlite3.Error as e:
+                    print(f"[EVENT STORE] Compaction failed: {e}")
+
+    def _write_batch(self, connection: sqlite3.Connection, batch: List[Dict]) -> int:
+        """Commit a batch in one transaction and return the number of events inserted."""
+        rows = [(
+            int(event.get("id", 0)),
+            float(event.get("timestamp", time.time())),
+            str(event.get("event_type", "unknown")),
+            str(event.get("room", "kitchen")),
+            str(event.get("severity", "info")),
+            str(event.get("message", "")),
+            json.dumps(event.get("metadata") or {}),
+            event.get("origin"),
+            event.get("origin_id")
+        ) for event in batch]
+        changes = connection.total_changes
+        with connection:
+            # OR IGNORE: a forwarded event already stored under its origin id is a duplicate
+            connection.executemany(
+                "INSERT OR IGNORE INTO events "
+                "(id, timestamp, event_type, room, severity, message, metadata, origin, origin_id) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+        return connection.total_changes - changes
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def query(self, room: Optional[str] = None, event_type: Optional[str] = None,
+              since: Optional[float] = None, until: Optional[float] = None,
+              limit: Optional[int] = 20, order: str = "desc",
+              since_id: Optional[int] = None) -> List[Dict]:
+        """
+        Query events by room, type and time range.
+
+        Args:
+            room: Optional room filter (case-insensitive)
+            event_type: Optional event type filter
+            since: Only events at or after this timestamp
+            until: Only events before this timestamp
+            limit: Maximum number of events (None for no limit)
+            order: "desc" (newest first) or "asc" (oldest first)
+            since_id: Only events with an id greater than this cursor (results are then
+                      ordered by id, which is arrival order, instead of timestamp)
+
+        Returns:
+            List of event dictionaries
+        """
+        self.flush()
+        clauses, params = self._where(room, event_type, since, until, since_id)
+        direction = "ASC" if order == "asc" else "DESC"
+        if since_id is not None:
+            sql = f"SELECT {_COLUMNS} FROM events{clauses} ORDER BY id {direction}"
+        else:
+            sql = f"SELECT {_COLUMNS} FROM events{clauses} ORDER BY timestamp {direction}, seq {direction}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+        rows = self._reader().execute(sql, params).fetchall()
+        return [_row_to_event(row) for row in rows]
+
+    def count(self, room: Optional[str] = None, event_type: Optional[str] = None,
+              since: Optional[float] = None, until: Optional[float] = None) -> int:
+        """Count events matching the filters (without filters, see total())."""
+        if not (room or event_type or since is not None or until is not None):
+            return self.total()
+        self.flush()
+        clauses, params = self._where(room, event_type, since, until)
+        return self._reader().execute(f"SELECT COUNT(*) FROM events{clauses}", params).fetchone()[0]
+
+    def total(self) -> int:
+        """
+        Number of events in the store, including events still queued for writing.
+        Read from a running count, so it neither waits for the writer nor scans the table.
+        """
+        with self._condition:
+            return self._total + self._enqueued - self._written
+
+    def max_id(self) -> int:
+        """Highest event id stored (0 if empty)."""
+        self.flush()
+        return self._reader().execute("SELECT MAX(id) FROM events").fetchone()[0] or 0
+
+    def find_origin(self, origin: str, origin_id: int) -> Optional[int]:
+        """
+        Look up a committed event forwarded from another process.
+
+        Returns:
+            The event's id in this store, or None if it has not been stored
+        """
+        row = self._reader().execute(
+            "SELECT id FROM events WHERE origin = ? AND origin_id = ? LIMIT 1", (origin, origin_id)
+        ).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def _where(room, event_type, since, until, since_id=None):
+        clauses = []
+        params = []
+        if room:
+            clauses.append("room = ?")
+            params.append(room)
+        if event_type:
+            clauses.append("event_type = ?")
+            params.append(event_type)
+        if since is not None:
+            clauses.append("timestamp >= ?")
+            params.append(float(since))
+        if until is not None:
+            clauses.append("timestamp < ?")
+            params.append(float(until))
+        if since_id is not None:
+            clauses.append("id > ?")
+            params.append(int(since_id))
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def clear(self):
+        """Delete every event."""
+        self.flush()
+        connection = self._reader()
+        with self._condition:
+            with connection:
+                connection.execute("DELETE FROM events")
+            self._total = 0
+
+    def compact(self, retention_seconds: Optional[float] = None) -> int:
+        """
+        Delete events older than the retention period and checkpoint the WAL.
+
+        Args:
+            retention_seconds: Override the store's retention period
+
+        Returns:
+            Number of events deleted
+        """
+        self.flush()
+        return self._compact(self._reader(), retention_seconds)
+
+    def _compact(self, connection: sqlite3.Connection, retention_seconds: Optional[float] = None) -> int:
+        retention = self.retention_seconds if retention_seconds is None else retention_seconds
+        with connection:
+            deleted = connection.execute(
+                "DELETE FROM events WHERE timestamp < ?", (time.time() - retention,)
+            ).rowcount
+        with self._condition:
+            self._total -= deleted
+        trimmed = self._trim(connection)
+        with self._condition:
+            self._total -= trimmed
+        if "mode=memory" not in self._uri:
+            connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        if deleted:
+            print(f"[EVENT STORE] Compacted {deleted} events older than {retention / 86400:g} days")
+        if trimmed:
+            print(f"[EVENT STORE] Compacted {trimmed} events beyond the newest {self.max_events}")
+        return deleted + trimmed
+
+    def _trim(self, connection: sqlite3.Connection, uncounted: int = 0) -> int:
+        """
+        Delete the oldest events (by arrival) beyond max_events.
+
+        Args:
+            connection: Connection to delete with
+            uncounted: Committed events not yet added to the running count
+
+        Returns:
+            Number of events deleted (the caller updates the running count)
+        """
+        if self.max_events is None:
+            return 0
+        with self._condition:
+            if self._total + uncounted <= self.max_events:
+                return 0
+        with connection:
+            return connection.execute(
+                "DELETE FROM events WHERE seq <= (SELECT MAX(seq) FROM events) - ?", (self.max_events,)
+            ).rowcount
+
+    def close(self):
+        """Flush pending writes, stop the writer and close every connection."""
+        self.flush()
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join(timeout=2.0)
+        with self._connections_lock:
+            for connection in self._connections:
+                try:
+                    connection.close()
+                except sqlite3.Error:
+                    pass
+            self._connections = []
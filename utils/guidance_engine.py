@@ -0,0 +1,318 @@
+"""
+Table-driven guidance engine for step-by-step recipes and routines.
+A guidance kind (recipe, bathroom routine, laundry routine) is declared as a
+program dictionary (input sensor and edge, announcements, LED, optional
+post-completion monitor) and compiled once. Every active recipe/routine runs
+as a session on its program, so the three guidance flows share one state
+machine and several sessions can run side by side on one device.
+
+Program definition:
+    {
+        "kind": "laundry",                  # Guidance kind pushed by the API
+        "room": "laundry",                  # Room recorded on logged events
+        "tag": "LAUNDRY",                   # Console prefix
+        "document": "routine",              # Pushed state field holding the recipe/routine
+        "id_field": "routine_id",           # Pushed state field holding its ID
+        "input": {                          # Edge that advances to the next step
+            "field": "pressure",            # Snapshot channel
+            "direction": "above",           # "above": rises over threshold, "below": drops under it
+            "threshold": 100,
+            "rest": 0                       # Value assumed when the channel is unreadable
+        },
+        "start": "laundry_start",           # Guidance message keys (see utils/dialogues.py)
+        "complete": "laundry_steps_complete",
+        "fields": {"minutes": ("cycle_duration_minutes", 45)},  # Message fields from the document (key, default)
+        "led": "laundry",                   # Key into the engine's LED outputs
+        "hold_led": True,                   # Keep the LED on once finished (until stopped or replaced)
+        "monitor": {                        # Optional: watch the input after the last step
+            "field": "pressure",
+            "quiet_value": 0,               # Readings above this mean "machine running"
+            "quiet_seconds": 25,            # How long the input must stay at or below it
+            "message": "laundry_load_done",
+            "event_type": "laundry_cycle_complete",
+            "event_message": "Laundry cycle completed - load is ready",
+            "on_done": callback             # Called with the session when the monitor fires
+        }
+    }
+
+Session phases:
+    idle -> starting (announce name) -> first_step (announce step 1) -> running
+    (input edges advance steps) -> monitoring (optional) -> done
+"""
+
+from typing import Any, Callable, Dict, List, Optional
+
+from utils.dialogues import get_guidance_message
+from utils.ring_buffer import SensorHistory
+
+IDLE = "idle"
+STARTING = "starting"
+FIRST_STEP = "first_step"
+RUNNING = "running"
+MONITORING = "monitoring"
+DONE = "done"
+
+
+class CompiledMonitor:
+    """Post-completion check that waits for the input to stay at or below a quiet value."""
+
+    __slots__ = ("field", "quiet_value", "quiet_seconds", "message", "event_type",
+                 "event_message", "severity", "on_done")
+
+    def __init__(self, definition: Dict[str, Any]):
+        self.field = definition["field"]
+        self.quiet_value = definition.get("quiet_value", 0)
+        self.quiet_seconds = definition["quiet_seconds"]
+        self.message = definition.get("message")
+        self.event_type = definition.get("event_type")
+        self.event_message = definition.get("event_message")
+        self.severity = definition.get("severity", "info")
+        self.on_done = definition.get("on_done")
+
+
+class CompiledProgram:
+    """A program definition with its input comparison and messages fixed."""
+
+    __slots__ = ("kind", "room", "tag", "document", "id_field", "field", "above", "threshold",
+                 "rest", "start", "complete", "fields", "led", "hold_led", "monitor")
+
+    def __init__(self, definition: Dict[str, Any]):
+        trigger = definition["input"]
+        direction = trigger.get("direction", "above")
+        if direction not in ("above", "below"):
+            raise ValueError(f"Program {definition.get('kind')}: direction must be 'above' or 'below'")
+
+        self.kind = definition["kind"]
+        self.room = definition.get("room")
+        self.tag = definition.get("tag", self.kind.upper())
+        self.document = definition.get("document", self.kind)
+        self.id_field = definition.get("id_field", f"{self.document}_id")
+        self.field = trigger["field"]
+        self.above = direction == "above"
+        self.threshold = trigger["threshold"]
+        self.rest = trigger.get("rest", 0)
+        self.start = definition["start"]
+        self.complete = definition["complete"]
+        self.fields = dict(definition.get("fields", {}))
+        self.led = definition.get("led")
+        self.hold_led = definition.get("hold_led", False)
+        monitor = definition.get("monitor")
+        self.monitor = CompiledMonitor(monitor) if monitor else None
+
+    def crossed(self, value, last) -> bool:
+        """True on the tick the input crosses the threshold (one step per press/approach)."""
+        if self.above:
+            return value > self.threshold and last <= self.threshold
+        return value < self.threshold and last >= self.threshold
+
+
+class GuidanceSession:
+    """Progress through one recipe/routine."""
+
+    __slots__ = ("item_id", "name", "steps", "fields", "phase", "step", "last_value", "quiet_since")
+
+    def __init__(self):
+        self.item_id = None
+        self.name = None
+        self.steps: List[str] = []
+        self.fields: Dict[str, Any] = {}  # Extra message fields taken from the document
+        self.phase = IDLE
+        self.step = 0  # Index of the current step
+        self.last_value = None  # Input value on the previous tick (edge detection)
+        self.quiet_since = None  # Monitoring start or newest active reading, whichever is later
+
+    @property
+    def active(self) -> bool:
+        return self.phase not in (IDLE, DONE)
+
+
+def compile_programs(definitions: List[Dict[str, Any]]) -> List[CompiledProgram]:
+    """
+    Compile program definitions (validates them and fixes their comparisons).
+
+    Args:
+        definitions: Program definition dictionaries
+
+    Returns:
+        List of CompiledProgram objects in definition order
+    """
+    return [CompiledProgram(definition) for definition in definitions]
+
+
+class GuidanceEngine:
+    """
+    Runs guidance sessions for a set of programs against sensor snapshots.
+
+    Pushed guidance states are applied with apply(); tick() then advances every
+    active session. LEDs are only written when a session changes phase (not on
+    every tick), and the outputs dedupe repeated values anyway.
+    """
+
+    def __init__(self, programs: List[Dict[str, Any]],
+                 leds: Optional[Dict[str, Callable[[int], None]]] = None,
+                 announce: Optional[Callable[[str, str], None]] = None,
+                 log: Optional[Callable[..., None]] = None,
+                 history: Optional[SensorHistory] = None):
+        """
+        Initialize the engine.
+
+        Args:
+            programs: Program definitions (see module docstring)
+            leds: LED name -> output callable taking 1 (on) or 0 (off)
+            announce: Called with (tag, text) for every guidance announcement
+            log: Called with log_event keyword arguments when a monitor fires
+            history: Optional per-channel history of every acquired reading; monitors
+                then also see activity between guidance ticks
+        """
+        self.programs = {program.kind: program for program in compile_programs(programs)}
+        self.leds = leds or {}
+        self.announce = announce
+        self.log = log
+        self.history = history
+        self.sessions: Dict[str, GuidanceSession] = {kind: GuidanceSession() for kind in self.programs}
+        missing = [program.led for program in self.programs.values()
+                   if program.led and program.led not in self.leds]
+        if missing:
+            raise ValueError(f"No LED output configured for: {', '.join(missing)}")
+
+    # ------------------------------------------------------------------
+    # Session control
+    # ------------------------------------------------------------------
+
+    def apply(self, kind: str, state: Dict[str, Any]):
+        """
+        Apply a pushed guidance state (same shape as the get-active responses).
+
+        A new recipe/routine (or one started again after a stop) restarts from
+        its first step; a repeated push of the running one changes nothing.
+        Kinds without a program on this engine are ignored.
+        """
+        program = self.programs.get(kind)
+        if program is None:
+            return
+        session = self.sessions[kind]
+        document = state.get(program.document) if state.get("active") else None
+        if document:
+            item_id = state.get(program.id_field)
+            if session.phase != IDLE and session.item_id == item_id:
+                return
+            self._load(program, session, item_id, document)
+        elif session.phase != IDLE:
+            if session.active:
+                print(f"[{program.tag}] {program.document.capitalize()} guidance stopped")
+            session.phase = IDLE
+            self._set_led(program, 0)
+
+    def _load(self, program: CompiledProgram, session: GuidanceSession, item_id, document: Dict[str, Any]):
+        session.item_id = item_id
+        session.name = document.get("name", item_id)
+        session.steps = list(document.get("steps") or [])
+        session.fields = {name: document.get(key, default) for name, (key, default) in program.fields.items()}
+        session.step = 0
+        session.last_value = program.rest
+        session.quiet_since = None
+        if not session.steps:
+            session.phase = IDLE
+            self._set_led(program, 0)
+            return
+        session.phase = STARTING
+        self._set_led(program, 1)
+        print(f"[{program.tag}] Active {program.document} loaded: {session.name}")
+
+    def stop(self, kind: str):
+        """Stop a session locally (as if a stop had been pushed)."""
+        self.apply(kind, {"active": False})
+
+    # ------------------------------------------------------------------
+    # Ticks
+    # ------------------------------------------------------------------
+
+    def tick(self, snapshot):
+        """Advance every active session using the snapshot."""
+        for kind, session in self.sessions.items():
+            if session.active:
+                self._advance(self.programs[kind], session, snapshot)
+
+    def _advance(self, program: CompiledProgram, session: GuidanceSession, snapshot):
+        phase = session.phase
+        if phase == STARTING:
+            # One announcement per tick: the name now, the first step on the next tick
+            self._say(program, program.start, name=session.name, **session.fields)
+            session.phase = FIRST_STEP
+        elif phase == FIRST_STEP:
+            self._announce_step(program, session)
+            session.phase = RUNNING
+        elif phase == RUNNING:
+            value = snapshot.get(program.field, program.rest)
+            last = session.last_value
+            session.last_value = value
+            if program.crossed(value, last):
+                session.step += 1
+                if session.step < len(session.steps):
+                    self._announce_step(program, session)
+                else:
+                    self._complete(program, session)
+        elif phase == MONITORING:
+            self._monitor(program, session, snapshot)
+
+    def _announce_step(self, program: CompiledProgram, session: GuidanceSession):
+        self._say(program, "step", number=session.step + 1, text=session.steps[session.step])
+
+    def _complete(self, program: CompiledProgram, session: GuidanceSession):
+        self._say(program, program.complete, name=session.name, **session.fields)
+        if program.monitor:
+            session.phase = MONITORING
+            session.quiet_since = None
+            print(f"[{program.tag}] Switched to monitoring mode - waiting for the input to settle")
+        else:
+            self._finish(program, session)
+
+    def _monitor(self, program: CompiledProgram, session: GuidanceSession, snapshot):
+        monitor = program.monitor
+        if session.quiet_since is None:
+            session.quiet_since = snapshot.timestamp  # Monitoring started
+        if snapshot.get(monitor.field, monitor.quiet_value) > monitor.quiet_value:
+            active_at = snapshot.timestamp
+        elif self.history is not None:
+            # Newest active reading, including ones taken between guidance ticks
+            active_at = self.history.channel(monitor.field).last_time_above(monitor.quiet_value)
+        else:
+            active_at = None
+        if active_at is not None and active_at > session.quiet_since:
+            session.quiet_since = active_at
+        if snapshot.timestamp - session.quiet_since < monitor.quiet_seconds:
+            return
+        if monitor.message:
+            self._say(program, monitor.message, name=session.name, **session.fields)
+        if monitor.event_type and self.log:
+            self.log(
+                event_type=monitor.event_type,
+                message=monitor.event_message or monitor.event_type,
+                room=program.room,
+                severity=monitor.severity,
+                metadata={program.id_field: session.item_id}
+            )
+        if monitor.on_done:
+            monitor.on_done(session)
+        self._finish(program, session)
+        print(f"[{program.tag}] Completion detected - the input will no longer trigger messages")
+
+    def _finish(self, program: CompiledProgram, session: GuidanceSession):
+        session.phase = DONE
+        if not program.hold_led:
+            self._set_led(program, 0)
+
+    def _say(self, program: CompiledProgram, message_type: str, **fields):
+        text = get_guidance_message(message_type, **fields)
+        if self.announce:
+            self.announce(program.tag, text)
+        else:
+            print(f"[{program.tag}] {text}")
+
+    def _set_led(self, program: CompiledProgram, value: int):
+        if program.led:
+            self.leds[program.led](value)
+
+    def phases(self) -> Dict[str, str]:
+        """Get the phase of every session."""
+        return {kind: session.phase for kind, session in self.sessions.items()}
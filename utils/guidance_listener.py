@@ -0,0 +1,112 @@
+"""
+Background subscriber to the API server's guidance stream.
+The hardware process receives recipe/routine guidance start and stop pushes
+over Server-Sent Events instead of polling /api/*-guidance/get-active from
+the sensor loop. The listener reconnects with exponential backoff, and every
+(re)connect begins with a full snapshot so no change is missed while offline.
+"""
+
+import json
+import os
+import threading
+import urllib.parse
+import urllib.request
+from typing import Any, Callable, Dict, Optional
+
+GUIDANCE_STREAM_URL = os.getenv('GUIDANCE_STREAM_URL', 'http://localhost:5001/api/guidance/stream')
+GUIDANCE_DEVICE = os.getenv('GUIDANCE_DEVICE', 'default')  # Which device's guidance sessions this unit follows
+RECONNECT_INITIAL_SECONDS = 0.5
+RECONNECT_MAX_SECONDS = 10.0
+READ_TIMEOUT_SECONDS = 45  # Several missed heartbeats => treat the connection as dead
+
+
+class GuidanceListener:
+    """
+    Daemon thread that reads the guidance SSE stream and reports changes.
+
+    on_update is called with (kind, state) for every guidance kind in the
+    initial snapshot and for every later change, where kind is "recipe",
+    "routine" or "laundry" and state matches the get-active API response.
+    """
+
+    def __init__(self, on_update: Callable[[str, Dict[str, Any]], None],
+                 url: str = GUIDANCE_STREAM_URL, device: str = GUIDANCE_DEVICE):
+        """
+        Initialize the listener (call start() to connect).
+
+        Args:
+            on_update: Callback receiving (kind, state); runs on the listener thread
+            url: Guidance stream URL
+            device: Device whose guidance sessions to follow
+        """
+        self.on_update = on_update
+        self.url = url
+        self.device = device
+        self.connected = False
+        self.reconnects = 0
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start the listener thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="guidance-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop reconnecting (an open connection is closed on the next message or timeout)."""
+        self._stop_event.set()
+
+    def _run(self):
+        delay = RECONNECT_INITIAL_SECONDS
+        while not self._stop_event.is_set():
+            try:
+                url = f"{self.url}?{urllib.parse.urlencode({'device': self.device})}"
+                request = urllib.request.Request(url, headers={'Accept': 'text/event-stream'})
+                with urllib.request.urlopen(request, timeout=READ_TIMEOUT_SECONDS) as response:
+                    self.connected = True
+                    delay = RECONNECT_INITIAL_SECONDS
+                    print(f"[GUIDANCE] Connected to guidance stream")
+                    self._read_stream(response)
+            except Exception as e:
+                if self.connected:
+                    print(f"[GUIDANCE] Guidance stream disconnected: {e}")
+            if self.connected:
+                self.connected = False
+                self.reconnects += 1
+            # API server offline or restarting - keep current guidance state and retry
+            self._stop_event.wait(delay)
+            delay = min(delay * 2, RECONNECT_MAX_SECONDS)
+
+    def _read_stream(self, response):
+        event = None
+        data_lines = []
+        for raw_line in response:
+            if self._stop_event.is_set():
+                return
+            line = raw_line.decode('utf-8').rstrip('\r\n')
+            if not line:
+                if data_lines:
+                    self._dispatch(event, "\n".join(data_lines))
+                event = None
+                data_lines = []
+            elif line.startswith(':'):
+                continue  # Heartbeat comment
+            elif line.startswith('event:'):
+                event = line[6:].strip()
+            elif line.startswith('data:'):
+                data_lines.append(line[5:].lstrip())
+
+    def _dispatch(self, event: Optional[str], data: str):
+        try:
+            payload = json.loads(data)
+        except json.JSONDecodeError:
+            print(f"[GUIDANCE] Ignoring malformed stream message: {data[:80]}")
+            return
+        if event == "snapshot":
+            for kind, state in payload.items():
+                self.on_update(kind, state)
+        elif event == "guidance":
+            self.on_update(payload.get("kind"), payload.get("state", {}))
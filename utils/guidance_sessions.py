@@ -0,0 +1,278 @@
+"""
+Guidance sessions: which recipe/routine is being guided, per kind and device.
+Sessions live in a small SQLite database (data/guidance.db) shared by every
+API worker process, so /api/*-guidance/status answers the same wherever a
+request lands and no sticky sessions are needed.
+
+Every session carries a version that is bumped on each transition.
+Transitions are compare-and-set: a caller may pass the version it last saw
+and the change is refused (GuidanceConflict) if someone else got there first,
+instead of silently overwriting their session.
+
+Changes are pushed to subscribers (the /api/guidance/stream SSE endpoint) by
+a watcher thread that follows a global revision counter, so a start/stop made
+by another worker process reaches this process's streams too.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+from utils.pubsub import Broker, Subscription
+
+# Get project root directory
+_script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(_script_dir)
+
+GUIDANCE_DB_PATH = os.getenv('GUIDANCE_DB_PATH', os.path.join(project_root, 'data', 'guidance.db'))
+GUIDANCE_POLL_SECONDS = float(os.getenv('GUIDANCE_POLL_SECONDS', '0.5'))  # Watcher check for other processes' changes
+DEFAULT_DEVICE = "default"
+
+# Guidance kind -> (room, id field, document field) of its get-active response
+KINDS = {
+    "recipe": ("kitchen", "recipe_id", "recipe"),
+    "routine": ("bathroom", "routine_id", "routine"),
+    "laundry": ("laundry", "routine_id", "routine"),
+}
+
+_DEVICE_PATTERN = re.compile(r'^[A-Za-z0-9_.:-]{1,64}$')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS guidance_sessions (
+    kind TEXT NOT NULL,
+    device TEXT NOT NULL,
+    active INTEGER NOT NULL DEFAULT 0,
+    item_id TEXT,
+    item TEXT,
+    version INTEGER NOT NULL DEFAULT 0,
+    revision INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (kind, device)
+);
+CREATE INDEX IF NOT EXISTS idx_guidance_revision ON guidance_sessions (revision);
+CREATE TABLE IF NOT EXISTS guidance_revision (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    revision INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO guidance_revision (id, revision) VALUES (1, 0);
+"""
+
+
+class GuidanceConflict(Exception):
+    """A compare-and-set transition found a different session version than expected."""
+
+    def __init__(self, kind: str, device: str, expected: int, current: int):
+        super().__init__(f"{kind} guidance on '{device}' is at version {current}, not {expected}")
+        self.kind = kind
+        self.device = device
+        self.expected = expected
+        self.current = current
+
+
+class GuidanceSessionManager:
+    """Versioned guidance sessions in a SQLite database shared between processes."""
+
+    def __init__(self, path: str = GUIDANCE_DB_PATH, poll_seconds: float = GUIDANCE_POLL_SECONDS):
+        """
+        Open (or create) the session database.
+
+        Args:
+            path: SQLite database file (":memory:" keeps sessions in this process only)
+            poll_seconds: How often the watcher looks for changes made by other processes
+        """
+        self.path = path
+        self.poll_seconds = poll_seconds
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Autocommit mode: transactions are opened explicitly with BEGIN IMMEDIATE
+        self._connection = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._broker = Broker()
+        self._wake = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self._published_revision = 0
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def _row_locked(self, kind: str, device: str):
+        return self._connection.execute(
+            "SELECT active, item_id, item, version FROM guidance_sessions WHERE kind = ? AND device = ?",
+            (kind, device)
+        ).fetchone()
+
+    @staticmethod
+    def _state_from_row(kind: str, row) -> Dict[str, any]:
+        _, id_field, item_field = KINDS[kind]
+        if row and row[0]:
+            return {"active": True, id_field: row[1], item_field: json.loads(row[2]), "version": row[3]}
+        return {"active": False, item_field: None, "version": row[3] if row else 0}
+
+    def state(self, kind: str, device: str = DEFAULT_DEVICE) -> Dict[str, any]:
+        """
+        Get a session, shaped like the get-active response plus its version.
+
+        Raises:
+            ValueError: for an unknown kind or an invalid device name
+        """
+        _validate(kind, device)
+        with self._lock:
+            row = self._row_locked(kind, device)
+        return self._state_from_row(kind, row)
+
+    def snapshot(self, device: str = DEFAULT_DEVICE) -> Dict[str, Dict[str, any]]:
+        """Get the sessions of every guidance kind on a device."""
+        return {kind: self.state(kind, device) for kind in KINDS}
+
+    def sessions(self) -> List[Dict[str, any]]:
+        """Get every active session (kind, room, device and state)."""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT kind, device, active, item_id, item, version FROM guidance_sessions WHERE active = 1 "
+                "ORDER BY kind, device"
+            ).fetchall()
+        return [{"kind": kind, "room": KINDS[kind][0], "device": device,
+                 "state": self._state_from_row(kind, row)}
+                for kind, device, *row in rows if kind in KINDS]
+
+    # ------------------------------------------------------------------
+    # Transitions
+    # ------------------------------------------------------------------
+
+    def _transition(self, kind: str, device: str, item_id: Optional[str], item: Optional[Dict[str, any]],
+                    expected_version: Optional[int]) -> Dict[str, any]:
+        _validate(kind, device)
+        now = time.time()
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._row_locked(kind, device)
+                current = row[3] if row else 0
+                if expected_version is not None and int(expected_version) != current:
+                    raise GuidanceConflict(kind, device, int(expected_version), current)
+                self._connection.execute("UPDATE guidance_revision SET revision = revision + 1 WHERE id = 1")
+                revision = self._revision_locked()
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO guidance_sessions "
+                    "(kind, device, active, item_id, item, version, revision, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (kind, device, 1 if item is not None else 0, item_id,
+                     json.dumps(item, ensure_ascii=False) if item is not None else None,
+                     current + 1, revision, now)
+                )
+                self._connection.execute("COMMIT")
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            row = self._row_locked(kind, device)
+        self._wake.set()  # Publish now rather than at the next poll
+        return self._state_from_row(kind, row)
+
+    def start(self, kind: str, item_id: str, item: Dict[str, any], device: str = DEFAULT_DEVICE,
+              expected_version: Optional[int] = None) -> Dict[str, any]:
+        """
+        Start (or switch) guidance on a device.
+
+        Args:
+            kind: "recipe", "routine" or "laundry"
+            item_id: ID of the recipe/routine
+            item: The recipe/routine document
+            device: Device (hardware unit) the session belongs to
+            expected_version: Only apply if the session is still at this version
+
+        Returns:
+            The new session state
+
+        Raises:
+            GuidanceConflict: if expected_version no longer matches
+            ValueError: for an unknown kind or an invalid device name
+        """
+        return self._transition(kind, device, item_id, item, expected_version)
+
+    def stop(self, kind: str, device: str = DEFAULT_DEVICE,
+             expected_version: Optional[int] = None) -> Dict[str, any]:
+        """
+        Stop guidance on a device (same arguments and errors as start()).
+
+        Returns:
+            The new session state
+        """
+        return self._transition(kind, device, None, None, expected_version)
+
+    # ------------------------------------------------------------------
+    # Change notifications
+    # ------------------------------------------------------------------
+
+    def subscribe(self) -> Subscription:
+        """
+        Subscribe to session changes from every process.
+        Messages are {"kind", "room", "device", "state"}.
+        """
+        self._ensure_watcher()
+        return self._broker.subscribe()
+
+    def _ensure_watcher(self):
+        with self._lock:
+            if self._watcher is None or not self._watcher.is_alive():
+                # Earlier changes had no subscribers; start publishing from here
+                self._published_revision = self._revision_locked()
+                self._watcher = threading.Thread(target=self._watch_loop, name="guidance-watcher", daemon=True)
+                self._watcher.start()
+
+    def _watch_loop(self):
+        while True:
+            self._wake.wait(self.poll_seconds)
+            self._wake.clear()
+            try:
+                self._publish_changes()
+            except sqlite3.Error as e:
+                print(f"[GUIDANCE] Error reading session changes: {e}")
+
+    def _revision_locked(self) -> int:
+        return self._connection.execute("SELECT revision FROM guidance_revision WHERE id = 1").fetchone()[0]
+
+    def _publish_changes(self):
+        with self._lock:
+            revision = self._revision_locked()
+            if revision == self._published_revision:
+                return
+            rows = self._connection.execute(
+                "SELECT kind, device, active, item_id, item, version FROM guidance_sessions "
+                "WHERE revision > ? ORDER BY revision",
+                (self._published_revision,)
+            ).fetchall()
+            self._published_revision = revision
+        for kind, device, *row in rows:
+            if kind in KINDS:
+                self._broker.publish({"kind": kind, "room": KINDS[kind][0], "device": device,
+                                      "state": self._state_from_row(kind, row)})
+
+
+def _validate(kind: str, device: str):
+    if kind not in KINDS:
+        raise ValueError(f"Unknown guidance kind '{kind}'. Must be one of: {', '.join(KINDS)}")
+    if not _DEVICE_PATTERN.match(device or ""):
+        raise ValueError("Device must be 1-64 characters of letters, digits, '_', '.', ':' or '-'")
+
+
+_manager: Optional[GuidanceSessionManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_guidance_sessions() -> GuidanceSessionManager:
+    """Get or create the global guidance session manager."""
+    global _manager
+
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = GuidanceSessionManager()
+    return _manager
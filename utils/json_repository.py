@@ -0,0 +1,306 @@
+"""
+Cached repository for the JSON document files under data/ (recipes, routines).
+The parsed file is kept in memory and served from there; a cheap os.stat()
+on each access reloads it only when the files changed on disk (by another
+process or by hand). Writes go through to disk immediately.
+Each repository exposes a version counter and an ETag so HTTP handlers can
+answer conditional requests with 304 Not Modified.
+
+On disk a repository is a snapshot (e.g. recipes.json, still plain
+pretty-printed JSON) plus an append-only journal (recipes.json.journal, one
+JSON change per line). Adding or deleting a document appends one fsynced
+journal line, so an edit costs O(size of that document). Every
+JOURNAL_COMPACT_ENTRIES changes the journal is folded into a new snapshot,
+written to a temporary file, fsynced and renamed over the old one, so a crash
+never leaves a truncated file. An fcntl lock file keeps concurrent processes
+(e.g. several Flask workers) from interleaving writes.
+"""
+
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional, Tuple
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False  # e.g. Windows: writes are only serialized within this process
+
+JOURNAL_COMPACT_ENTRIES = 100  # Journal lines before they are folded into a new snapshot
+
+
+def _file_signature(path: str) -> Optional[Tuple[int, int, int]]:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def write_json_atomic(path: str, data, indent: Optional[int] = 2):
+    """
+    Write JSON to a file atomically: temp file, fsync, rename over the target.
+    Readers see either the old or the new contents, never a partial file.
+
+    Raises:
+        OSError: if the file could not be written
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.tmp.{os.getpid()}.{threading.get_ident()}"
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=indent, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    try:
+        # Persist the rename itself
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+    except OSError:
+        pass  # Not supported on every platform/filesystem
+
+
+class JsonDocumentRepository:
+    """
+    In-process cache of a journaled JSON file holding {document_id: document}.
+
+    Returned dictionaries are shallow copies: adding or removing entries does
+    not touch the cache, but the documents themselves are shared and must be
+    treated as read-only (use put() to change one).
+    """
+
+    def __init__(self, path: str, default_factory: Optional[Callable[[], Dict[str, Dict[str, any]]]] = None,
+                 label: str = "documents", compact_after: int = JOURNAL_COMPACT_ENTRIES):
+        """
+        Initialize the repository (the files are read on first access).
+
+        Args:
+            path: Snapshot JSON file path (the journal and lock files sit next to it)
+            default_factory: Returns the documents to create the file with if it doesn't exist
+            label: Name used in log messages (e.g. "recipes")
+            compact_after: Journal entries that trigger a new snapshot
+        """
+        self.path = path
+        self.default_factory = default_factory
+        self.label = label
+        self.compact_after = compact_after
+        self.version = 0  # Incremented whenever the cached documents change
+        self._documents: Dict[str, Dict[str, any]] = {}
+        self._journal_entries = 0
+        self._journal_torn = False  # Journal ends in a partial line (the next append starts a new line)
+        self._signature = None  # (snapshot, journal) file signatures the cache was loaded from
+        self._lock = threading.RLock()
+
+    @property
+    def journal_path(self) -> str:
+        return self.path + ".journal"
+
+    @property
+    def lock_path(self) -> str:
+        return self.path + ".lock"
+
+    def _disk_signature(self):
+        return (_file_signature(self.path), _file_signature(self.journal_path))
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool):
+        """Inter-process lock (shared for loading, exclusive for writing)."""
+        if not FCNTL_AVAILABLE:
+            yield
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def _refresh_locked(self, file_locked: bool = False):
+        """Reload the cache if the files changed (file_locked: caller holds the exclusive file lock)."""
+        if self._signature is not None and self._disk_signature() == self._signature:
+            return
+        if file_locked:
+            self._load_locked()
+        else:
+            with self._file_lock(exclusive=False):
+                self._load_locked()
+        if self._signature == (None, None):
+            # First use (or files deleted): create the snapshot from the defaults
+            documents = self.default_factory() if self.default_factory else {}
+            if file_locked:
+                self._write_snapshot_locked(documents)
+            else:
+                with self._file_lock(exclusive=True):
+                    if self._disk_signature() == (None, None):
+                        self._write_snapshot_locked(documents)
+                    else:
+                        self._load_locked()  # Another process created it first
+
+    def _load_locked(self):
+        signature = self._disk_signature()
+        documents: Dict[str, Dict[str, any]] = {}
+        if signature[0] is not None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    documents = json.load(f)
+            except (json.JSONDecodeError, IOError) as e:
+                print(f"Error loading {self.label}: {e}")
+        entries = 0
+        self._journal_torn = False
+        if signature[1] is not None:
+            entries = self._replay_journal(documents)
+        self._documents = documents
+        self._journal_entries = entries
+        self._signature = signature
+        self.version += 1
+
+    def _replay_journal(self, documents: Dict[str, Dict[str, any]]) -> int:
+        try:
+            with open(self.journal_path, 'r', encoding='utf-8') as f:
+                lines = f.read().split('\n')
+        except IOError as e:
+            print(f"Error loading {self.label} journal: {e}")
+            return 0
+        # Without a trailing newline the last line is an append interrupted by a crash
+        self._journal_torn = lines[-1] != ''
+        entries = 0
+        for number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                change = json.loads(line)
+            except json.JSONDecodeError:
+                if not (self._journal_torn and number == len(lines)):
+                    print(f"Skipping corrupt line {number} in {self.label} journal")
+                continue
+            if change.get("op") == "put":
+                documents[change["id"]] = change["document"]
+            elif change.get("op") == "delete":
+                documents.pop(change["id"], None)
+            entries += 1
+        return entries
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def _write_snapshot_locked(self, documents: Dict[str, Dict[str, any]]) -> bool:
+        try:
+            write_json_atomic(self.path, documents)
+            # Only drop the journal once the snapshot containing its changes is in place
+            if os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
+        except OSError as e:
+            print(f"Error saving {self.label}: {e}")
+            return False
+        self._documents = documents
+        self._journal_entries = 0
+        self._signature = self._disk_signature()
+        self.version += 1
+        return True
+
+    def _append_locked(self, change: Dict[str, any]) -> bool:
+        line = json.dumps(change, ensure_ascii=False) + "\n"
+        if self._journal_torn:
+            line = "\n" + line
+        try:
+            with open(self.journal_path, 'a', encoding='utf-8') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError as e:
+            print(f"Error saving {self.label}: {e}")
+            return False
+        self._journal_torn = False
+        if change["op"] == "put":
+            self._documents[change["id"]] = change["document"]
+        else:
+            self._documents.pop(change["id"], None)
+        self._journal_entries += 1
+        self._signature = self._disk_signature()
+        self.version += 1
+        if self._journal_entries >= self.compact_after:
+            self._write_snapshot_locked(self._documents)
+        return True
+
+    def _change(self, change: Dict[str, any]) -> bool:
+        with self._lock, self._file_lock(exclusive=True):
+            self._refresh_locked(file_locked=True)
+            return self._append_locked(change)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def all(self) -> Dict[str, Dict[str, any]]:
+        """Get every document (shallow copy of the cached mapping)."""
+        with self._lock:
+            self._refresh_locked()
+            return dict(self._documents)
+
+    def get(self, document_id: str) -> Optional[Dict[str, any]]:
+        """Get one document, or None if it doesn't exist."""
+        with self._lock:
+            self._refresh_locked()
+            return self._documents.get(document_id)
+
+    def put(self, document_id: str, document: Dict[str, any]) -> bool:
+        """
+        Add or replace a document (appends one journal entry).
+
+        Returns:
+            True if the change was written
+        """
+        return self._change({"op": "put", "id": document_id, "document": document})
+
+    def delete(self, document_id: str) -> bool:
+        """
+        Remove a document if present (appends one journal entry).
+
+        Returns:
+            True if the change was written
+        """
+        return self._change({"op": "delete", "id": document_id})
+
+    def replace_all(self, documents: Dict[str, Dict[str, any]]) -> bool:
+        """Replace every document (writes a new snapshot)."""
+        with self._lock, self._file_lock(exclusive=True):
+            return self._write_snapshot_locked(dict(documents))
+
+    def compact(self) -> bool:
+        """Fold the journal into a new snapshot now."""
+        with self._lock, self._file_lock(exclusive=True):
+            self._refresh_locked(file_locked=True)
+            if not self._journal_entries:
+                return True
+            return self._write_snapshot_locked(self._documents)
+
+    def etag(self) -> str:
+        """
+        Entity tag for the current contents (unquoted).
+
+        Derived from the files' identity, modification time and size, so every
+        process serving the same files agrees on it.
+        """
+        with self._lock:
+            self._refresh_locked()
+            parts = []
+            for signature in self._signature or (None, None):
+                inode, mtime_ns, size = signature or (0, 0, 0)
+                parts.append(f"{inode:x}-{mtime_ns:x}-{size:x}")
+            return ".".join(parts)
@@ -0,0 +1,166 @@
+"""
+LED output manager for the glow modules.
+The serial link to the hardware is the bottleneck of the sensor loop, so LED
+commands are not written when they are requested. Each port keeps the command
+it should show and the command last sent; flush() (run once per LED tick)
+writes every port whose command changed as one frame on the side-effect sink.
+That gives:
+
+- Diffing: a command equal to the one already on the port is never resent.
+- Coalescing: several changes to a port between flushes send only the last.
+- Rate limiting: a port is written at most once per min_interval_s; a newer
+  command waits for the next flush instead of being dropped.
+
+Several outputs may share a port (e.g. the bathroom's hot and cold water
+warnings on the heat glow port): the port shows the most recently switched-on
+output and only turns off once all of them are off.
+"""
+
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+LED_MIN_INTERVAL_S = 0.1  # Minimum time between writes to one port
+LED_FLUSH_RATE_HZ = 20  # LED ticks per second (see run_sensor_loop in main.py)
+
+# ("setFade", (args...)) or ("setBrightness", (args...)): a method of the module's out object
+Command = Tuple[str, tuple]
+
+
+class LedOutput:
+    """
+    One switchable LED meaning on a port, called with 1 (on) or 0 (off)
+    (the LED interface the detector and guidance engines drive).
+    """
+
+    __slots__ = ("manager", "port", "on", "off", "pv")
+
+    def __init__(self, manager: "LedManager", port: int, on: Command, off: Command):
+        self.manager = manager
+        self.port = port
+        self.on = on
+        self.off = off
+        self.pv = 0
+
+    def __call__(self, v):
+        if v != self.pv:
+            self.pv = v
+            self.manager._switch(self, bool(v))
+
+
+class LedPort:
+    """Command bookkeeping for one glow module port."""
+
+    __slots__ = ("port", "lit", "desired", "sent", "sent_at")
+
+    def __init__(self, port: int, off: Command):
+        self.port = port
+        self.lit: List[LedOutput] = []  # Outputs switched on, most recent last
+        self.desired: Command = off  # Start by turning the port off once
+        self.sent: Optional[Command] = None  # Unknown until the first write
+        self.sent_at = 0.0
+
+
+class LedManager:
+    """Diffs, coalesces and rate-limits LED commands per port."""
+
+    def __init__(self, hardware, sink=None, min_interval_s: float = LED_MIN_INTERVAL_S):
+        """
+        Initialize the manager.
+
+        Args:
+            hardware: Connected Magic.Hardware object (its modules[port].out receives the commands)
+            sink: Optional AsyncSink the frames are written on (so a flush never waits on the serial port)
+            min_interval_s: Minimum time between writes to one port
+        """
+        self.hardware = hardware
+        self.sink = sink
+        self.min_interval_s = min_interval_s
+        self.ports: Dict[int, LedPort] = {}
+        self._lock = threading.Lock()
+        self.stats = {
+            "requested": 0,  # Output switches
+            "coalesced": 0,  # Commands replaced before they were sent
+            "sent": 0,  # Commands written
+            "deferred": 0,  # Flushes that held a port back for the rate limit
+            "frames": 0,  # Flushes that wrote anything
+            "dropped_frames": 0  # Frames the sink had no room for (retried next flush)
+        }
+
+    def output(self, port: int, on: Command, off: Command) -> LedOutput:
+        """
+        Create an output on a port.
+
+        Args:
+            port: Glow module port number
+            on: Command shown while the output is on, e.g. ("setFade", prox_warning_fade)
+            off: Command sent when no output on the port is on
+        """
+        with self._lock:
+            if port not in self.ports:
+                self.ports[port] = LedPort(port, off)
+        return LedOutput(self, port, on, off)
+
+    def _switch(self, output: LedOutput, on: bool):
+        with self._lock:
+            port = self.ports[output.port]
+            if output in port.lit:
+                port.lit.remove(output)
+            if on:
+                port.lit.append(output)
+            desired = port.lit[-1].on if port.lit else output.off
+            self.stats["requested"] += 1
+            if port.desired != port.sent and desired != port.desired:
+                self.stats["coalesced"] += 1
+            port.desired = desired
+
+    def flush(self, snapshot=None) -> int:
+        """
+        Write every port whose command changed, as one frame.
+
+        Args:
+            snapshot: Ignored (lets the manager run as a snapshot consumer)
+
+        Returns:
+            Number of commands written (or queued on the sink)
+        """
+        now = time.monotonic()
+        frame = []
+        with self._lock:
+            for port in self.ports.values():
+                if port.desired == port.sent:
+                    continue
+                if now - port.sent_at < self.min_interval_s:
+                    self.stats["deferred"] += 1
+                    continue
+                frame.append((port.port, port.desired))
+            if not frame:
+                return 0
+            if self.sink is not None and not self.sink.submit(self._write_frame, frame):
+                self.stats["dropped_frames"] += 1
+                return 0
+            for number, command in frame:
+                port = self.ports[number]
+                port.sent = command
+                port.sent_at = now
+            self.stats["sent"] += len(frame)
+            self.stats["frames"] += 1
+        if self.sink is None:
+            self._write_frame(frame)
+        return len(frame)
+
+    def _write_frame(self, frame: List[Tuple[int, Command]]):
+        for number, (method, args) in frame:
+            try:
+                getattr(self.hardware.modules[number].out, method)(*args)
+            except (AttributeError, LookupError, TypeError) as e:
+                print(f"[LED] Error writing port {number}: {e}")
+                with self._lock:
+                    self.ports[number].sent = None  # Unknown state: resend on the next flush
+
+    def reset(self):
+        """Forget what was sent, so every port is rewritten on the next flush."""
+        with self._lock:
+            for port in self.ports.values():
+                port.sent = None
+                port.sent_at = 0.0
@@ -0,0 +1,170 @@
+"""
+Capability probe for Indistinguishable From Magic hardware modules.
+The same reading lives at different property paths depending on the module
+and firmware (data.strength, strength, amount(), ...). Instead of walking a
+chain of hasattr() checks on every sample, each channel's port is inspected
+once - at connect time, after a reconnect, or when the module on the port is
+swapped - and a direct accessor for the first path present is kept. A sample
+then costs one type check and one attribute fetch.
+
+Channel definition:
+    "distance_mm": (proximity_port, ["data.milimeters", "data.millimeters", "distance"])
+    "temperature": (thermal_port, [("pixel_temperatures", frame_to_celsius), ("temperature", kelvin_to_celsius)])
+
+Paths are tried in order; "name()" calls a method. A path may be paired with
+its own conversion (default int).
+"""
+
+import time
+from operator import attrgetter
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+REPROBE_INTERVAL_S = 1.0  # Minimum time between re-probes of a port whose accessor stopped working
+
+Candidate = Union[str, Tuple[str, Callable[[Any], Any]]]
+
+
+class ChannelAccessor:
+    """Compiled accessor for one channel, re-probed when its module changes."""
+
+    __slots__ = ("name", "port", "candidates", "module_type", "getter", "call", "convert", "path", "probed_at")
+
+    def __init__(self, name: str, port: int, candidates: List[Candidate]):
+        self.name = name
+        self.port = port
+        self.candidates = []
+        for candidate in candidates:
+            path, convert = (candidate, int) if isinstance(candidate, str) else candidate
+            call = path.endswith("()")
+            attribute = path[:-2] if call else path
+            self.candidates.append((path, attrgetter(attribute), call, convert))
+        self.module_type = None  # Type of the module the accessor was compiled for
+        self.getter = None
+        self.call = False
+        self.convert = int
+        self.path: Optional[str] = None  # Path in use (None: no candidate present)
+        self.probed_at = 0.0
+
+    def probe(self, module) -> Optional[str]:
+        """Pick the first candidate path present on the module."""
+        self.module_type = type(module)
+        self.probed_at = time.monotonic()
+        self.getter = None
+        self.path = None
+        if module is None:
+            return None
+        for path, getter, call, convert in self.candidates:
+            try:
+                getter(module)
+            except AttributeError:
+                continue
+            self.getter, self.call, self.convert, self.path = getter, call, convert, path
+            break
+        return self.path
+
+    def read(self, hardware) -> Any:
+        """
+        Read the channel.
+
+        Raises:
+            AttributeError: if the module has none of the candidate paths
+            IndexError: if the port does not exist
+        """
+        module = hardware.modules[self.port]
+        if type(module) is not self.module_type:
+            self.probe(module)  # Module plugged in, removed or swapped
+        if self.getter is None:
+            # Nothing resolved yet (e.g. the sensor was not ready at connect): keep retrying, but not on every sample
+            if time.monotonic() - self.probed_at < REPROBE_INTERVAL_S or self.probe(module) is None:
+                raise AttributeError(f"No {self.name} reading on port {self.port}")
+        try:
+            value = self.getter(module)
+        except AttributeError:
+            # Same module type, different shape (e.g. firmware update): re-probe, but not on every sample
+            if time.monotonic() - self.probed_at < REPROBE_INTERVAL_S or self.probe(module) is None:
+                raise
+            value = self.getter(module)
+        return self.convert(value() if self.call else value)
+
+
+class ModuleProbe:
+    """Channel accessors for a set of module ports."""
+
+    def __init__(self, channels: Dict[str, Tuple[int, List[Candidate]]]):
+        """
+        Initialize the probe (accessors are compiled on probe() or first read).
+
+        Args:
+            channels: Channel name -> (port, candidate paths), see module docstring
+        """
+        self.accessors: Dict[str, ChannelAccessor] = {
+            name: ChannelAccessor(name, port, candidates) for name, (port, candidates) in channels.items()
+        }
+
+    def probe(self, hardware, verbose: bool = True) -> Dict[str, Optional[str]]:
+        """
+        Inspect every channel's port now (call after connecting and reconnecting).
+
+        Returns:
+            Channel name -> property path in use (None if not available)
+        """
+        found = {}
+        for name, accessor in self.accessors.items():
+            try:
+                module = hardware.modules[accessor.port]
+            except (AttributeError, IndexError, KeyError, TypeError):
+                module = None
+            found[name] = accessor.probe(module)
+            if verbose:
+                source = accessor.path or "not available"
+                print(f"[PROBE] {name} (port {accessor.port}): {source}")
+        return found
+
+    def read(self, name: str, hardware) -> Any:
+        """Read one channel (raises like ChannelAccessor.read)."""
+        return self.accessors[name].read(hardware)
+
+    def extractors(self) -> Dict[str, Callable[[Any], Any]]:
+        """Get channel name -> extractor, for SensorAcquisition."""
+        return {name: accessor.read for name, accessor in self.accessors.items()}
+
+    def fields(self) -> List[Tuple[int, str]]:
+        """Get every (port, path) any channel may read, for recording (see utils/sensor_replay.py)."""
+        found = []
+        for accessor in self.accessors.values():
+            for path, *_ in accessor.candidates:
+                if (accessor.port, path) not in found:
+                    found.append((accessor.port, path))
+        return found
+
+
+if __name__ == "__main__":
+    # Regression checks: python -m utils.module_probe
+    class _Data:
+        pass
+
+    class _Module:
+        def __init__(self):
+            self.data = _Data()
+
+    class _Hardware:
+        def __init__(self):
+            self.modules = {1: _Module()}
+
+    hardware = _Hardware()
+    probe = ModuleProbe({"distance_mm": (1, ["data.millimeters"])})
+    accessor = probe.accessors["distance_mm"]
+    # The sensor is not ready at connect: nothing resolves
+    assert probe.probe(hardware, verbose=False) == {"distance_mm": None}
+    hardware.modules[1].data.millimeters = 120
+    # Within REPROBE_INTERVAL_S of the last probe the channel still reads as missing
+    try:
+        probe.read("distance_mm", hardware)
+        raise AssertionError("read succeeded before the re-probe interval")
+    except AttributeError:
+        pass
+    # Once the interval has passed, the path that appeared is picked up
+    accessor.probed_at -= REPROBE_INTERVAL_S
+    assert probe.read("distance_mm", hardware) == 120
+    assert accessor.path == "data.millimeters"
+    print("[PROBE] Checks passed")
@@ -0,0 +1,238 @@
+"""
+Offline pre-rendering of HelpingHome voice messages into the TTS cache.
+Synthesizes every fixed dialogue variation and every recipe/routine
+announcement ahead of time so they play instantly from local disk.
+
+Usage:
+    python -m utils.prerender [--workers 4] [--voice australian-woman] [--dry-run]
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Add project root to path so imports work when running this file directly
+_script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(_script_dir)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from utils.dialogues import DIALOGUES, get_guidance_message
+from utils.tts_cache import TTS_CACHE_DIR
+
+MANIFEST_FILE = os.path.join(TTS_CACHE_DIR, 'manifest.json')
+DEFAULT_WORKERS = 4  # Concurrent ElevenLabs requests during a batch prerender
+DEFAULT_LAUNDRY_CYCLE_MINUTES = 45
+
+# (text, source) pairs, e.g. ("Step 1: Crack eggs into a bowl", "recipe:scrambled_eggs")
+PrerenderItem = Tuple[str, str]
+
+_manifest_lock = threading.Lock()
+_background_executor: Optional[ThreadPoolExecutor] = None
+_background_lock = threading.Lock()
+
+
+def dialogue_items() -> List[PrerenderItem]:
+    """
+    Get every fixed dialogue variation.
+    Variations with format placeholders depend on runtime values and are skipped.
+    """
+    items = []
+    for message_type, variations in DIALOGUES.items():
+        for text in variations:
+            if '{' not in text:
+                items.append((text, f"dialogue:{message_type}"))
+    items.append((get_guidance_message("laundry_load_done"), "dialogue:laundry_load_done"))
+    return items
+
+
+def recipe_items(recipe_id: str, recipe: Dict[str, any]) -> List[PrerenderItem]:
+    """Get the announcements spoken while guiding through a recipe."""
+    name = recipe.get('name', recipe_id)
+    source = f"recipe:{recipe_id}"
+    items = [(get_guidance_message("recipe_start", name=name), source)]
+    for index, step in enumerate(recipe.get('steps', [])):
+        items.append((get_guidance_message("step", number=index + 1, text=step), source))
+    items.append((get_guidance_message("recipe_complete", name=name), source))
+    return items
+
+
+def routine_items(routine_id: str, routine: Dict[str, any]) -> List[PrerenderItem]:
+    """
+    Get the announcements spoken while guiding through a routine.
+    Routines can be started from the bathroom or the laundry room, so both
+    start and completion phrasings are included.
+    """
+    name = routine.get('name', routine_id)
+    source = f"routine:{routine_id}"
+    minutes = routine.get('cycle_duration_minutes', DEFAULT_LAUNDRY_CYCLE_MINUTES)
+    items = [
+        (get_guidance_message("routine_start", name=name), source),
+        (get_guidance_message("laundry_start", name=name), source),
+    ]
+    for index, step in enumerate(routine.get('steps', [])):
+        items.append((get_guidance_message("step", number=index + 1, text=step), source))
+    items.append((get_guidance_message("routine_complete", name=name), source))
+    items.append((get_guidance_message("laundry_steps_complete", minutes=minutes), source))
+    return items
+
+
+def all_items() -> List[PrerenderItem]:
+    """Get every known announcement: dialogues, recipes and routines (deduplicated)."""
+    from utils.recipe_storage import get_all_recipes
+    from utils.routine_storage import get_all_routines
+
+    items = dialogue_items()
+    for recipe_id, recipe in get_all_recipes().items():
+        items.extend(recipe_items(recipe_id, recipe))
+    for routine_id, routine in get_all_routines().items():
+        items.extend(routine_items(routine_id, routine))
+
+    seen = set()
+    unique = []
+    for text, source in items:
+        if text not in seen:
+            seen.add(text)
+            unique.append((text, source))
+    return unique
+
+
+def _update_manifest(entries: Dict[str, Dict[str, str]]):
+    """Merge rendered entries (cache key -> info) into the manifest file."""
+    with _manifest_lock:
+        manifest = {"items": {}}
+        if os.path.exists(MANIFEST_FILE):
+            try:
+                with open(MANIFEST_FILE, 'r', encoding='utf-8') as f:
+                    manifest = json.load(f)
+            except (json.JSONDecodeError, IOError) as e:
+                print(f"[PRERENDER] Rebuilding unreadable manifest: {e}")
+        manifest.setdefault("items", {}).update(entries)
+        manifest["updated_at"] = time.time()
+
+        os.makedirs(os.path.dirname(MANIFEST_FILE), exist_ok=True)
+        tmp_path = f"{MANIFEST_FILE}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, MANIFEST_FILE)
+
+
+def prerender(items: Iterable[PrerenderItem], voice_ids: Iterable[str],
+              workers: int = DEFAULT_WORKERS, dry_run: bool = False) -> Dict[str, any]:
+    """
+    Synthesize items for each voice into the TTS cache, skipping cached ones.
+
+    Args:
+        items: (text, source) pairs to render
+        voice_ids: ElevenLabs voice IDs to render each item with
+        workers: Maximum number of concurrent synthesis requests
+        dry_run: Only count what would be rendered
+
+    Returns:
+        Dictionary with rendered/skipped/failed counts
+    """
+    from utils.audio import get_audio_agent
+
+    agent = get_audio_agent()
+    if agent is None or agent.cache is None:
+        return {"status": "error", "message": "Audio agent or TTS cache not available"}
+
+    items = list(items)
+    voice_ids = list(dict.fromkeys(voice_ids))
+    manifest_entries = {}
+    jobs = []
+    skipped = 0
+    for voice_id in voice_ids:
+        for text, source in items:
+            key = agent.cache_key(text, voice_id)
+            manifest_entries[key] = {"text": text, "voice_id": voice_id, "source": source}
+            if agent.cache.contains(key):
+                skipped += 1
+            else:
+                jobs.append((text, voice_id, key))
+
+    result = {
+        "status": "success",
+        "total": len(items) * len(voice_ids),
+        "skipped": skipped,
+        "rendered": 0,
+        "failed": 0
+    }
+    if dry_run:
+        result["pending"] = len(jobs)
+        return result
+
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {executor.submit(agent.synthesize, text, voice_id): (text, key)
+                   for text, voice_id, key in jobs}
+        for future in as_completed(futures):
+            text, key = futures[future]
+            try:
+                future.result()
+                result["rendered"] += 1
+            except Exception as e:
+                result["failed"] += 1
+                manifest_entries.pop(key, None)
+                print(f"[PRERENDER] Failed to render '{text[:50]}': {e}")
+
+    _update_manifest(manifest_entries)
+    result["seconds"] = round(time.time() - start, 2)
+    return result
+
+
+def prerender_async(items: Iterable[PrerenderItem], voice_ids: Iterable[str]):
+    """
+    Prerender items in the background (e.g. right after a recipe is added).
+    Uses a small shared worker pool so API requests are never delayed.
+    """
+    global _background_executor
+
+    with _background_lock:
+        if _background_executor is None:
+            _background_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="prerender")
+    items = list(items)
+    voice_ids = list(voice_ids)
+
+    def _run():
+        try:
+            result = prerender(items, voice_ids, workers=2)
+            print(f"[PRERENDER] Background prerender finished: {result}")
+        except Exception as e:
+            print(f"[PRERENDER] Background prerender failed: {e}")
+
+    _background_executor.submit(_run)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prerender HelpingHome voice messages into the TTS cache")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f"Concurrent synthesis requests (default: {DEFAULT_WORKERS})")
+    parser.add_argument('--voice', action='append',
+                        help="Voice preference name to render (repeatable, default: all)")
+    parser.add_argument('--dry-run', action='store_true', help="Only report what would be rendered")
+    args = parser.parse_args()
+
+    from api_server import VOICE_PREFERENCES
+
+    voices = args.voice or list(VOICE_PREFERENCES.keys())
+    unknown = [v for v in voices if v not in VOICE_PREFERENCES]
+    if unknown:
+        parser.error(f"Unknown voice(s): {', '.join(unknown)}. Must be one of: {', '.join(VOICE_PREFERENCES.keys())}")
+
+    items = all_items()
+    print(f"[PRERENDER] {len(items)} unique messages x {len(voices)} voice(s)")
+    result = prerender(items, [VOICE_PREFERENCES[v] for v in voices],
+                       workers=args.workers, dry_run=args.dry_run)
+    print(f"[PRERENDER] {result}")
+    if result.get("status") != "success":
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
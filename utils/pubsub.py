@@ -0,0 +1,119 @@
+"""
+In-process publish/subscribe broker and Server-Sent Events helpers.
+Used by the API server to push state changes to long-lived stream
+connections instead of having clients poll for them.
+"""
+
+import json
+import queue
+import threading
+from typing import Any, List, Optional
+
+DEFAULT_SUBSCRIBER_QUEUE_SIZE = 100  # Messages buffered per slow subscriber
+SSE_HEARTBEAT_SECONDS = 15  # Comment line sent on idle streams to keep proxies and clients connected
+
+
+class Subscription:
+    """A subscriber's message queue (iterate with get())."""
+
+    def __init__(self, broker: "Broker", maxsize: int):
+        self._broker = broker
+        self._queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self.dropped = 0  # Messages discarded because the subscriber fell behind
+
+    def _deliver(self, message: Any):
+        while True:
+            try:
+                self._queue.put_nowait(message)
+                return
+            except queue.Full:
+                # Drop the oldest message so a stalled client never blocks publishers
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout: Optional[float] = None) -> Any:
+        """
+        Wait for the next message.
+
+        Raises:
+            queue.Empty: if no message arrived within timeout
+        """
+        return self._queue.get(timeout=timeout)
+
+    def close(self):
+        """Stop receiving messages."""
+        self._broker.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class Broker:
+    """Fan-out of published messages to every current subscriber."""
+
+    def __init__(self, subscriber_queue_size: int = DEFAULT_SUBSCRIBER_QUEUE_SIZE):
+        self.subscriber_queue_size = subscriber_queue_size
+        self._subscribers: List[Subscription] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self) -> Subscription:
+        """Create a new subscription (receives messages published from now on)."""
+        subscription = Subscription(self, self.subscriber_queue_size)
+        with self._lock:
+            self._subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    def publish(self, message: Any) -> int:
+        """
+        Deliver a message to every subscriber without blocking.
+
+        Returns:
+            Number of subscribers the message was delivered to
+        """
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription._deliver(message)
+        return len(subscribers)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+
+def format_sse(data: Any, event: Optional[str] = None, event_id: Optional[Any] = None) -> str:
+    """
+    Format one Server-Sent Events message.
+
+    Args:
+        data: JSON-serializable payload
+        event: Optional event name (clients dispatch on it)
+        event_id: Optional id (sent back by clients as Last-Event-ID on reconnect)
+
+    Returns:
+        SSE message text, terminated by a blank line
+    """
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event:
+        lines.append(f"event: {event}")
+    for line in json.dumps(data).splitlines() or [""]:
+        lines.append(f"data: {line}")
+    return "\n".join(lines) + "\n\n"
+
+
+def sse_heartbeat() -> str:
+    """SSE comment line used to keep an idle stream open."""
+    return ": heartbeat\n\n"
@@ -1,12 +1,15 @@
 """
 Recipe storage utility for managing recipes in a local JSON file.
+Reads are served from an in-memory cache of the parsed file (see json_repository).
 """
 
 import json
 import os
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 
+from utils.json_repository import JsonDocumentRepository
+
 # Get project root directory
 _script_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(_script_dir)
@@ -19,100 +22,108 @@ def ensure_data_directory():
     os.makedirs(data_dir, exist_ok=True)
 
 
+def _default_recipes() -> Dict[str, Dict[str, any]]:
+    """Recipes written to a new recipes.json."""
+    return {
+        "scrambled_eggs": {
+            "name": "Scrambled Eggs",
+            "description": "Simple scrambled eggs recipe",
+            "steps": [
+                "Gather ingredients: 2 eggs, butter, salt, pepper",
+                "Crack eggs into a bowl",
+                "Add salt and pepper, whisk gently",
+                "Heat pan with butter over medium heat",
+                "Pour eggs into pan",
+                "Stir gently until cooked",
+                "Serve on plate"
+            ]
+        },
+        "pasta_basic": {
+            "name": "Basic Pasta",
+            "description": "Simple pasta with sauce",
+            "steps": [
+                "Fill pot with water and bring to boil",
+                "Add pasta to boiling water",
+                "Cook pasta for 8-10 minutes",
+                "Drain pasta in colander",
+                "Heat sauce in separate pan",
+                "Mix pasta with sauce",
+                "Serve in bowl"
+            ]
+        },
+        "grilled_cheese": {
+            "name": "Grilled Cheese Sandwich",
+            "description": "Classic grilled cheese",
+            "steps": [
+                "Gather bread and cheese",
+                "Butter one side of each bread slice",
+                "Place cheese between bread slices",
+                "Heat pan over medium heat",
+                "Cook sandwich 2-3 minutes per side",
+                "Check if golden brown",
+                "Remove from pan and serve"
+            ]
+        },
+        "smoothie": {
+            "name": "Fruit Smoothie",
+            "description": "Healthy fruit smoothie",
+            "steps": [
+                "Gather fruits: banana, berries, yogurt",
+                "Wash fruits if needed",
+                "Cut banana into chunks",
+                "Add fruits to blender",
+                "Add yogurt and ice",
+                "Blend until smooth",
+                "Pour into glass and serve"
+            ]
+        },
+        "salad": {
+            "name": "Simple Salad",
+            "description": "Fresh green salad",
+            "steps": [
+                "Wash lettuce and vegetables",
+                "Dry lettuce with paper towel",
+                "Chop lettuce into bite-sized pieces",
+                "Slice tomatoes and cucumbers",
+                "Add vegetables to bowl",
+                "Add dressing and toss",
+                "Serve in salad bowl"
+            ]
+        }
+    }
+
+
+# Parsed recipes.json, reloaded only when the file changes on disk
+_repository = JsonDocumentRepository(RECIPES_FILE, default_factory=_default_recipes, label="recipes")
+
+
+def get_repository(household: Optional[str] = None) -> JsonDocumentRepository:
+    """
+    Get the repository holding a household's recipes (default: data/recipes.json).
+    
+    Raises:
+        ValueError: for an invalid household name
+    """
+    if not household or household == "default":
+        return _repository
+    # Imported here because the content library imports this module
+    from utils.content_library import get_content_library
+    return get_content_library().repository("recipe", household)
+
+
 def load_recipes() -> Dict[str, Dict[str, any]]:
     """
-    Load recipes from the JSON file.
+    Load recipes (served from the in-memory cache; re-read only if the file changed).
     
     Returns:
         Dictionary of recipes (recipe_id -> recipe_data)
     """
-    ensure_data_directory()
-    
-    if not os.path.exists(RECIPES_FILE):
-        # Return default recipes if file doesn't exist
-        default_recipes = {
-            "scrambled_eggs": {
-                "name": "Scrambled Eggs",
-                "description": "Simple scrambled eggs recipe",
-                "steps": [
-                    "Gather ingredients: 2 eggs, butter, salt, pepper",
-                    "Crack eggs into a bowl",
-                    "Add salt and pepper, whisk gently",
-                    "Heat pan with butter over medium heat",
-                    "Pour eggs into pan",
-                    "Stir gently until cooked",
-                    "Serve on plate"
-                ]
-            },
-            "pasta_basic": {
-                "name": "Basic Pasta",
-                "description": "Simple pasta with sauce",
-                "steps": [
-                    "Fill pot with water and bring to boil",
-                    "Add pasta to boiling water",
-                    "Cook pasta for 8-10 minutes",
-                    "Drain pasta in colander",
-                    "Heat sauce in separate pan",
-                    "Mix pasta with sauce",
-                    "Serve in bowl"
-                ]
-            },
-            "grilled_cheese": {
-                "name": "Grilled Cheese Sandwich",
-                "description": "Classic grilled cheese",
-                "steps": [
-                    "Gather bread and cheese",
-                    "Butter one side of each bread slice",
-                    "Place cheese between bread slices",
-                    "Heat pan over medium heat",
-                    "Cook sandwich 2-3 minutes per side",
-                    "Check if golden brown",
-                    "Remove from pan and serve"
-                ]
-            },
-            "smoothie": {
-                "name": "Fruit Smoothie",
-                "description": "Healthy fruit smoothie",
-                "steps": [
-                    "Gather fruits: banana, berries, yogurt",
-                    "Wash fruits if needed",
-                    "Cut banana into chunks",
-                    "Add fruits to blender",
-                    "Add yogurt and ice",
-                    "Blend until smooth",
-                    "Pour into glass and serve"
-                ]
-            },
-            "salad": {
-                "name": "Simple Salad",
-                "description": "Fresh green salad",
-                "steps": [
-                    "Wash lettuce and vegetables",
-                    "Dry lettuce with paper towel",
-                    "Chop lettuce into bite-sized pieces",
-                    "Slice tomatoes and cucumbers",
-                    "Add vegetables to bowl",
-                    "Add dressing and toss",
-                    "Serve in salad bowl"
-                ]
-            }
-        }
-        # Save default recipes to file
-        save_recipes(default_recipes)
-        return default_recipes
-    
-    try:
-        with open(RECIPES_FILE, 'r', encoding='utf-8') as f:
-            recipes = json.load(f)
-        return recipes
-    except (json.JSONDecodeError, IOError) as e:
-        print(f"Error loading recipes: {e}")
-        return {}
+    return _repository.all()
 
 
 def save_recipes(recipes: Dict[str, Dict[str, any]]) -> bool:
     """
-    Save recipes to the JSON file.
+    Save recipes to the JSON file (replacing every recipe).
     
     Args:
         recipes: Dictionary of recipes to save
@@ -120,15 +131,18 @@ def save_recipes(recipes: Dict[str, Dict[str, any]]) -> bool:
     Returns:
         True if successful, False otherwise
     """
-    ensure_data_directory()
+    return _repository.replace_all(recipes)
+
+
+def get_recipes_version() -> Tuple[int, str]:
+    """
+    Get the version of the stored recipes, for conditional requests.
     
-    try:
-        with open(RECIPES_FILE, 'w', encoding='utf-8') as f:
-            json.dump(recipes, f, indent=2, ensure_ascii=False)
-        return True
-    except IOError as e:
-        print(f"Error saving recipes: {e}")
-        return False
+    Returns:
+        Tuple of (version counter, ETag string)
+    """
+    etag = _repository.etag()  # Refreshes the cache first, so the version is current
+    return _repository.version, etag
 
 
 def get_all_recipes() -> Dict[str, Dict[str, any]]:
@@ -141,21 +155,22 @@ def get_all_recipes() -> Dict[str, Dict[str, any]]:
     return load_recipes()
 
 
-def get_recipe(recipe_id: str) -> Optional[Dict[str, any]]:
+def get_recipe(recipe_id: str, household: Optional[str] = None) -> Optional[Dict[str, any]]:
     """
     Get a specific recipe by ID.
     
     Args:
         recipe_id: Unique identifier for the recipe
+        household: Optional household namespace (default household if omitted)
         
     Returns:
         Recipe data if found, None otherwise
     """
-    recipes = load_recipes()
-    return recipes.get(recipe_id)
+    return get_repository(household).get(recipe_id)
 
 
-def add_recipe(recipe_id: str, name: str, steps: List[str], description: str = "") -> Dict[str, any]:
+def add_recipe(recipe_id: str, name: str, steps: List[str], description: str = "",
+               household: Optional[str] = None) -> Dict[str, any]:
     """
     Add a new recipe to storage.
     
@@ -164,12 +179,11 @@ def add_recipe(recipe_id: str, name: str, steps: List[str], description: str = "
         name: Display name of the recipe
         steps: List of step instructions
         description: Optional description of the recipe
+        household: Optional household namespace (default household if omitted)
         
     Returns:
         Dictionary with recipe info and status
     """
-    recipes = load_recipes()
-    
     # Validate inputs
     if not recipe_id or not recipe_id.strip():
         return {
@@ -192,13 +206,21 @@ def add_recipe(recipe_id: str, name: str, steps: List[str], description: str = "
     # Normalize recipe_id (convert to lowercase, replace spaces with underscores)
     recipe_id = recipe_id.strip().lower().replace(' ', '_').replace('-', '_')
     
-    recipes[recipe_id] = {
+    recipe = {
         "name": name.strip(),
         "steps": [step.strip() for step in steps if step.strip()],
         "description": description.strip() if description else ""
     }
     
-    if save_recipes(recipes):
+    try:
+        repository = get_repository(household)
+    except ValueError as e:
+        return {
+            "status": "error",
+            "message": str(e)
+        }
+    
+    if repository.put(recipe_id, recipe):
         return {
             "status": "success",
             "action": "recipe_added",
@@ -213,27 +235,25 @@ def add_recipe(recipe_id: str, name: str, steps: List[str], description: str = "
         }
 
 
-def delete_recipe(recipe_id: str) -> Dict[str, any]:
+def delete_recipe(recipe_id: str, household: Optional[str] = None) -> Dict[str, any]:
     """
     Delete a recipe by ID.
     
     Args:
         recipe_id: Unique identifier for the recipe
+        household: Optional household namespace (default household if omitted)
         
     Returns:
         Dictionary with status information
     """
-    recipes = load_recipes()
-    
-    if recipe_id not in recipes:
+    repository = get_repository(household)
+    if repository.get(recipe_id) is None:
         return {
             "status": "error",
             "message": f"Recipe '{recipe_id}' not found"
         }
     
-    del recipes[recipe_id]
-    
-    if save_recipes(recipes):
+    if repository.delete(recipe_id):
         return {
             "status": "success",
             "action": "recipe_deleted",
@@ -0,0 +1,258 @@
+"""
+Fixed-capacity sensor history with rolling statistics.
+Each channel keeps its recent readings in a preallocated array ring buffer.
+Mean and variance are updated incrementally and min/max come from monotonic
+deques, so every statistic over the whole buffer is O(1) per reading.
+Readings are timestamped, so detectors can also ask about a time window
+(e.g. "any vibration in the last 180 seconds?").
+"""
+
+import math
+import threading
+import time
+from array import array
+from collections import deque
+from typing import Dict, List, Optional
+
+DEFAULT_CAPACITY = 256  # Readings kept per channel
+
+
+class RingBuffer:
+    """
+    Array-backed ring buffer of timestamped numeric readings.
+
+    mean/variance/std/min/max cover every reading currently in the buffer and
+    cost O(1); window queries walk back from the newest reading and cost
+    O(readings in the window). Appends and window queries take a lock, so the
+    acquisition thread can write while detectors read.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        """
+        Initialize an empty buffer.
+
+        Args:
+            capacity: Maximum number of readings kept (oldest are overwritten)
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self._values = array('d', bytes(8 * capacity))
+        self._times = array('d', bytes(8 * capacity))
+        self._count = 0  # Readings currently held
+        self._total = 0  # Readings ever appended (index of the next reading)
+        self._mean = 0.0
+        self._m2 = 0.0  # Sum of squared deviations from the mean (Welford)
+        self._min_deque: deque = deque()  # (index, value), values increasing
+        self._max_deque: deque = deque()  # (index, value), values decreasing
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, value: float, timestamp: Optional[float] = None):
+        """
+        Add a reading, overwriting the oldest one when the buffer is full.
+
+        Args:
+            value: Sensor reading
+            timestamp: Time of the reading (default: now)
+        """
+        value = float(value)
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            slot = self._total % self.capacity
+            if self._count == self.capacity:
+                # Sliding update: replace the oldest value in the running statistics
+                old = self._values[slot]
+                old_mean = self._mean
+                self._mean += (value - old) / self._count
+                self._m2 += (value - old) * (value - self._mean + old - old_mean)
+                if self._m2 < 0:
+                    self._m2 = 0.0  # Rounding can push it fractionally negative
+            else:
+                self._count += 1
+                delta = value - self._mean
+                self._mean += delta / self._count
+                self._m2 += delta * (value - self._mean)
+            self._values[slot] = value
+            self._times[slot] = timestamp
+
+            index = self._total
+            self._total += 1
+            oldest = self._total - self._count
+            while self._min_deque and self._min_deque[-1][1] >= value:
+                self._min_deque.pop()
+            self._min_deque.append((index, value))
+            while self._min_deque[0][0] < oldest:
+                self._min_deque.popleft()
+            while self._max_deque and self._max_deque[-1][1] <= value:
+                self._max_deque.pop()
+            self._max_deque.append((index, value))
+            while self._max_deque[0][0] < oldest:
+                self._max_deque.popleft()
+
+    def clear(self):
+        """Remove every reading."""
+        with self._lock:
+            self._count = 0
+            self._total = 0
+            self._mean = 0.0
+            self._m2 = 0.0
+            self._min_deque.clear()
+            self._max_deque.clear()
+
+    def latest(self) -> Optional[float]:
+        """Newest reading, or None if empty."""
+        if not self._count:
+            return None
+        return self._values[(self._total - 1) % self.capacity]
+
+    def latest_time(self) -> Optional[float]:
+        """Timestamp of the newest reading, or None if empty."""
+        if not self._count:
+            return None
+        return self._times[(self._total - 1) % self.capacity]
+
+    def mean(self) -> Optional[float]:
+        return self._mean if self._count else None
+
+    def variance(self) -> Optional[float]:
+        """Population variance of the readings in the buffer."""
+        return self._m2 / self._count if self._count else None
+
+    def std(self) -> Optional[float]:
+        variance = self.variance()
+        return math.sqrt(variance) if variance is not None else None
+
+    def min(self) -> Optional[float]:
+        return self._min_deque[0][1] if self._count else None
+
+    def max(self) -> Optional[float]:
+        return self._max_deque[0][1] if self._count else None
+
+    def range(self) -> Optional[float]:
+        """max - min of the readings in the buffer."""
+        return self.max() - self.min() if self._count else None
+
+    def values(self) -> List[float]:
+        """Readings in the buffer, oldest first."""
+        return [self._values[(self._total - self._count + i) % self.capacity]
+                for i in range(self._count)]
+
+    def window(self, seconds: float, now: Optional[float] = None) -> List[float]:
+        """
+        Readings taken within the last `seconds`, newest first.
+
+        Args:
+            seconds: Window length
+            now: End of the window (default: current time)
+        """
+        cutoff = (time.time() if now is None else now) - seconds
+        result = []
+        with self._lock:
+            for i in range(1, self._count + 1):
+                slot = (self._total - i) % self.capacity
+                if self._times[slot] < cutoff:
+                    break
+                result.append(self._values[slot])
+        return result
+
+    def window_stats(self, seconds: float, now: Optional[float] = None) -> Dict[str, Optional[float]]:
+        """
+        Statistics of the readings within the last `seconds`.
+
+        Returns:
+            Dictionary with count, mean, min, max and range (None values if the window is empty)
+        """
+        readings = self.window(seconds, now)
+        if not readings:
+            return {"count": 0, "mean": None, "min": None, "max": None, "range": None}
+        low, high = min(readings), max(readings)
+        return {
+            "count": len(readings),
+            "mean": sum(readings) / len(readings),
+            "min": low,
+            "max": high,
+            "range": high - low
+        }
+
+    def last_time_above(self, threshold: float) -> Optional[float]:
+        """
+        Timestamp of the newest reading above threshold, or None if none is buffered.
+
+        Every reading greater than all later ones is still in the max deque, so
+        the newest reading above threshold is the first entry above it when the
+        deque is walked from its newest end (a quiet input leaves one entry there).
+        """
+        with self._lock:
+            for index, value in reversed(self._max_deque):
+                if value > threshold:
+                    return self._times[index % self.capacity]
+        return None
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        """Rolling statistics over the whole buffer."""
+        return {
+            "count": self._count,
+            "latest": self.latest(),
+            "mean": self.mean(),
+            "std": self.std(),
+            "min": self.min(),
+            "max": self.max()
+        }
+
+
+class SensorHistory:
+    """
+    One RingBuffer per sensor channel, created on first use.
+
+    Shared by the acquisition thread (which records the channels detectors
+    query from each snapshot) and the detectors that read windows of it.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, channels: Optional[List[str]] = None):
+        """
+        Initialize the registry.
+
+        Args:
+            capacity: Readings kept per channel
+            channels: Channels record_snapshot keeps (default: every numeric channel)
+        """
+        self.capacity = capacity
+        self.recorded = tuple(channels) if channels is not None else None
+        self._buffers: Dict[str, RingBuffer] = {}
+        self._lock = threading.Lock()
+
+    def channel(self, name: str) -> RingBuffer:
+        """Get (or create) the buffer for a channel."""
+        buffer = self._buffers.get(name)
+        if buffer is None:
+            with self._lock:
+                buffer = self._buffers.setdefault(name, RingBuffer(self.capacity))
+        return buffer
+
+    def record(self, name: str, value: float, timestamp: Optional[float] = None):
+        """Append one reading to a channel."""
+        self.channel(name).append(value, timestamp)
+
+    def record_snapshot(self, snapshot):
+        """Append the recorded channels' numeric values of a SensorSnapshot."""
+        names = snapshot.values.keys() if self.recorded is None else self.recorded
+        for name in names:
+            value = snapshot.values.get(name)
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                self.channel(name).append(value, snapshot.timestamp)
+
+    def clear(self):
+        """Remove every channel's readings."""
+        for buffer in list(self._buffers.values()):
+            buffer.clear()
+
+    def channels(self) -> List[str]:
+        """Names of the channels with a buffer."""
+        return list(self._buffers.keys())
+
+    def stats(self) -> Dict[str, Dict[str, Optional[float]]]:
+        """Rolling statistics for every channel."""
+        return {name: buffer.stats() for name, buffer in list(self._buffers.items())}
@@ -1,12 +1,15 @@
 """
 Routine storage utility for managing bathroom routines in a local JSON file.
+Reads are served from an in-memory cache of the parsed file (see json_repository).
 """
 
 import json
 import os
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 
+from utils.json_repository import JsonDocumentRepository
+
 # Get project root directory
 _script_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(_script_dir)
@@ -19,57 +22,65 @@ def ensure_data_directory():
     os.makedirs(data_dir, exist_ok=True)
 
 
+def _default_routines() -> Dict[str, Dict[str, any]]:
+    """Routines written to a new routines.json."""
+    return {
+        "washing_hands": {
+            "name": "Washing Hands",
+            "description": "Complete hand washing routine",
+            "steps": [
+                "Turn on the water and wet your hands",
+                "Apply soap to your hands",
+                "Scrub your hands together for 20 seconds",
+                "Rinse your hands thoroughly with water",
+                "Dry your hands with a towel"
+            ]
+        },
+        "cleaning_bathroom": {
+            "name": "Cleaning the Bathroom",
+            "description": "Complete bathroom cleaning routine",
+            "steps": [
+                "Gather cleaning supplies: spray, sponge, and paper towels",
+                "Spray the sink and counter with cleaning solution",
+                "Wipe down the sink, counter, and mirror",
+                "Clean the toilet with disinfectant",
+                "Sweep or mop the floor and put supplies away"
+            ]
+        }
+    }
+
+
+# Parsed routines.json, reloaded only when the file changes on disk
+_repository = JsonDocumentRepository(ROUTINES_FILE, default_factory=_default_routines, label="routines")
+
+
+def get_repository(household: Optional[str] = None) -> JsonDocumentRepository:
+    """
+    Get the repository holding a household's routines (default: data/routines.json).
+    
+    Raises:
+        ValueError: for an invalid household name
+    """
+    if not household or household == "default":
+        return _repository
+    # Imported here because the content library imports this module
+    from utils.content_library import get_content_library
+    return get_content_library().repository("routine", household)
+
+
 def load_routines() -> Dict[str, Dict[str, any]]:
     """
-    Load routines from the JSON file.
+    Load routines (served from the in-memory cache; re-read only if the file changed).
     
     Returns:
         Dictionary of routines (routine_id -> routine_data)
     """
-    ensure_data_directory()
-    
-    if not os.path.exists(ROUTINES_FILE):
-        # Return default routines if file doesn't exist
-        default_routines = {
-            "washing_hands": {
-                "name": "Washing Hands",
-                "description": "Complete hand washing routine",
-                "steps": [
-                    "Turn on the water and wet your hands",
-                    "Apply soap to your hands",
-                    "Scrub your hands together for 20 seconds",
-                    "Rinse your hands thoroughly with water",
-                    "Dry your hands with a towel"
-                ]
-            },
-            "cleaning_bathroom": {
-                "name": "Cleaning the Bathroom",
-                "description": "Complete bathroom cleaning routine",
-                "steps": [
-                    "Gather cleaning supplies: spray, sponge, and paper towels",
-                    "Spray the sink and counter with cleaning solution",
-                    "Wipe down the sink, counter, and mirror",
-                    "Clean the toilet with disinfectant",
-                    "Sweep or mop the floor and put supplies away"
-                ]
-            }
-        }
-        # Save default routines to file
-        save_routines(default_routines)
-        return default_routines
-    
-    try:
-        with open(ROUTINES_FILE, 'r', encoding='utf-8') as f:
-            routines = json.load(f)
-        return routines
-    except (json.JSONDecodeError, IOError) as e:
-        print(f"Error loading routines: {e}")
-        return {}
+    return _repository.all()
 
 
 def save_routines(routines: Dict[str, Dict[str, any]]) -> bool:
     """
-    Save routines to the JSON file.
+    Save routines to the JSON file (replacing every routine).
     
     Args:
         routines: Dictionary of routines to save
@@ -77,15 +88,18 @@ def save_routines(routines: Dict[str, Dict[str, any]]) -> bool:
     Returns:
         True if successful, False otherwise
     """
-    ensure_data_directory()
+    return _repository.replace_all(routines)
+
+
+def get_routines_version() -> Tuple[int, str]:
+    """
+    Get the version of the stored routines, for conditional requests.
     
-    try:
-        with open(ROUTINES_FILE, 'w', encoding='utf-8') as f:
-            json.dump(routines, f, indent=2, ensure_ascii=False)
-        return True
-    except IOError as e:
-        print(f"Error saving routines: {e}")
-        return False
+    Returns:
+        Tuple of (version counter, ETag string)
+    """
+    etag = _repository.etag()  # Refreshes the cache first, so the version is current
+    return _repository.version, etag
 
 
 def get_all_routines() -> Dict[str, Dict[str, any]]:
@@ -98,21 +112,22 @@ def get_all_routines() -> Dict[str, Dict[str, any]]:
     return load_routines()
 
 
-def get_routine(routine_id: str) -> Optional[Dict[str, any]]:
+def get_routine(routine_id: str, household: Optional[str] = None) -> Optional[Dict[str, any]]:
     """
     Get a specific routine by ID.
     
     Args:
         routine_id: Unique identifier for the routine
+        household: Optional household namespace (default household if omitted)
         
     Returns:
         Routine data if found, None otherwise
     """
-    routines = load_routines()
-    return routines.get(routine_id)
+    return get_repository(household).get(routine_id)
 
 
-def add_routine(routine_id: str, name: str, steps: List[str], description: str = "") -> Dict[str, any]:
+def add_routine(routine_id: str, name: str, steps: List[str], description: str = "",
+               household: Optional[str] = None) -> Dict[str, any]:
     """
     Add a new routine to storage.
     
@@ -121,12 +136,11 @@ def add_routine(routine_id: str, name: str, steps: List[str], description: str =
         name: Display name of the routine
         steps: List of step instructions
         description: Optional description of the routine
+        household: Optional household namespace (default household if omitted)
         
     Returns:
         Dictionary with routine info and status
     """
-    routines = load_routines()
-    
     # Validate inputs
     if not routine_id or not routine_id.strip():
         return {
@@ -149,13 +163,21 @@ def add_routine(routine_id: str, name: str, steps: List[str], description: str =
     # Normalize routine_id (convert to lowercase, replace spaces with underscores)
     routine_id = routine_id.strip().lower().replace(' ', '_').replace('-', '_')
     
-    routines[routine_id] = {
+    routine = {
         "name": name.strip(),
         "steps": [step.strip() for step in steps if step.strip()],
         "description": description.strip() if description else ""
     }
     
-    if save_routines(routines):
+    try:
+        repository = get_repository(household)
+    except ValueError as e:
+        return {
+            "status": "error",
+            "message": str(e)
+        }
+    
+    if repository.put(routine_id, routine):
         return {
             "status": "success",
             "action": "routine_added",
@@ -170,27 +192,25 @@ def add_routine(routine_id: str, name: str, steps: List[str], description: str =
         }
 
 
-def delete_routine(routine_id: str) -> Dict[str, any]:
+def delete_routine(routine_id: str, household: Optional[str] = None) -> Dict[str, any]:
     """
     Delete a routine by ID.
     
     Args:
         routine_id: Unique identifier for the routine
+        household: Optional household namespace (default household if omitted)
         
     Returns:
         Dictionary with status information
     """
-    routines = load_routines()
-    
-    if routine_id not in routines:
+    repository = get_repository(household)
+    if repository.get(routine_id) is None:
         return {
             "status": "error",
             "message": f"Routine '{routine_id}' not found"
         }
     
-    del routines[routine_id]
-    
-    if save_routines(routines):
+    if repository.delete(routine_id):
         return {
             "status": "success",
             "action": "routine_deleted",
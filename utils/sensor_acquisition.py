@@ -0,0 +1,195 @@
+"""
+Sensor acquisition thread for Indistinguishable From Magic hardware.
+A single background thread owns Hardware.read() and publishes timestamped
+snapshots of the configured sensor channels. Warning and guidance handlers
+consume the latest snapshot at their own rates instead of spinning on read().
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils.ring_buffer import SensorHistory
+
+DEFAULT_ACQUISITION_RATE_HZ = 50.0  # Hardware reads per second
+DEFAULT_HISTORY_SIZE = 256  # Snapshots kept in the ring buffer
+
+
+class SensorSnapshot:
+    """Immutable set of channel values read from the hardware at one instant."""
+
+    __slots__ = ("seq", "timestamp", "values")
+
+    def __init__(self, seq: int, timestamp: float, values: Dict[str, Any]):
+        self.seq = seq  # Increases by one per successful read
+        self.timestamp = timestamp  # Wall-clock time of the read (time.time())
+        self.values = values  # channel name -> value (None if the channel could not be read)
+
+    def get(self, channel: str, default: Any = None) -> Any:
+        """Get a channel value, or default if missing or unreadable."""
+        value = self.values.get(channel)
+        return default if value is None else value
+
+    def age(self) -> float:
+        """Seconds since this snapshot was taken."""
+        return time.time() - self.timestamp
+
+
+def extract_channels(hardware, channels: Dict[str, Callable[[Any], Any]]) -> Dict[str, Any]:
+    """Read every channel from the hardware object (None for channels that cannot be read)."""
+    values = {}
+    for name, extractor in channels.items():
+        try:
+            values[name] = extractor(hardware)
+        except (AttributeError, LookupError, TypeError, ValueError):
+            values[name] = None
+    return values
+
+
+class SensorAcquisition:
+    """
+    Background thread that reads the hardware at a fixed rate.
+
+    The newest snapshot is published by a single reference assignment, so
+    readers never take a lock; older snapshots are kept in a bounded ring
+    buffer (collections.deque, whose appends are thread-safe). If a
+    channel_history is given, every read is also recorded into it, so detectors
+    can query readings taken between their own ticks by time window.
+    """
+
+    def __init__(self, hardware, channels: Dict[str, Callable[[Any], Any]],
+                 rate_hz: float = DEFAULT_ACQUISITION_RATE_HZ,
+                 history_size: int = DEFAULT_HISTORY_SIZE,
+                 probe: Optional[Callable[[Any], Any]] = None,
+                 channel_history: Optional[SensorHistory] = None):
+        """
+        Initialize the acquisition thread (call start() to begin reading).
+
+        Args:
+            hardware: Connected Magic.Hardware object (anything with read() and modules)
+            channels: Channel name -> function extracting the value from the hardware object
+            rate_hz: Target reads per second
+            history_size: Number of snapshots to keep
+            probe: Called with the hardware object on start() and when reads recover
+                after errors (a reconnect), e.g. ModuleProbe.probe
+            channel_history: Optional per-channel history recorded on every read
+        """
+        self.hardware = hardware
+        self.channels = dict(channels)
+        self.rate_hz = rate_hz
+        self.history: deque = deque(maxlen=history_size)
+        self.latest: Optional[SensorSnapshot] = None
+        self.channel_history = channel_history
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._seq = 0
+        self.probe = probe
+        self.stats = {
+            "samples": 0,
+            "read_errors": 0,
+            "overruns": 0,  # Reads that finished after the next deadline
+            "started_at": None
+        }
+
+    def start(self):
+        """Start the acquisition thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self.stats["started_at"] = time.time()
+        if self.probe is not None:
+            self.probe(self.hardware)
+        self._thread = threading.Thread(target=self._run, name="sensor-acquisition", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 1.0):
+        """Stop the acquisition thread and wait for it to exit."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _extract(self) -> Dict[str, Any]:
+        return extract_channels(self.hardware, self.channels)
+
+    def _run(self):
+        period = 1.0 / self.rate_hz
+        next_deadline = time.monotonic()
+        failing = False
+        while not self._stop_event.is_set():
+            try:
+                self.hardware.read()
+            except Exception:
+                self.stats["read_errors"] += 1
+                failing = True
+                print(".", end="", flush=True)
+                self._stop_event.wait(0.01)
+                continue
+            if failing:
+                # Reads work again (e.g. after a reconnect): modules may have moved or been swapped
+                failing = False
+                if self.probe is not None:
+                    self.probe(self.hardware)
+
+            self._seq += 1
+            snapshot = SensorSnapshot(self._seq, time.time(), self._extract())
+            self.history.append(snapshot)
+            if self.channel_history is not None:
+                self.channel_history.record_snapshot(snapshot)
+            self.latest = snapshot
+            self.stats["samples"] += 1
+
+            next_deadline += period
+            delay = next_deadline - time.monotonic()
+            if delay > 0:
+                self._stop_event.wait(delay)
+            else:
+                # Fell behind - resynchronize instead of bursting to catch up
+                self.stats["overruns"] += 1
+                next_deadline = time.monotonic()
+
+    def sample_rate(self) -> float:
+        """Achieved reads per second since start()."""
+        started_at = self.stats["started_at"]
+        if not started_at:
+            return 0.0
+        elapsed = time.time() - started_at
+        return self.stats["samples"] / elapsed if elapsed > 0 else 0.0
+
+
+def consume_snapshots(acquisition: SensorAcquisition,
+                      consumers: List[Tuple[float, Callable[[SensorSnapshot], None]]],
+                      stop_event: Optional[threading.Event] = None):
+    """
+    Run snapshot consumers on the calling thread, each at its own rate.
+
+    A consumer is only called when a snapshot newer than the one it last saw
+    is available, so slow handlers never see the same sample twice and fast
+    handlers never run ahead of the hardware.
+
+    Args:
+        acquisition: Started SensorAcquisition to read snapshots from
+        consumers: (rate_hz, callback) pairs; callback receives the latest SensorSnapshot
+        stop_event: Optional event that ends the loop when set
+    """
+    now = time.monotonic()
+    periods = [1.0 / rate_hz for rate_hz, _callback in consumers]
+    next_due = [now] * len(consumers)
+    last_seq = [0] * len(consumers)
+
+    while stop_event is None or not stop_event.is_set():
+        now = time.monotonic()
+        snapshot = acquisition.latest
+        for index, (_rate_hz, callback) in enumerate(consumers):
+            if now < next_due[index]:
+                continue
+            next_due[index] = max(next_due[index] + periods[index], now)
+            if snapshot is None or snapshot.seq == last_seq[index]:
+                continue
+            last_seq[index] = snapshot.seq
+            callback(snapshot)
+
+        delay = min(next_due) - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
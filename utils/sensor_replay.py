@@ -0,0 +1,414 @@
+"""
+Sensor record/replay for the hardware loop.
+RecordingHardware wraps a connected Magic.Hardware and appends every read()
+to a compact binary log; ReplayHardware plays such a log back through the
+same interface (connect, read, modules[port]..., disconnect) at real time,
+N times faster, or as fast as possible. main.py (--record/--replay) and the
+kitchen demo can then run without devices, and a week of recorded data can
+be pushed through the detectors in seconds to profile them or check
+threshold changes (replay_snapshots runs them deterministically).
+
+Log format (little-endian):
+    b"HHREC1\\n"
+    uint32 header length, then a JSON header:
+        {"version": 1, "started_at": <unix time>, "fields": [[port, path], ...]}
+    one record per read():
+        float64 timestamp, uint32 bitmask of the fields present, then for each
+        present field a type byte and its value:
+            b"i": int64       b"d": float64       b"b": uint8 (bool)
+            b"a": uint8 rows, uint8 cols, rows*cols float32 (1-D arrays have rows = 0)
+
+A path is a dotted attribute path on the port's module ("data.strength");
+"name()" records the value returned by that method and replays it as a
+method. Thermal frames (8x8 pixel_temperatures) are packed as float32
+arrays: 258 bytes instead of 64 Python floats.
+"""
+
+import json
+import struct
+import threading
+import time
+from array import array
+from operator import attrgetter
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from utils.sensor_acquisition import SensorSnapshot, extract_channels
+from utils.ring_buffer import SensorHistory
+
+MAGIC = b"HHREC1\n"
+MAX_FIELDS = 32  # Fields per log (one presence bit each)
+
+_RECORD_HEAD = struct.Struct("<dI")
+_INT = struct.Struct("<q")
+_FLOAT = struct.Struct("<d")
+_SHAPE = struct.Struct("<BB")
+
+Field = Tuple[int, str]
+
+
+class ReplayFinished(EOFError):
+    """Raised by ReplayHardware.read() once the log is exhausted."""
+
+
+# ----------------------------------------------------------------------
+# Recording
+# ----------------------------------------------------------------------
+
+def _encode_value(value) -> Optional[bytes]:
+    if isinstance(value, bool):
+        return b"b" + bytes([value])
+    if isinstance(value, int):
+        return b"i" + _INT.pack(value)
+    if isinstance(value, float):
+        return b"d" + _FLOAT.pack(value)
+    if hasattr(value, "tolist"):
+        value = value.tolist()  # NumPy arrays
+    if isinstance(value, (list, tuple)):
+        if value and isinstance(value[0], (list, tuple)):
+            rows, cols = len(value), len(value[0])
+            flat = array("f", (pixel for row in value for pixel in row))
+        else:
+            rows, cols = 0, len(value)
+            flat = array("f", value)
+        if rows > 255 or cols > 255 or len(flat) != max(rows, 1) * cols:
+            return None
+        return b"a" + _SHAPE.pack(rows, cols) + flat.tobytes()
+    try:
+        return b"d" + _FLOAT.pack(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class SensorRecorder:
+    """Appends read() samples of a fixed set of module fields to a binary log."""
+
+    def __init__(self, path: str, fields: Sequence[Field]):
+        """
+        Create (truncate) the log and write its header.
+
+        Args:
+            path: Log file path
+            fields: (port, path) pairs to record on every sample
+        """
+        if len(fields) > MAX_FIELDS:
+            raise ValueError(f"At most {MAX_FIELDS} fields can be recorded")
+        self.path = path
+        self.fields = [(int(port), str(field_path)) for port, field_path in fields]
+        self._getters = [(port, attrgetter(field_path[:-2] if field_path.endswith("()") else field_path),
+                          field_path.endswith("()")) for port, field_path in self.fields]
+        self._file = open(path, "wb")
+        header = json.dumps({"version": 1, "started_at": time.time(), "fields": self.fields}).encode("utf-8")
+        self._file.write(MAGIC + struct.pack("<I", len(header)) + header)
+        self._lock = threading.Lock()
+        self.records = 0
+
+    def record(self, hardware, timestamp: Optional[float] = None):
+        """Append the current values of every field (missing fields are skipped)."""
+        mask = 0
+        parts = []
+        for index, (port, getter, call) in enumerate(self._getters):
+            try:
+                value = getter(hardware.modules[port])
+                if call:
+                    value = value()
+            except (AttributeError, IndexError, KeyError, TypeError, ValueError):
+                continue
+            encoded = _encode_value(value)
+            if encoded is not None:
+                mask |= 1 << index
+                parts.append(encoded)
+        data = _RECORD_HEAD.pack(time.time() if timestamp is None else timestamp, mask) + b"".join(parts)
+        with self._lock:
+            self._file.write(data)
+            self.records += 1
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+class RecordingHardware:
+    """Wraps a hardware object and records every successful read() (everything else is passed through)."""
+
+    def __init__(self, hardware, recorder: SensorRecorder):
+        self._hardware = hardware
+        self.recorder = recorder
+
+    def read(self):
+        result = self._hardware.read()
+        self.recorder.record(self._hardware)
+        return result
+
+    def disconnect(self):
+        self.recorder.close()
+        return self._hardware.disconnect()
+
+    def __getattr__(self, name):
+        return getattr(self._hardware, name)
+
+
+# ----------------------------------------------------------------------
+# Reading logs
+# ----------------------------------------------------------------------
+
+def _read_exact(f, size: int) -> bytes:
+    data = f.read(size)
+    if len(data) != size:
+        raise ReplayFinished("Truncated record")
+    return data
+
+
+def _decode_value(f):
+    tag = f.read(1)
+    if tag == b"i":
+        return _INT.unpack(_read_exact(f, _INT.size))[0]
+    if tag == b"d":
+        return _FLOAT.unpack(_read_exact(f, _FLOAT.size))[0]
+    if tag == b"b":
+        return bool(_read_exact(f, 1)[0])
+    if tag == b"a":
+        rows, cols = _SHAPE.unpack(_read_exact(f, _SHAPE.size))
+        flat = array("f")
+        flat.frombytes(_read_exact(f, max(rows, 1) * cols * flat.itemsize))
+        if rows == 0:
+            return flat.tolist()
+        return [flat[row * cols:(row + 1) * cols].tolist() for row in range(rows)]
+    raise ReplayFinished(f"Unknown value type {tag!r}")
+
+
+class SensorLog:
+    """Reader for a recorded log."""
+
+    def __init__(self, path: str):
+        """
+        Open a log and read its header.
+
+        Raises:
+            ValueError: if the file is not a sensor log
+        """
+        self.path = path
+        self._file = open(path, "rb")
+        if self._file.read(len(MAGIC)) != MAGIC:
+            self._file.close()
+            raise ValueError(f"{path} is not a sensor log")
+        header_length = struct.unpack("<I", self._file.read(4))[0]
+        header = json.loads(self._file.read(header_length).decode("utf-8"))
+        self.started_at = header.get("started_at")
+        self.fields: List[Field] = [(int(port), field_path) for port, field_path in header["fields"]]
+
+    def __iter__(self) -> Iterator[Tuple[float, Dict[int, Any]]]:
+        """Yield (timestamp, {field index: value}) per record; a truncated last record ends the log."""
+        while True:
+            head = self._file.read(_RECORD_HEAD.size)
+            if len(head) < _RECORD_HEAD.size:
+                return
+            timestamp, mask = _RECORD_HEAD.unpack(head)
+            values = {}
+            try:
+                for index in range(len(self.fields)):
+                    if mask & (1 << index):
+                        values[index] = _decode_value(self._file)
+            except ReplayFinished:
+                return  # Recording interrupted mid-record
+            yield timestamp, values
+
+    def close(self):
+        self._file.close()
+
+
+# ----------------------------------------------------------------------
+# Replay
+# ----------------------------------------------------------------------
+
+class _Node:
+    """Attribute container standing in for a module (or its data object)."""
+
+
+class ReplayModules(dict):
+    """
+    Port -> module map of a replay. Any port can be addressed: ports with no
+    recorded fields (e.g. the glow modules) get an empty module whose out
+    object accepts LED/motor commands.
+    """
+
+    def __missing__(self, port):
+        module = self[port] = _Node()
+        module.out = ReplayOutput()
+        return module
+
+
+class ReplayOutput:
+    """A module's out object during replay: accepts and counts LED/motor commands."""
+
+    def __init__(self):
+        self.commands = 0
+        self.last = None
+
+    def __getattr__(self, method):
+        def command(*args):
+            self.commands += 1
+            self.last = (method, args)
+        return command
+
+
+class ReplayHardware:
+    """
+    Plays a sensor log back through the Magic.Hardware interface.
+
+    speed=1 replays in real time, speed=N N times faster, speed=0 (or None)
+    as fast as the caller reads. clock() returns the recorded time of the
+    current sample, so consumers that use snapshot timestamps (debounce
+    windows, the laundry monitor) behave the same at any speed.
+    """
+
+    self_paced = True  # read() keeps the recording's timing; callers should not add their own delay
+
+    def __init__(self, path: str, speed: Optional[float] = 1.0):
+        """
+        Initialize the replay (the log is opened on connect()).
+
+        Args:
+            path: Log written by SensorRecorder
+            speed: Playback speed factor (0 or None: no delay between samples)
+        """
+        self.path = path
+        self.speed = speed or 0
+        self.modules = ReplayModules()
+        self.samples = 0
+        self.finished = threading.Event()
+        self._log: Optional[SensorLog] = None
+        self._records: Optional[Iterator] = None
+        self._pending = None
+        self._setters = []
+        self._timestamp = None
+        self._first_timestamp = None
+        self._started = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.disconnect()
+
+    def connect(self):
+        self._log = SensorLog(self.path)
+        self._records = iter(self._log)
+        self.modules = ReplayModules()
+        self._setters = [self._setter(port, field_path) for port, field_path in self._log.fields]
+        # Show the first sample right away, like a live device after connect(), so the
+        # module probe finds its paths; read() then returns that same sample first
+        self._pending = next(self._records, None)
+        if self._pending is not None:
+            self._apply(self._pending[1])
+        print(f"[REPLAY] {self.path}: {len(self._log.fields)} fields, speed "
+              f"{'max' if not self.speed else f'{self.speed:g}x'}")
+
+    def _setter(self, port: int, field_path: str):
+        """Build the module attribute a field is replayed into; returns a function taking the value."""
+        module = self.modules[port]
+        call = field_path.endswith("()")
+        names = (field_path[:-2] if call else field_path).split(".")
+        node = module
+        for name in names[:-1]:
+            child = getattr(node, name, None)
+            if child is None:
+                child = _Node()
+                setattr(node, name, child)
+            node = child
+        leaf = names[-1]
+        if call:
+            return lambda value: setattr(node, leaf, lambda: value)
+        return lambda value: setattr(node, leaf, value)
+
+    def read(self):
+        """
+        Advance to the next sample (waiting for its time unless playing at max speed).
+
+        Raises:
+            ReplayFinished: when the log is exhausted
+        """
+        if self._records is None:
+            raise RuntimeError("ReplayHardware.read() called before connect()")
+        record, self._pending = self._pending, None
+        if record is None:
+            record = next(self._records, None)
+        if record is None:
+            self.finished.set()
+            raise ReplayFinished(f"Replay of {self.path} finished after {self.samples} samples")
+        timestamp, values = record
+        if self.speed:
+            if self._first_timestamp is None:
+                self._first_timestamp, self._started = timestamp, time.monotonic()
+            delay = (timestamp - self._first_timestamp) / self.speed - (time.monotonic() - self._started)
+            if delay > 0:
+                time.sleep(delay)
+        self._apply(values)
+        self._timestamp = timestamp
+        self.samples += 1
+        return self
+
+    def _apply(self, values: Dict[int, Any]):
+        # Fields missing from a record keep their previous value, as on the device
+        for index, value in values.items():
+            self._setters[index](value)
+
+    def clock(self) -> float:
+        """Recorded time of the current sample."""
+        return self._timestamp if self._timestamp is not None else time.time()
+
+    def disconnect(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+
+def replay_snapshots(hardware: ReplayHardware, channels: Dict[str, Callable[[Any], Any]],
+                     consumers: List[Tuple[float, Callable[[SensorSnapshot], None]]],
+                     probe: Optional[Callable[[Any], Any]] = None,
+                     stop_event: Optional[threading.Event] = None,
+                     channel_history: Optional[SensorHistory] = None) -> int:
+    """
+    Run snapshot consumers over a whole replay on the calling thread.
+
+    The replay counterpart of SensorAcquisition + consume_snapshots: every
+    recorded sample becomes a snapshot stamped with its recorded time, and
+    each consumer is due by recorded time rather than wall-clock time. The
+    same log therefore drives the same consumer calls on the same samples at
+    any playback speed - replays are repeatable, and a speed of 0 runs the
+    detectors as fast as they go.
+
+    Args:
+        hardware: Connected ReplayHardware
+        channels: Channel name -> extractor (e.g. ModuleProbe.extractors())
+        consumers: (rate_hz, callback) pairs; callback receives a SensorSnapshot
+        probe: Called with the hardware once before the first sample, e.g. ModuleProbe.probe
+        stop_event: Optional event that ends the replay early when set
+        channel_history: Optional per-channel history every sample is recorded into
+
+    Returns:
+        Number of samples replayed
+    """
+    if probe is not None:
+        probe(hardware)
+    periods = [1.0 / rate_hz for rate_hz, _callback in consumers]
+    next_due = None
+    seq = 0
+    while stop_event is None or not stop_event.is_set():
+        try:
+            hardware.read()
+        except ReplayFinished:
+            break
+        now = hardware.clock()
+        if next_due is None:
+            next_due = [now] * len(consumers)
+        seq += 1
+        snapshot = SensorSnapshot(seq, now, extract_channels(hardware, channels))
+        if channel_history is not None:
+            channel_history.record_snapshot(snapshot)
+        for index, (_rate_hz, callback) in enumerate(consumers):
+            if now < next_due[index]:
+                continue
+            next_due[index] = max(next_due[index] + periods[index], now)
+            callback(snapshot)
+    return seq
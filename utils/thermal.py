@@ -0,0 +1,202 @@
+"""
+Thermal frame processing for the thermal camera module's pixel_temperatures.
+Each 8x8 frame is converted to a NumPy array once and summarized in one
+vectorized pass (center mean, max, hotspot location, hot pixel count), so
+every detector reads the same precomputed statistics instead of re-walking
+the frame.
+"""
+
+from typing import Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+    print("[DEBUG] NumPy not available, thermal frames will be processed in pure Python")
+
+KELVIN_OFFSET = 273.15
+# unit="auto": frames whose coldest pixel is above this are in Kelvin. A Kelvin
+# frame's ambient is ~295, while a Celsius frame keeps pixels far below 200 even
+# when a burner in view is hotter than that (so the max cannot decide)
+KELVIN_DETECTION_C = 200
+THERMAL_UNITS = ("celsius", "kelvin", "auto")
+DEFAULT_CENTER_SIZE = 4  # Center window used for the stove/water temperature
+DEFAULT_HOT_THRESHOLD_C = 50.0  # Pixels above this count as hot
+
+
+class ThermalFrameStats:
+    """Statistics for one thermal frame (all temperatures in Celsius)."""
+
+    __slots__ = ("frame", "center_mean", "max", "min", "mean", "hotspot", "edge_max",
+                 "hot_pixels", "converted_from_kelvin")
+
+    def __init__(self, frame, center_mean: float, max_c: float, min_c: float, mean: float,
+                 hotspot: Tuple[int, int], edge_max: Optional[float], hot_pixels: int,
+                 converted_from_kelvin: bool):
+        self.frame = frame  # Celsius frame (NumPy array, or list of rows without NumPy)
+        self.center_mean = center_mean  # Mean of the center window
+        self.max = max_c
+        self.min = min_c
+        self.mean = mean
+        self.hotspot = hotspot  # (row, col) of the hottest pixel
+        self.edge_max = edge_max  # Hottest pixel outside the center window (None if the window is the whole frame)
+        self.hot_pixels = hot_pixels  # Pixels above the processor's hot threshold
+        self.converted_from_kelvin = converted_from_kelvin
+
+    def to_dict(self) -> dict:
+        """Get the statistics as a dictionary (without the frame)."""
+        return {
+            "center_mean": self.center_mean,
+            "max": self.max,
+            "min": self.min,
+            "mean": self.mean,
+            "hotspot": list(self.hotspot),
+            "edge_max": self.edge_max,
+            "hot_pixels": self.hot_pixels,
+            "converted_from_kelvin": self.converted_from_kelvin
+        }
+
+
+class ThermalFrameProcessor:
+    """
+    Summarizes thermal frames in a single pass.
+
+    The center window slices and the edge mask are precomputed for the frame
+    shape and reused for every frame of that shape.
+    """
+
+    def __init__(self, center_size: int = DEFAULT_CENTER_SIZE,
+                 hot_threshold_c: float = DEFAULT_HOT_THRESHOLD_C,
+                 unit: str = "celsius"):
+        """
+        Initialize the processor.
+
+        Args:
+            center_size: Side length of the centered window averaged for center_mean
+            hot_threshold_c: Temperature above which a pixel counts as hot
+            unit: Unit of the module's pixel_temperatures: "celsius", "kelvin", or
+                "auto" (Kelvin when the frame minimum is above KELVIN_DETECTION_C)
+
+        Raises:
+            ValueError: for an unknown unit
+        """
+        if unit not in THERMAL_UNITS:
+            raise ValueError(f"Unknown thermal unit '{unit}'. Must be one of: {', '.join(THERMAL_UNITS)}")
+        self.center_size = center_size
+        self.unit = unit
+        self.hot_threshold_c = hot_threshold_c
+        self._shape = None
+        self._center = None  # (row slice, col slice)
+        self._edge_mask = None
+
+    def _prepare(self, rows: int, cols: int):
+        size_r = min(self.center_size, rows)
+        size_c = min(self.center_size, cols)
+        r0 = (rows - size_r) // 2
+        c0 = (cols - size_c) // 2
+        self._center = (slice(r0, r0 + size_r), slice(c0, c0 + size_c))
+        if NUMPY_AVAILABLE:
+            mask = np.ones((rows, cols), dtype=bool)
+            mask[self._center] = False
+            self._edge_mask = mask if mask.any() else None
+        self._shape = (rows, cols)
+
+    def process(self, pixels: Sequence[Sequence[float]]) -> Optional[ThermalFrameStats]:
+        """
+        Summarize one frame.
+
+        Args:
+            pixels: pixel_temperatures rows (in the processor's unit)
+
+        Returns:
+            ThermalFrameStats, or None if the frame is empty
+        """
+        if not NUMPY_AVAILABLE:
+            return self._process_python(pixels)
+
+        frame = np.array(pixels, dtype=np.float32)  # Copy, so later reads cannot change it
+        if frame.ndim != 2 or frame.size == 0:
+            return None
+        if frame.shape != self._shape:
+            self._prepare(*frame.shape)
+
+        if self.unit == "auto":
+            converted = float(frame.min()) > KELVIN_DETECTION_C
+        else:
+            converted = self.unit == "kelvin"
+        if converted:
+            frame -= KELVIN_OFFSET
+        max_c = float(frame.max())
+        flat_index = int(frame.argmax())
+        hotspot = (flat_index // frame.shape[1], flat_index % frame.shape[1])
+        edge_max = float(frame[self._edge_mask].max()) if self._edge_mask is not None else None
+        return ThermalFrameStats(
+            frame=frame,
+            center_mean=float(frame[self._center].mean()),
+            max_c=max_c,
+            min_c=float(frame.min()),
+            mean=float(frame.mean()),
+            hotspot=hotspot,
+            edge_max=edge_max,
+            hot_pixels=int(np.count_nonzero(frame > self.hot_threshold_c)),
+            converted_from_kelvin=converted
+        )
+
+    def _process_python(self, pixels) -> Optional[ThermalFrameStats]:
+        frame = [[float(value) for value in row] for row in pixels]
+        if not frame or not frame[0]:
+            return None
+        rows, cols = len(frame), len(frame[0])
+        if (rows, cols) != self._shape:
+            self._prepare(rows, cols)
+
+        if self.unit == "auto":
+            converted = min(min(row) for row in frame) > KELVIN_DETECTION_C
+        else:
+            converted = self.unit == "kelvin"
+        if converted:
+            frame = [[value - KELVIN_OFFSET for value in row] for row in frame]
+        max_c = max(max(row) for row in frame)
+        row_slice, col_slice = self._center
+        center = [value for row in frame[row_slice] for value in row[col_slice]]
+        edge = [frame[r][c] for r in range(rows) for c in range(cols)
+                if not (row_slice.start <= r < row_slice.stop and col_slice.start <= c < col_slice.stop)]
+        flat = [value for row in frame for value in row]
+        flat_index = flat.index(max_c)
+        return ThermalFrameStats(
+            frame=frame,
+            center_mean=sum(center) / len(center),
+            max_c=max_c,
+            min_c=min(flat),
+            mean=sum(flat) / len(flat),
+            hotspot=(flat_index // cols, flat_index % cols),
+            edge_max=max(edge) if edge else None,
+            hot_pixels=sum(1 for value in flat if value > self.hot_threshold_c),
+            converted_from_kelvin=converted
+        )
+
+
+if __name__ == "__main__":
+    # Regression checks: python -m utils.thermal
+    def _frame(ambient, center, hot_pixel=None):
+        rows = [[center if 2 <= r < 6 and 2 <= c < 6 else ambient for c in range(8)] for r in range(8)]
+        if hot_pixel is not None:
+            rows[0][0] = hot_pixel
+        return rows
+
+    for numpy_enabled in ([True, False] if NUMPY_AVAILABLE else [False]):
+        NUMPY_AVAILABLE = numpy_enabled
+        # A Celsius frame with one burner pixel above 200 C stays Celsius (unit set or detected)
+        for unit in ("celsius", "auto"):
+            stats = ThermalFrameProcessor(center_size=4, unit=unit).process(_frame(25.0, 60.0, hot_pixel=260.0))
+            assert not stats.converted_from_kelvin, unit
+            assert abs(stats.center_mean - 60.0) < 1e-3 and abs(stats.edge_max - 260.0) < 1e-3, unit
+            assert stats.hot_pixels == 17, unit
+        # Kelvin frames are converted when configured or detected from the frame minimum
+        for unit in ("kelvin", "auto"):
+            stats = ThermalFrameProcessor(center_size=4, unit=unit).process(_frame(298.15, 333.15))
+            assert stats.converted_from_kelvin, unit
+            assert abs(stats.center_mean - 60.0) < 1e-3 and abs(stats.min - 25.0) < 1e-3, unit
+        print(f"[THERMAL] Checks passed ({'NumPy' if numpy_enabled else 'pure Python'})")
@@ -0,0 +1,235 @@
+"""
+Persistent on-disk cache of synthesized text-to-speech audio.
+Most of what HelpingHome says comes from the fixed dialogue table and from
+recipe/routine step text, so repeat phrases are served from local MP3 files
+instead of calling ElevenLabs again.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+# Get project root directory
+_script_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(_script_dir)
+
+# Cache location and size cap (set via environment variables or defaults)
+TTS_CACHE_DIR = os.getenv('TTS_CACHE_DIR', os.path.join(project_root, 'data', 'tts_cache'))
+TTS_CACHE_MAX_BYTES = int(os.getenv('TTS_CACHE_MAX_MB', '200')) * 1024 * 1024
+
+
+def make_cache_key(text: str, voice_id: str, model_id: str, voice_settings: Dict,
+                   output_format: str = "mp3_44100_128") -> str:
+    """
+    Build the content address for a synthesized clip.
+
+    Args:
+        text: Text that was synthesized
+        voice_id: ElevenLabs voice ID
+        model_id: ElevenLabs model ID
+        voice_settings: Voice settings dictionary passed to the API
+        output_format: Audio output format requested from the API
+
+    Returns:
+        Hex SHA-256 digest identifying the clip
+    """
+    payload = json.dumps({
+        "text": text,
+        "voice_id": voice_id,
+        "model_id": model_id,
+        "voice_settings": voice_settings,
+        "output_format": output_format
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class TTSCache:
+    """
+    Content-addressed MP3 cache with an LRU size cap.
+
+    Clips are stored as <cache_dir>/<key[:2]>/<key>.mp3. Reads are memory-mapped,
+    writes are atomic (temp file + rename) so several processes can share one
+    cache directory, and file mtimes record recency so LRU order survives restarts.
+    """
+
+    def __init__(self, cache_dir: str = TTS_CACHE_DIR, max_bytes: int = TTS_CACHE_MAX_BYTES):
+        """
+        Initialize the cache and index any clips already on disk.
+
+        Args:
+            cache_dir: Directory holding cached clips
+            max_bytes: Total size cap; least recently used clips are evicted beyond it
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index: "OrderedDict[str, int]" = OrderedDict()  # key -> size, oldest first
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes_served = 0
+        self.characters_saved = 0  # ElevenLabs bills per character synthesized
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load_index()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.mp3")
+
+    def _load_index(self):
+        """Index existing clips, least recently used first."""
+        entries = []
+        for root, _dirs, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith('.mp3'):
+                    continue
+                try:
+                    st = os.stat(os.path.join(root, name))
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, name[:-4], st.st_size))
+        entries.sort()
+        for _mtime, key, size in entries:
+            self._index[key] = size
+            self._total_bytes += size
+
+    def contains(self, key: str) -> bool:
+        """Check whether a clip is cached (including clips written by other processes)."""
+        with self._lock:
+            if key in self._index:
+                return True
+        return os.path.exists(self._path(key))
+
+    def get(self, key: str, characters: int = 0) -> Optional[bytes]:
+        """
+        Read a cached clip.
+
+        Args:
+            key: Cache key from make_cache_key()
+            characters: Length of the text, counted towards characters_saved on a hit
+
+        Returns:
+            MP3 bytes if cached, None otherwise
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                if size == 0:
+                    raise FileNotFoundError(path)
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    data = mm[:]
+            os.utime(path)  # Persist recency for LRU ordering across restarts
+        except (FileNotFoundError, ValueError):
+            with self._lock:
+                self.misses += 1
+                if key in self._index:
+                    self._total_bytes -= self._index.pop(key)
+            return None
+        except OSError as e:
+            print(f"[DEBUG] TTS cache read failed for {key[:12]}: {e}")
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+            self.bytes_served += size
+            self.characters_saved += characters
+            if key in self._index:
+                self._index.move_to_end(key)
+            else:
+                self._index[key] = size
+                self._total_bytes += size
+        return data
+
+    def put(self, key: str, data: bytes) -> bool:
+        """
+        Store a clip, evicting least recently used clips if over the size cap.
+
+        Args:
+            key: Cache key from make_cache_key()
+            data: MP3 bytes
+
+        Returns:
+            True if stored, False otherwise
+        """
+        if not data:
+            return False
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"[DEBUG] TTS cache write failed for {key[:12]}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return False
+
+        with self._lock:
+            if key in self._index:
+                self._total_bytes -= self._index.pop(key)
+            self._index[key] = len(data)
+            self._total_bytes += len(data)
+            self._evict_locked()
+        return True
+
+    def _evict_locked(self):
+        while self._total_bytes > self.max_bytes and len(self._index) > 1:
+            key, size = self._index.popitem(last=False)
+            self._total_bytes -= size
+            self.evictions += 1
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def stats(self) -> Dict[str, any]:
+        """
+        Get cache counters.
+
+        Returns:
+            Dictionary with hit/miss counts, hit rate, size and savings
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._index),
+                "total_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "bytes_served": self.bytes_served,
+                "characters_saved": self.characters_saved
+            }
+
+
+# Global cache instance (initialized when needed)
+_tts_cache: Optional[TTSCache] = None
+_tts_cache_lock = threading.Lock()
+
+
+def get_tts_cache() -> Optional[TTSCache]:
+    """Get or create the global TTS cache instance."""
+    global _tts_cache
+
+    if _tts_cache is None:
+        with _tts_cache_lock:
+            if _tts_cache is None:
+                try:
+                    _tts_cache = TTSCache()
+                except OSError as e:
+                    print(f"[DEBUG] Could not initialize TTS cache: {e}")
+                    return None
+    return _tts_cache